@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark of log polling for Maho.
+Replays a chat with 10k log items, each streamed in small chunks, while a client
+polls in between, against the previous update list and the versioned delta log.
+"""
+
+import os
+import sys
+import json
+import time
+
+# Add the project root to Python path so we can import from src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.helpers.log import Log
+
+ITEMS = 10_000
+CHUNKS_PER_ITEM = 20
+POLL_EVERY = 50  # updates between two polls
+
+
+class ListLog(Log):
+    """Previous implementation: every update appended to a list, de-duplicated on poll."""
+
+    def __init__(self):
+        super().__init__()
+        self.update_list: list[int] = []
+
+    def _mark_updated(self, item, fields):
+        self.update_list.append(item.no)
+
+    def output(self, start=None):
+        start = start or 0
+        out = []
+        seen = set()
+        for update in self.update_list[start:]:
+            if update not in seen:
+                out.append(self.logs[update].output())
+                seen.add(update)
+        return out
+
+    @property
+    def poll_version(self):
+        return len(self.update_list)
+
+    @property
+    def tracked_updates(self):
+        return len(self.update_list)
+
+
+class VersionedLog(Log):
+    @property
+    def poll_version(self):
+        return self.version
+
+    @property
+    def tracked_updates(self):
+        return len(self.updates)
+
+
+def replay(log):
+    polls = 0
+    payload = 0
+    poll_seconds = 0.0
+    last_version = 0
+    updates = 0
+
+    start = time.perf_counter()
+    for i in range(ITEMS):
+        item = log.log(type="agent", heading=f"Agent 0: Generating {i}")
+        for c in range(CHUNKS_PER_ITEM):
+            item.stream(content=f"token{c} ")
+            updates += 1
+            if updates % POLL_EVERY == 0:
+                t = time.perf_counter()
+                logs = log.output(start=last_version)
+                last_version = log.poll_version
+                payload += len(json.dumps(logs))
+                poll_seconds += time.perf_counter() - t
+                polls += 1
+    total = time.perf_counter() - start
+
+    # a client reconnecting halfway through the chat
+    t = time.perf_counter()
+    log.output(start=log.poll_version // 2)
+    late_poll = time.perf_counter() - t
+
+    return {
+        "total_s": round(total, 3),
+        "poll_ms_avg": round(poll_seconds / polls * 1000, 4),
+        "late_poll_ms": round(late_poll * 1000, 2),
+        "payload_kb": round(payload / 1024),
+        "tracked_updates": log.tracked_updates,
+    }
+
+
+def main():
+    for name, log in (("update list", ListLog()), ("versioned", VersionedLog())):
+        print(f"{name:>12}: {replay(log)}")
+
+
+if __name__ == "__main__":
+    main()
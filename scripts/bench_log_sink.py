@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the HTML log for Maho.
+Streams LLM-sized tokens through PrintStyle.stream (log only, no console) with the
+previous open/append/close per call, with the background HtmlLogSink, and with
+HTML logging off, and reports tokens per second of the streaming caller.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to Python path so we can import from src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.helpers.log_sink import HtmlLogSink
+from src.helpers.print_style import PrintStyle
+
+TOKENS = 200_000
+TOKEN = "token "
+
+
+# previous implementation, kept here for comparison
+def previous_log_html(self, html):
+    with open(PrintStyle.log_file_path, "a", encoding="utf-8") as f:  # type: ignore
+        f.write(html)
+
+
+def run(mode: str, log_dir: str) -> float:
+    path = os.path.join(log_dir, f"{mode}.html")
+    PrintStyle.log_file_path = path  # type: ignore
+    PrintStyle.log_sink = HtmlLogSink(path)
+    original = PrintStyle._log_html
+    if mode == "previous":
+        PrintStyle._log_html = previous_log_html  # type: ignore
+    elif mode == "off":
+        PrintStyle._log_html = lambda self, html: None  # type: ignore
+    try:
+        printer = PrintStyle(font_color="#b3ffd9", log_only=True)
+        start = time.perf_counter()
+        for _ in range(TOKENS):
+            printer.stream(TOKEN)
+        elapsed = time.perf_counter() - start
+        PrintStyle.log_sink.flush()
+    finally:
+        PrintStyle._log_html = original  # type: ignore
+        PrintStyle.log_sink.close()
+    return TOKENS / elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as log_dir:
+        results = {mode: run(mode, log_dir) for mode in ("previous", "sink", "off")}
+        sizes = {
+            mode: os.path.getsize(os.path.join(log_dir, f"{mode}.html")) / 1024 / 1024
+            for mode in results
+        }
+    for mode, rate in results.items():
+        print(f"{mode:>8}: {rate:>10,.0f} tokens/s, log {sizes[mode]:.1f} MB")
+    print(f"sink vs previous: {results['sink'] / results['previous']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
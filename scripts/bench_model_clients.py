@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Connection reuse benchmark of the model client registry for Maho.
+Sends chat completion requests to a local stub server, once with a new HTTP client
+per call like get_model did before and once through ModelClientRegistry, and reports
+connections the server accepted and time per call.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+# Add the project root to Python path so we can import from src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.providers.registry import ModelClientRegistry
+
+CALLS = 100
+RESPONSE = json.dumps(
+    {"choices": [{"message": {"role": "assistant", "content": "ok"}}]}
+).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # headers and body go out in separate writes, don't let Nagle delay the body
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubChat:
+    """Stands in for a LangChain chat client built around the given httpx clients."""
+
+    def __init__(self, base_url: str, http_client=None, http_async_client=None):
+        self.url = f"{base_url}/v1/chat/completions"
+        self.http_client = http_client or httpx.Client()
+        self.http_async_client = http_async_client or httpx.AsyncClient()
+
+    def invoke(self, prompt: str) -> dict:
+        return self.http_client.post(self.url, json={"prompt": prompt}).json()
+
+    async def ainvoke(self, prompt: str) -> dict:
+        response = await self.http_async_client.post(self.url, json={"prompt": prompt})
+        return response.json()
+
+
+# previous implementation, kept here for comparison: a new client for every call
+def previous_get_model(base_url: str) -> StubChat:
+    return StubChat(base_url)
+
+
+def run(name: str, get_model, asynchronous: bool = False) -> tuple[int, float]:
+    before = StubHandler.connections
+    start = time.perf_counter()
+    if asynchronous:
+
+        async def calls():
+            for i in range(CALLS):
+                await get_model().ainvoke(f"call {i}")
+
+        asyncio.run(calls())
+    else:
+        for i in range(CALLS):
+            get_model().invoke(f"call {i}")
+    ms = (time.perf_counter() - start) / CALLS * 1000
+    opened = StubHandler.connections - before
+    print(f"{name:>16}: {opened:>3} connections per {CALLS} calls, {ms:.2f} ms/call")
+    return opened, ms
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    registry = ModelClientRegistry()
+
+    def registry_get_model() -> StubChat:
+        return registry.get(
+            ("stub", "model"),
+            lambda **http: StubChat(base_url, **http),
+            pooled=True,
+            label={"provider": "stub", "name": "model"},
+        )
+
+    run("previous sync", lambda: previous_get_model(base_url))
+    run("registry sync", registry_get_model)
+    run("previous async", lambda: previous_get_model(base_url), asynchronous=True)
+    run("registry async", registry_get_model, asynchronous=True)
+    print(f"registry counters: {registry.stats()}")
+
+    registry.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark of SSH terminal output processing for Maho.
+Streams a multi-megabyte build log through the previous read_output pipeline
+(1 KB receives, echo matching per chunk, full decode and clean on every read)
+and through TerminalDecoder with 64 KB receives.
+"""
+
+import os
+import re
+import sys
+import time
+
+# Add the project root to Python path so we can import from src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.helpers.strings import TerminalDecoder
+
+COMMAND = "pip install -r requirements.txt\n"
+SIZES_MB = (1, 4, 16)
+READ_EVERY_BYTES = 256 * 1024  # data received between two reads of the tool
+
+
+def make_output(size: int) -> bytes:
+    lines = [
+        "\x1b[?2004l" + COMMAND.replace("\n", "\r\n"),
+    ]
+    total = 0
+    i = 0
+    while total < size:
+        line = (
+            f"\x1b[32mCollecting\x1b[0m package-{i} (from -r requirements.txt (line {i}))\r\n"
+            f"  Downloading package_{i}-1.0-py3-none-any.whl (12 kB) é ✓\r\n"
+            f"     ━━━━━━━━━━ 50%\r     ━━━━━━━━━━ 100%\r\n"
+        )
+        lines.append(line)
+        total += len(line.encode())
+        i += 1
+    lines.append("root@container:~# ")
+    return "".join(lines).encode()
+
+
+# previous implementation, kept here for comparison
+
+
+def calculate_valid_match_lengths(
+    first, second, deviation_threshold=5, deviation_reset=5, ignore_patterns=[]
+):
+    i, j = 0, 0
+    deviations = 0
+    matched_since_deviation = 0
+    last_matched_i, last_matched_j = 0, 0
+
+    def skip_ignored_patterns(s, index):
+        while index < len(s):
+            for pattern in ignore_patterns:
+                match = re.match(pattern, s[index:])
+                if match:
+                    index += len(match.group(0))
+                    break
+            else:
+                break
+        return index
+
+    while i < len(first) and j < len(second):
+        i = skip_ignored_patterns(first, i)
+        j = skip_ignored_patterns(second, j)
+        if i < len(first) and j < len(second) and first[i] == second[j]:
+            last_matched_i, last_matched_j = i + 1, j + 1
+            i += 1
+            j += 1
+            matched_since_deviation += 1
+            if matched_since_deviation >= deviation_reset:
+                deviations = 0
+                matched_since_deviation = 0
+        else:
+            look_ahead = deviation_threshold - deviations
+            best_match = None
+            for k in range(1, look_ahead + 1):
+                if i + k < len(first) and j < len(second) and first[i + k] == second[j]:
+                    best_match = ("i", k)
+                    break
+                if j + k < len(second) and i < len(first) and first[i] == second[j + k]:
+                    best_match = ("j", k)
+                    break
+            if best_match:
+                if best_match[0] == "i":
+                    i += best_match[1]
+                else:
+                    j += best_match[1]
+            else:
+                i += 1
+                j += 1
+            deviations += 1
+            matched_since_deviation = 0
+            if deviations > deviation_threshold:
+                break
+    return last_matched_i, last_matched_j
+
+
+def clean_string(input_string):
+    ansi_escape = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+    cleaned = ansi_escape.sub("", input_string)
+    cleaned = cleaned.replace("\r\n", "\n")
+    cleaned = cleaned.lstrip("\r")
+    lines = cleaned.split("\n")
+    for i in range(len(lines)):
+        parts = [part for part in lines[i].split("\r") if part.strip()]
+        if parts:
+            lines[i] = parts[-1].rstrip()
+    return "\n".join(lines)
+
+
+def previous(data: bytes) -> tuple[float, str]:
+    last_command = COMMAND.encode()
+    trimmed_command_length = 0
+    full_output = b""
+    partial_output = b""
+    leftover = b""
+    received = 0
+    text = ""
+    start = time.perf_counter()
+    for offset in range(0, len(data), 1024):
+        chunk = data[offset : offset + 1024]
+        if len(last_command) > trimmed_command_length:
+            data_to_trim = leftover + chunk
+            trim_com, trim_out = calculate_valid_match_lengths(
+                last_command[trimmed_command_length:],
+                data_to_trim,
+                deviation_threshold=8,
+                deviation_reset=2,
+                ignore_patterns=[rb"\x1b\[\?\d{4}[a-zA-Z](?:> )?", rb"\r", rb">\s"],
+            )
+            leftover = b""
+            if trim_com > 0 and trim_out > 0:
+                chunk = data_to_trim[trim_out:]
+                leftover = chunk
+                trimmed_command_length += trim_com
+        partial_output += chunk
+        full_output += chunk
+        received += 1024
+        if received % READ_EVERY_BYTES == 0 or offset + 1024 >= len(data):
+            clean_string(partial_output.decode("utf-8", errors="replace"))
+            text = clean_string(full_output.decode("utf-8", errors="replace"))
+            partial_output = b""
+    return time.perf_counter() - start, text
+
+
+def streaming(data: bytes) -> tuple[float, str]:
+    decoder = TerminalDecoder()
+    decoder.reset(echo=COMMAND)
+    text = ""
+    start = time.perf_counter()
+    for offset in range(0, len(data), 65536):
+        decoder.feed(data[offset : offset + 65536])
+        if (offset + 65536) % READ_EVERY_BYTES == 0 or offset + 65536 >= len(data):
+            text = decoder.text
+    return time.perf_counter() - start, text
+
+
+def main():
+    for size_mb in SIZES_MB:
+        data = make_output(size_mb * 1024 * 1024)
+        old_s, old_text = previous(data)
+        new_s, new_text = streaming(data)
+        mb = len(data) / 1024 / 1024
+        print(
+            f"{size_mb:>3} MB: previous {old_s:.2f}s ({mb / old_s:.1f} MB/s, "
+            f"plus {len(data) / 1024 * 0.1:.0f}s of per-recv sleeps), "
+            f"decoder {new_s:.2f}s ({mb / new_s:.1f} MB/s), "
+            f"same text: {old_text == new_text}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -21,7 +21,8 @@ async def remove_chat(request: ChatRemoveRequest) -> BaseResponse:
     await scheduler.reload()
 
     tasks = scheduler.get_tasks_by_context_id(request.context)
-    for task in tasks:
-        await scheduler.remove_task_by_uuid(task.uuid)
+    async with scheduler.batch():
+        for task in tasks:
+            await scheduler.remove_task_by_uuid(task.uuid)
 
     return BaseResponse(message="Context removed.")
@@ -31,6 +31,10 @@ async def get_ctx_window(request: CtxWindowGetRequest) -> CtxWindowGetResponse:
             message="No context window data available"
         )
 
+    # the prompt is only formatted when the context window is requested
+    if "text" not in window:
+        prompt = window.get("prompt")  # not saved with chats, empty after a reload
+        window["text"] = prompt.format() if prompt else ""
     text = window["text"]
     tokens = window["tokens"]
 
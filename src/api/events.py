@@ -0,0 +1,78 @@
+import json
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from src.api.poll import serialize_contexts
+from src.core.context import AgentContext
+from src.helpers import change_notifier
+from src.helpers.dotenv import get_dotenv_value
+from src.helpers.localization import Localization
+
+router = APIRouter(prefix="/events", tags=["system"])
+
+# comment sent when nothing changed, keeps proxies from closing the connection
+KEEPALIVE_SECONDS = 15
+# wait after a change so token streaming is pushed in batches, not per token
+COALESCE_SECONDS = 0.05
+
+
+@router.get("")
+async def stream_events(
+    context: str,
+    log_from: int = 0,
+    log_guid: Optional[str] = None,
+    timezone: Optional[str] = None,
+) -> StreamingResponse:
+    """Server-sent events with log deltas of a context and changes of contexts and tasks.
+    Events carry the fields of the poll response that changed, /poll stays available as fallback."""
+    timezone = timezone or get_dotenv_value("DEFAULT_USER_TIMEZONE", "UTC")
+    Localization.get().set_timezone(timezone)
+
+    ctx = AgentContext.get(context)
+    if not ctx:
+        raise HTTPException(status_code=404, detail="Context not found")
+
+    return StreamingResponse(
+        _stream(ctx, log_from, log_guid),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _stream(context: AgentContext, log_from: int, log_guid: str | None):
+    log = context.log
+    subscription = change_notifier.subscribe(
+        log, change_notifier.CONTEXTS, change_notifier.TASKS
+    )
+    try:
+        fired = {log, change_notifier.CONTEXTS, change_notifier.TASKS}
+        while AgentContext.get(context.id) is context:
+            if fired:
+                state: dict = {"context": context.id}
+                if log in fired or change_notifier.CONTEXTS in fired:
+                    if log.guid != log_guid:
+                        log_from = 0  # chat was reset or replaced, send it whole
+                    state.update(
+                        logs=log.output(start=log_from),
+                        log_guid=log.guid,
+                        log_version=log.version,
+                        log_progress=log.progress if log.progress else 0.0,
+                        log_progress_active=bool(log.progress_active),
+                        paused=context.paused,
+                    )
+                    log_from, log_guid = log.version, log.guid
+                if change_notifier.CONTEXTS in fired or change_notifier.TASKS in fired:
+                    state["contexts"], state["tasks"] = serialize_contexts()
+                yield f"data: {json.dumps(state, default=str)}\n\n"
+
+            if not await subscription.wait(KEEPALIVE_SECONDS):
+                fired = set()
+                yield ": keepalive\n\n"
+                continue
+            await anyio.sleep(COALESCE_SECONDS)
+            fired = subscription.take()
+    finally:
+        change_notifier.unsubscribe(subscription)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from src.api.models import ModelClientsStatusResponse
+from src.helpers.print_style import PrintStyle
+
+router = APIRouter(prefix="/model_clients_status", tags=["models"])
+
+@router.get("", response_model=ModelClientsStatusResponse)
+async def get_model_clients_status() -> ModelClientsStatusResponse:
+    """Get request and latency counters of the shared model clients"""
+    try:
+        # Import here to avoid loading all providers with the router
+        from src.providers.factory import get_model_client_stats
+
+        return ModelClientsStatusResponse(
+            clients=get_model_client_stats(),
+            message="Model clients status retrieved successfully"
+        )
+    except Exception as e:
+        PrintStyle.error(f"Failed to get model clients status: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error retrieving model clients status: {str(e)}"
+        )
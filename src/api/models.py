@@ -270,6 +270,7 @@ class SchedulerTaskDeleteResponse(BaseResponse):
 class PollRequest(BaseModel):
     context: Optional[str] = Field(None, description="Context ID")
     log_from: int = Field(0, description="Log start position")
+    log_guid: Optional[str] = Field(None, description="GUID of the log log_from refers to")
     timezone: Optional[str] = Field("UTC", description="Timezone")
 
 
@@ -297,6 +298,14 @@ class McpServersStatusResponse(BaseResponse):
     status: List[Dict[str, Any]] = Field(..., description="MCP servers status information")
 
 
+class ModelClientsStatusResponse(BaseResponse):
+    clients: List[Dict[str, Any]] = Field(..., description="Request and latency counters per model client")
+
+
+class RateLimitersStatusResponse(BaseResponse):
+    limiters: List[Dict[str, Any]] = Field(..., description="Window totals, limits and waiting callers per model")
+
+
 class McpServersApplyRequest(BaseModel):
     mcp_servers: str = Field(..., description="MCP servers configuration JSON")
 
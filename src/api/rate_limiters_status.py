@@ -0,0 +1,23 @@
+from fastapi import APIRouter, HTTPException
+from src.api.models import RateLimitersStatusResponse
+from src.helpers.print_style import PrintStyle
+
+router = APIRouter(prefix="/rate_limiters_status", tags=["models"])
+
+@router.get("", response_model=RateLimitersStatusResponse)
+async def get_rate_limiters_status() -> RateLimitersStatusResponse:
+    """Get window totals, limits and waiting callers of the model rate limiters"""
+    try:
+        # Import here to avoid loading all providers with the router
+        from src.providers.factory import get_rate_limiter_states
+
+        return RateLimitersStatusResponse(
+            limiters=get_rate_limiter_states(),
+            message="Rate limiters status retrieved successfully"
+        )
+    except Exception as e:
+        PrintStyle.error(f"Failed to get rate limiters status: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error retrieving rate limiters status: {str(e)}"
+        )
@@ -12,7 +12,8 @@ from src.api import (
     mcp_servers_apply, mcp_server_get_detail, mcp_server_get_log,
     transcribe, download_work_dir_file, scheduler_tick, tunnel_proxy,
     upload, scheduler_task_create, scheduler_task_update, 
-    scheduler_task_run, scheduler_task_delete, poll, upload_work_dir_files, import_knowledge, connection_test
+    scheduler_task_run, scheduler_task_delete, poll, events, upload_work_dir_files, import_knowledge, connection_test,
+    model_clients_status, rate_limiters_status
 )
 
 # Create main API router
@@ -54,9 +55,12 @@ api_router.include_router(scheduler_task_update.router)
 api_router.include_router(scheduler_task_run.router)
 api_router.include_router(scheduler_task_delete.router)
 api_router.include_router(poll.router)
+api_router.include_router(events.router)
 api_router.include_router(upload_work_dir_files.router)
 api_router.include_router(import_knowledge.router)
 api_router.include_router(connection_test.router)
+api_router.include_router(model_clients_status.router)
+api_router.include_router(rate_limiters_status.router)
 
 # Export the main router
 __all__ = ["api_router"] 
\ No newline at end of file
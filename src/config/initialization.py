@@ -99,6 +99,10 @@ def initialize_agent():
         browser_model=browser_llm,
         prompts_subdir=set["agent_prompts_subdir"],
         memory_subdir=set["agent_memory_subdir"],
+        memory_persistence=set["agent_memory_persistence"],
+        memory_index=set["agent_memory_index"],
+        memory_nprobe=set["agent_memory_nprobe"],
+        memory_ef_search=set["agent_memory_ef_search"],
         knowledge_subdirs=[set["agent_knowledge_subdir"]],
         mcp_servers=set["mcp_servers"],
         code_exec_docker_enabled=False,  # Simplified for now
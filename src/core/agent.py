@@ -1,5 +1,6 @@
 import anyio
 import random
+import time
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
@@ -21,7 +22,7 @@ from src.core.models import (
 from src.helpers import extract_tools, files, errors, history, tokens
 from src.helpers import dirty_json
 from src.helpers.print_style import PrintStyle
-from src.helpers.dirty_json import DirtyJson
+from src.helpers.dirty_json import DirtyJson, DirtyJsonStream
 import src.helpers.log as Log
 from src.helpers.prompt_engine import get_prompt_engine
 
@@ -120,6 +121,7 @@ class Agent:
 
                     self.context.streaming_agent = self  # mark self as current streamer
                     self.loop_data.iteration += 1
+                    self.loop_data.params_temporary.clear()
 
                     # call message_loop_start extensions
                     await self.call_extensions(
@@ -141,11 +143,29 @@ class Agent:
                             type="agent", heading=f"{self.agent_name}: Generating"
                         )
 
-                        async def stream_callback(chunk: str, full: str):
+                        # text received since the extensions were last called
+                        unlogged = ""
+
+                        async def stream_callback(
+                            chunk: str, full: str, parsed: dict | None, changed: set[str]
+                        ):
+                            nonlocal unlogged
                             # output the agent response stream
                             if chunk:
                                 printer.stream(chunk)
-                                self.log_from_stream(full, log)
+                            unlogged += chunk
+                            # parsed is only passed when the response json changed
+                            if parsed is not None:
+                                await self.call_extensions(
+                                    "response_stream",
+                                    loop_data=self.loop_data,
+                                    text=full,
+                                    chunk=unlogged,
+                                    parsed=parsed,
+                                    changed=changed,
+                                    log_item=log,
+                                )
+                                unlogged = ""
 
                         agent_response = await self.call_chat_model(
                             prompt, callback=stream_callback
@@ -213,6 +233,7 @@ class Agent:
         # set system prompt and message history
         loop_data.system = await self.get_system_prompt(self.loop_data)
         loop_data.history_output = self.history.output()
+        history_output = list(loop_data.history_output)
 
         # and allow extensions to edit them
         await self.call_extensions("message_loop_prompts_after", loop_data=loop_data)
@@ -230,9 +251,15 @@ class Agent:
         loop_data.extras_temporary.clear()
 
         # convert history + extras to LLM format
-        history_langchain: list[BaseMessage] = history.output_langchain(
-            loop_data.history_output + extras
-        )
+        if loop_data.history_output == history_output:
+            # history not replaced by extensions, use the per record conversion cache
+            history_langchain: list[BaseMessage] = history.group_messages_abab(
+                self.history.output_langchain() + history.output_langchain(extras)
+            )
+        else:
+            history_langchain = history.output_langchain(
+                loop_data.history_output + extras
+            )
 
         # build chain from system prompt, message history and model
         system_text = "\n\n".join(loop_data.system)
@@ -243,11 +270,11 @@ class Agent:
             ]
         )
 
-        # store as last context window content
+        # store as last context window content, text is formatted when requested
         self.set_data(
             Agent.DATA_NAME_CTX_WINDOW,
             {
-                "text": prompt.format(),
+                "prompt": prompt,
                 "tokens": self.history.get_tokens()
                 + tokens.approximate_tokens(system_text)
                 + tokens.approximate_tokens(history.output_text(extras)),
@@ -423,7 +450,7 @@ class Agent:
             from src.providers.factory import parse_chunk
 
             content = parse_chunk(chunk)
-            limiter.add(output=tokens.approximate_tokens(content))
+            limiter.add(output=tokens.estimate_tokens(content))
             response += content
 
             if callback:
@@ -434,15 +461,26 @@ class Agent:
     async def call_chat_model(
         self,
         prompt: ChatPromptTemplate,
-        callback: Callable[[str, str], Awaitable[None]] | None = None,
+        callback: (
+            Callable[[str, str, dict | None, set[str]], Awaitable[None]] | None
+        ) = None,
     ):
         response = ""
+        # parsed incrementally, each chunk costs only its own length
+        parser = DirtyJsonStream()
 
         # model class
         model = self.get_chat_model()
 
-        # rate limiter
-        limiter = await self.rate_limiter(self.config.chat_model, prompt.format())
+        # rate limiter, estimated from message lengths without formatting the prompt
+        limiter = await self.rate_limiter(
+            self.config.chat_model,
+            sum(
+                tokens.estimate_tokens(str(message.content))
+                for message in prompt.messages
+                if isinstance(message, BaseMessage)
+            ),
+        )
 
         async for chunk in (prompt | model).astream({}):
             await self.handle_intervention()  # wait for intervention and handle it, if paused
@@ -451,17 +489,22 @@ class Agent:
             from src.providers.factory import parse_chunk
 
             content = parse_chunk(chunk)
-            limiter.add(output=tokens.approximate_tokens(content))
+            limiter.add(output=tokens.estimate_tokens(content))
             response += content
 
             if callback:
-                await callback(content, response)
+                parsed = None
+                if parser.feed(content) and isinstance(parser.value, dict):
+                    parsed = parser.value
+                # changed: top-level keys of parsed the chunk changed
+                await callback(content, response, parsed, parser.changed)
 
         return response
 
     async def rate_limiter(
-        self, model_config: ModelConfig, input: str, background: bool = False
+        self, model_config: ModelConfig, input: str | int, background: bool = False
     ):
+        # input is the prompt text or its estimated token count
         # rate limiter log
         wait_log = None
 
@@ -488,7 +531,9 @@ class Agent:
             model_config.limit_input,
             model_config.limit_output,
         )
-        limiter.add(input=tokens.approximate_tokens(input))
+        limiter.add(
+            input=input if isinstance(input, int) else tokens.estimate_tokens(input)
+        )
         limiter.add(requests=1)
         await limiter.wait(callback=wait_callback)
         return limiter
@@ -581,11 +626,27 @@ class Agent:
                 content=f"{self.agent_name}: Message misformat, no valid tool request found.",
             )
 
-    def log_from_stream(self, stream: str, logItem: Log.LogItem):
+    def log_from_stream(
+        self,
+        stream: str,
+        logItem: Log.LogItem,
+        parsed: dict | None = None,
+        chunk: str | None = None,
+        changed: set[str] | None = None,
+    ):
         try:
-            if len(stream) < 25:
+            if parsed is not None and chunk is not None and changed is not None:
+                # append the new text and replace only the changed values
+                if chunk:
+                    logItem.stream(content=chunk)
+                logItem.update(kvps_update={key: parsed[key] for key in changed})
+                return
+            if parsed is not None:
+                response = parsed  # already parsed incrementally
+            elif len(stream) < 25:
                 return  # no reason to try
-            response = DirtyJson.parse_string(stream)
+            else:
+                response = DirtyJson.parse_string(stream)
             if isinstance(response, dict):
                 # log if result is a dictionary already
                 logItem.update(content=stream, kvps=response)
@@ -598,9 +659,7 @@ class Agent:
         from src.tools.unknown import Unknown
         from src.helpers.tool import Tool
 
-        classes = extract_tools.load_classes_from_folder(
-            "src/tools", name + ".py", Tool
-        )
+        classes = extract_tools.load_classes_cached("src/tools", name + ".py", Tool)
         tool_class = classes[0] if classes else Unknown
         return tool_class(
             agent=self, name=name, method=method, args=args, message=message, **kwargs
@@ -609,8 +668,11 @@ class Agent:
     async def call_extensions(self, folder: str, **kwargs) -> Any:
         from src.helpers.extension import Extension
 
-        classes = extract_tools.load_classes_from_folder(
-            "src/extensions/" + folder, "*", Extension
-        )
-        for cls in classes:
-            await cls(agent=self).execute(**kwargs)
+        folder = "src/extensions/" + folder
+        classes = extract_tools.load_classes_cached(folder, "*", Extension)
+        started = time.perf_counter()
+        try:
+            for cls in classes:
+                await cls(agent=self).execute(**kwargs)
+        finally:
+            extract_tools.record_execution(folder, time.perf_counter() - started)
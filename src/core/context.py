@@ -10,6 +10,8 @@ if TYPE_CHECKING:
 from src.core.models import AgentConfig, AgentContextType, UserMessage
 from src.helpers import log as Log
 from src.helpers.localization import Localization
+from src.helpers import change_notifier
+from src.helpers.background_task import BackgroundTask
 
 
 class AgentContext:
@@ -55,6 +57,25 @@ class AgentContext:
         if existing:
             AgentContext.remove(self.id)
         self._contexts[self.id] = self
+        change_notifier.notify(change_notifier.CONTEXTS)
+
+    @property
+    def name(self) -> str | None:
+        return self._name
+
+    @name.setter
+    def name(self, value: str | None):
+        self._name = value
+        change_notifier.notify(change_notifier.CONTEXTS)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    @paused.setter
+    def paused(self, value: bool):
+        self._paused = value
+        change_notifier.notify(change_notifier.CONTEXTS)
 
     @staticmethod
     def get(id: str):
@@ -75,6 +96,7 @@ class AgentContext:
         context = AgentContext._contexts.pop(id, None)
         if context:
             context.kill_process()
+            change_notifier.notify(change_notifier.CONTEXTS)
         return context
 
     def serialize(self):
@@ -88,7 +110,7 @@ class AgentContext:
             ),
             "no": self.no,
             "log_guid": self.log.guid,
-            "log_version": len(self.log.updates),
+            "log_version": self.log.version,
             "log_length": len(self.log.logs),
             "paused": self.paused,
             "last_message": (
@@ -119,6 +141,15 @@ class AgentContext:
             )
         return items
 
+    def run_background(
+        self, func: Callable[..., Coroutine[Any, Any, Any]], *args: Any, **kwargs: Any
+    ) -> BackgroundTask | None:
+        """Start func next to the running agent task without waiting for it.
+        Returns None when no agent task is running."""
+        if not self._task_group:
+            return None
+        return BackgroundTask(func, *args, **kwargs).start(self._task_group)
+
     def kill_process(self):
         if self._cancel_scope and not self._cancel_scope.cancelled_caught:
             self._cancel_scope.cancel()
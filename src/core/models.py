@@ -35,6 +35,10 @@ class AgentConfig:
     mcp_servers: str
     prompts_subdir: str = ""
     memory_subdir: str = ""
+    memory_persistence: str = "wal"
+    memory_index: str = "flat"
+    memory_nprobe: int = 16
+    memory_ef_search: int = 512
     knowledge_subdirs: list[str] = field(default_factory=lambda: ["default", "custom"])
     code_exec_docker_enabled: bool = False
     code_exec_docker_name: str = "maho-dev"
@@ -72,6 +76,8 @@ class LoopData:
         self.extras_temporary: OrderedDict[str, history.MessageContent] = OrderedDict()
         self.extras_persistent: OrderedDict[str, history.MessageContent] = OrderedDict()
         self.last_response = ""
+        # values shared by extensions and tools within one message loop iteration
+        self.params_temporary: dict[str, Any] = {}
 
         # override values with kwargs
         for key, value in kwargs.items():
@@ -1,22 +1,32 @@
 from src.helpers.extension import Extension
+from src.helpers import errors
 from src.core.agent import LoopData
-from src.extensions.message_loop_prompts_after._50_recall_memories import (
+from src.extensions.message_loop_start._50_recall_memories import (
     DATA_NAME_TASK as DATA_NAME_TASK_MEMORIES,
 )
-from src.extensions.message_loop_prompts_after._51_recall_solutions import (
+from src.extensions.message_loop_start._51_recall_solutions import (
     DATA_NAME_TASK as DATA_NAME_TASK_SOLUTIONS,
 )
 
 
 class RecallWait(Extension):
-    async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
 
-        task = self.agent.get_data(DATA_NAME_TASK_MEMORIES)
-        if task and not task.done():
-            # self.agent.context.log.set_progress("Recalling memories...")
-            await task
+    # seconds to wait for recall started this iteration, later results go to the next one
+    DEADLINE = 2.0
+
+    async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
 
-        task = self.agent.get_data(DATA_NAME_TASK_SOLUTIONS)
-        if task and not task.done():
-            # self.agent.context.log.set_progress("Recalling solutions...")
-            await task
+        for name in (DATA_NAME_TASK_MEMORIES, DATA_NAME_TASK_SOLUTIONS):
+            task = self.agent.get_data(name)
+            if not task:
+                continue
+            if not task.done():
+                # self.agent.context.log.set_progress("Recalling memories...")
+                await task.wait(RecallWait.DEADLINE)
+            if task.error:
+                self.agent.context.log.log(
+                    type="warning",
+                    heading="Memory recall failed",
+                    content=errors.format_error(task.error),
+                )
+                self.agent.set_data(name, None)
@@ -1,4 +1,3 @@
-import anyio
 from src.helpers.extension import Extension
 from src.helpers.memory import Memory
 from src.core.agent import LoopData
@@ -17,19 +16,23 @@ class RecallMemories(Extension):
 
         # every 3 iterations (or the first one) recall memories
         if loop_data.iteration % RecallMemories.INTERVAL == 0:
-            # Use anyio task group for structured concurrency
-            async with anyio.create_task_group() as tg:
-                tg.start_soon(self.search_memories, loop_data, **kwargs)
-
-        # No need to store task reference with anyio task groups
-        self.agent.set_data(DATA_NAME_TASK, None)
+            # a recall still running from earlier iterations is outdated
+            task = self.agent.get_data(DATA_NAME_TASK)
+            if task and not task.done():
+                task.cancel()
+
+            # search in background, results are placed in extras once ready
+            task = self.agent.context.run_background(
+                self.search_memories, loop_data, **kwargs
+            )
+            self.agent.set_data(DATA_NAME_TASK, task)
+            if not task:
+                # no running agent task to attach to
+                await self.search_memories(loop_data, **kwargs)
 
     async def search_memories(self, loop_data: LoopData, **kwargs):
 
-        # cleanup
         extras = loop_data.extras_persistent
-        if "memories" in extras:
-            del extras["memories"]
 
         # try:
         # show temp info message
@@ -69,7 +72,7 @@ class RecallMemories(Extension):
         # get solutions database
         db = await Memory.get(self.agent)
 
-        memories = await db.search_similarity_threshold(
+        memories = await db.search_similarity_threshold_cached(
             query=query,
             limit=RecallMemories.RESULTS,
             threshold=RecallMemories.THRESHOLD,
@@ -81,6 +84,9 @@ class RecallMemories(Extension):
             log_item.update(
                 heading="No useful memories found",
             )
+            # cleanup
+            if "memories" in extras:
+                del extras["memories"]
             return
         else:
             log_item.update(
@@ -98,7 +104,7 @@ class RecallMemories(Extension):
 
         # place to prompt
         engine = get_prompt_engine()
-        result = engine.render("components/memory/memories_system.j2", memories=memories_text)
+        result = engine.render("components/memory/memories.j2", memories=memories_text)
         # Parse as JSON if needed for compatibility
         try:
             import json
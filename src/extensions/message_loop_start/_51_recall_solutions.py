@@ -1,4 +1,3 @@
-import anyio
 from src.helpers.extension import Extension
 from src.helpers.memory import Memory
 from src.core.agent import LoopData
@@ -18,19 +17,23 @@ class RecallSolutions(Extension):
 
         # every 3 iterations (or the first one) recall memories
         if loop_data.iteration % RecallSolutions.INTERVAL == 0:
-            # Use anyio task group for structured concurrency
-            async with anyio.create_task_group() as tg:
-                tg.start_soon(self.search_solutions, loop_data, **kwargs)
-
-        # No need to store task reference with anyio task groups
-        self.agent.set_data(DATA_NAME_TASK, None)
+            # a recall still running from earlier iterations is outdated
+            task = self.agent.get_data(DATA_NAME_TASK)
+            if task and not task.done():
+                task.cancel()
+
+            # search in background, results are placed in extras once ready
+            task = self.agent.context.run_background(
+                self.search_solutions, loop_data, **kwargs
+            )
+            self.agent.set_data(DATA_NAME_TASK, task)
+            if not task:
+                # no running agent task to attach to
+                await self.search_solutions(loop_data, **kwargs)
 
     async def search_solutions(self, loop_data: LoopData, **kwargs):
 
-        # cleanup
         extras = loop_data.extras_persistent
-        if "solutions" in extras:
-            del extras["solutions"]
 
         # try:
         # show temp info message
@@ -72,13 +75,13 @@ class RecallSolutions(Extension):
         # get solutions database
         db = await Memory.get(self.agent)
 
-        solutions = await db.search_similarity_threshold(
+        solutions = await db.search_similarity_threshold_cached(
             query=query,
             limit=RecallSolutions.SOLUTIONS_COUNT,
             threshold=RecallSolutions.THRESHOLD,
             filter=f"area == '{Memory.Area.SOLUTIONS.value}'",
         )
-        instruments = await db.search_similarity_threshold(
+        instruments = await db.search_similarity_threshold_cached(
             query=query,
             limit=RecallSolutions.INSTRUMENTS_COUNT,
             threshold=RecallSolutions.THRESHOLD,
@@ -97,9 +100,12 @@ class RecallSolutions(Extension):
             log_item.update(instruments=instruments_text)
             engine = get_prompt_engine()
             instruments_prompt = engine.render(
-                "components/memory/instruments_system.j2", instruments=instruments_text
+                "components/memory/instruments.j2", instruments=instruments_text
             )
-            loop_data.system.append(instruments_prompt)
+            # system prompt is rebuilt every iteration, keep with the other recalls
+            extras["instruments"] = instruments_prompt
+        elif "instruments" in extras:
+            del extras["instruments"]
 
         if solutions:
             solutions_text = ""
@@ -108,7 +114,7 @@ class RecallSolutions(Extension):
             solutions_text = solutions_text.strip()
             log_item.update(solutions=solutions_text)
             engine = get_prompt_engine()
-            result = engine.render("components/memory/solutions_system.j2", solutions=solutions_text)
+            result = engine.render("components/memory/solutions.j2", solutions=solutions_text)
             # Parse as JSON if needed for compatibility
             try:
                 import json
@@ -118,6 +124,8 @@ class RecallSolutions(Extension):
 
             # append to prompt
             extras["solutions"] = solutions_prompt
+        elif "solutions" in extras:
+            del extras["solutions"]
 
     # except Exception as e:
     #     err = errors.format_error(e)
@@ -0,0 +1,19 @@
+from src.helpers.extension import Extension
+from src.core.agent import LoopData
+from src.extensions.message_loop_start._50_recall_memories import (
+    DATA_NAME_TASK as DATA_NAME_TASK_MEMORIES,
+)
+from src.extensions.message_loop_start._51_recall_solutions import (
+    DATA_NAME_TASK as DATA_NAME_TASK_SOLUTIONS,
+)
+
+
+class RecallCancel(Extension):
+
+    async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
+        # results of a recall still running would only reach the finished loop
+        for name in (DATA_NAME_TASK_MEMORIES, DATA_NAME_TASK_SOLUTIONS):
+            task = self.agent.get_data(name)
+            if task and not task.done():
+                task.cancel()
+            self.agent.set_data(name, None)
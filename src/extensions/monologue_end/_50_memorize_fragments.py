@@ -1,4 +1,5 @@
 import anyio
+from langchain_core.documents import Document
 from src.helpers.extension import Extension
 from src.helpers.memory import Memory
 from src.helpers.dirty_json import DirtyJson
@@ -88,28 +89,20 @@ class MemorizeMemories(Extension):
         db = await Memory.get(self.agent)
 
         memories_txt = ""
-        rem = []
+        docs: list[Document] = []
         for memory in memories:
             # solution to plain text:
             txt = f"{memory}"
             memories_txt += "\n\n" + txt
             log_item.update(memories=memories_txt.strip())
 
-            # remove previous fragments too similiar to this one
-            if self.REPLACE_THRESHOLD > 0:
-                rem += await db.delete_documents_by_query(
-                    query=txt,
-                    threshold=self.REPLACE_THRESHOLD,
-                    filter=f"area=='{Memory.Area.FRAGMENTS.value}'",
-                )
-                if rem:
-                    rem_txt = "\n\n".join(Memory.format_docs_plain(rem))
-                    log_item.update(replaced=rem_txt)
-
-            # insert new solution
-            await db.insert_text(
-                text=txt, metadata={"area": Memory.Area.FRAGMENTS.value}
-            )
+            docs.append(Document(txt, metadata={"area": Memory.Area.FRAGMENTS.value}))
+
+        # insert new memories in one batch, removing previous fragments too similar to them
+        _, rem = await db.upsert_documents(docs, replace_threshold=self.REPLACE_THRESHOLD)
+        if rem:
+            rem_txt = "\n\n".join(Memory.format_docs_plain(rem))
+            log_item.update(replaced=rem_txt)
 
         log_item.update(
             result=f"{len(memories)} entries memorized.",
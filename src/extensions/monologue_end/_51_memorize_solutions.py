@@ -1,4 +1,5 @@
 import anyio
+from langchain_core.documents import Document
 from src.helpers.extension import Extension
 from src.helpers.memory import Memory
 from src.helpers.dirty_json import DirtyJson
@@ -89,7 +90,7 @@ class MemorizeSolutions(Extension):
         db = await Memory.get(self.agent)
 
         solutions_txt = ""
-        rem = []
+        docs: list[Document] = []
         for solution in solutions:
             # solution to plain text:
             if isinstance(solution, dict):
@@ -101,21 +102,13 @@ class MemorizeSolutions(Extension):
                 txt = f"# Solution\n {str(solution)}"
             solutions_txt += txt + "\n\n"
 
-            # remove previous solutions too similiar to this one
-            if self.REPLACE_THRESHOLD > 0:
-                rem += await db.delete_documents_by_query(
-                    query=txt,
-                    threshold=self.REPLACE_THRESHOLD,
-                    filter=f"area=='{Memory.Area.SOLUTIONS.value}'",
-                )
-                if rem:
-                    rem_txt = "\n\n".join(Memory.format_docs_plain(rem))
-                    log_item.update(replaced=rem_txt)
-
-            # insert new solution
-            await db.insert_text(
-                text=txt, metadata={"area": Memory.Area.SOLUTIONS.value}
-            )
+            docs.append(Document(txt, metadata={"area": Memory.Area.SOLUTIONS.value}))
+
+        # insert new solutions in one batch, removing previous solutions too similar to them
+        _, rem = await db.upsert_documents(docs, replace_threshold=self.REPLACE_THRESHOLD)
+        if rem:
+            rem_txt = "\n\n".join(Memory.format_docs_plain(rem))
+            log_item.update(replaced=rem_txt)
 
         solutions_txt = solutions_txt.strip()
         log_item.update(solutions=solutions_txt)
@@ -1,4 +1,5 @@
 from src.helpers.extension import Extension
+from src.helpers.log import LogItem
 from src.core.models import LoopData
 
 
@@ -9,17 +10,16 @@ class LogFromStream(Extension):
         self,
         loop_data: LoopData | None = None,
         text: str = "",
+        chunk: str | None = None,
         parsed: dict | None = None,
+        changed: set[str] | None = None,
+        log_item: LogItem | None = None,
         **kwargs
     ):
         try:
-            # Log the generating process
-            if hasattr(self.agent, 'context') and hasattr(self.agent.context, 'log'):
-                self.agent.context.log.log(
-                    type="agent",
-                    heading=f"{self.agent.agent_name}: Generating",
-                    content=text
-                )
+            # Update the generating log item with the text and values the chunk changed
+            if log_item:
+                self.agent.log_from_stream(text, log_item, parsed, chunk, changed)
         except Exception:
             # Silently handle any errors to avoid breaking the response flow
-            pass 
\ No newline at end of file
+            pass
@@ -10,25 +10,39 @@ class LiveResponse(Extension):
         loop_data: LoopData | None = None,
         text: str = "",
         parsed: dict | None = None,
+        changed: set[str] | None = None,
         **kwargs,
     ):
         try:
-            if not parsed or parsed.get("tool_name") != "response":
+            if not loop_data or not parsed or parsed.get("tool_name") != "response":
                 return  # not a response
-            
+            if changed is not None and "tool_args" not in changed:
+                return  # response text unchanged
+
             tool_args = parsed.get("tool_args", {})
-            response_text = tool_args.get("text", "")
-            
+            response_text = tool_args.get("text", "") if isinstance(tool_args, dict) else ""
+
             if not response_text:
                 return
-                
-            # Log the response for live streaming
-            if hasattr(self.agent, 'context') and hasattr(self.agent.context, 'log'):
-                self.agent.context.log.log(
+
+            # Log the response for live streaming, one log item per response,
+            # the response tool picks it up from loop data when executed
+            log_item = loop_data.params_temporary.get("log_item_response")
+            logged = loop_data.params_temporary.get("log_item_response_text", "")
+            loop_data.params_temporary["log_item_response_text"] = response_text
+            if log_item:
+                if response_text.startswith(logged):
+                    # only send the text appended since the last chunk
+                    if len(response_text) > len(logged):
+                        log_item.stream(content=response_text[len(logged) :])
+                else:
+                    log_item.update(content=response_text)
+            else:
+                loop_data.params_temporary["log_item_response"] = self.agent.context.log.log(
                     type="response",
                     heading=f"{self.agent.agent_name}: Responding",
-                    content=response_text
+                    content=response_text,
                 )
         except Exception:
             # Silently handle any errors to avoid breaking the response flow
-            pass 
\ No newline at end of file
+            pass
@@ -1,13 +1,17 @@
-from datetime import datetime, timezone
 from typing import Any
 import os
 from src.helpers.extension import Extension
+from src.helpers import mcp_handler
 from src.helpers.mcp_handler import MCPConfig
 from src.core.agent import Agent, LoopData
-from src.helpers.localization import Localization
 from src.helpers.prompt_engine import get_prompt_engine
 from src.helpers import runtime
 
+# rendered prompts by agent, valid while templates and MCP tools keep their versions
+_cache: dict[tuple, str] = {}
+_cache_version: tuple[int, int] | None = None
+_available_agents: list[str] | None = None
+
 
 class SystemPrompt(Extension):
 
@@ -17,12 +21,34 @@ class SystemPrompt(Extension):
         loop_data: LoopData = LoopData(),
         **kwargs: Any,
     ):
+        global _cache_version, _available_agents
+
+        engine = get_prompt_engine()
+        version = (engine.sources_version(), mcp_handler.tools_version())
+        if version != _cache_version:
+            _cache.clear()
+            _available_agents = None
+            _cache_version = version
+
+        # the prompt stays byte identical between iterations so provider side prompt
+        # caching can reuse it, the current time comes with the temporary extras
+        key = (self.agent.agent_name, self.agent.config.prompts_subdir)
+        main_prompt = _cache.get(key)
+        if main_prompt is None:
+            main_prompt = self._render_main_prompt()
+            _cache[key] = main_prompt
+        system_prompt.append(main_prompt)
+
+    def _render_main_prompt(self) -> str:
+        global _available_agents
+
         # Determine agent type based on prompts_subdir
         agent_type = "default"
         if self.agent.config.prompts_subdir:
             # Check if the specified agent type exists as a directory
-            engine = get_prompt_engine()
-            available_agents = self._get_available_agent_types()
+            if _available_agents is None:
+                _available_agents = self._get_available_agent_types()
+            available_agents = _available_agents
             
             # Use the prompts_subdir directly if it's a valid agent type
             if self.agent.config.prompts_subdir in available_agents:
@@ -37,13 +63,6 @@ class SystemPrompt(Extension):
         # Use new Jinja2 agent templates
         engine = get_prompt_engine()
         
-        # Get current datetime
-        current_datetime = Localization.get().utc_dt_to_localtime_str(
-            datetime.now(timezone.utc), sep=" ", timespec="seconds"
-        )
-        if current_datetime and "+" in current_datetime:
-            current_datetime = current_datetime.split("+")[0]
-        
         # Get MCP tools
         mcp_tools = get_mcp_tools_prompt(self.agent)
 
@@ -56,7 +75,6 @@ class SystemPrompt(Extension):
         # Template variables
         template_vars = {
             "agent_name": self.agent.agent_name,
-            "datetime": current_datetime,
             "environment": environment,
             "tools": local_tools,
             "mcp_tools": mcp_tools if mcp_tools else "",
@@ -64,8 +82,7 @@ class SystemPrompt(Extension):
         
         # Render the agent template
         template_path = f"agents/{agent_type}/system.j2"
-        main_prompt = engine.render(template_path, **template_vars)
-        system_prompt.append(main_prompt)
+        return engine.render(template_path, **template_vars)
 
     def _get_available_agent_types(self) -> list[str]:
         """Discover available agent types by scanning the prompts/agents directory"""
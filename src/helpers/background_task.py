@@ -0,0 +1,49 @@
+from typing import Any, Awaitable, Callable
+
+import anyio
+from anyio.abc import TaskGroup
+
+
+class BackgroundTask:
+    """
+    Handle of a coroutine function started in a task group that outlives the caller.
+    Other tasks can check it, wait for it with a deadline or cancel it.
+    Exceptions are kept in error instead of cancelling the task group.
+    """
+
+    def __init__(self, func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._finished = anyio.Event()
+        self._scope = anyio.CancelScope()
+        self.result: Any = None
+        self.error: Exception | None = None
+
+    def start(self, task_group: TaskGroup) -> "BackgroundTask":
+        task_group.start_soon(self._run)
+        return self
+
+    async def _run(self):
+        try:
+            with self._scope:
+                self.result = await self._func(*self._args, **self._kwargs)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._finished.set()
+
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    def cancel(self):
+        self._scope.cancel()
+
+    async def wait(self, timeout: float | None = None) -> bool:
+        """Wait until finished or timeout, returns whether the task is done."""
+        with anyio.move_on_after(timeout):
+            await self._finished.wait()
+        return self.done()
+
+    def __await__(self):
+        return self.wait().__await__()
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from typing import Hashable
+
+# topics besides log instances, which are topics of their own
+CONTEXTS = "contexts"
+TASKS = "tasks"
+SETTINGS = "settings"
+
+
+class Subscription:
+    """
+    Set of topics an async consumer waits on. Notifications may come from any thread,
+    the waiter is woken on its own event loop and repeated notifications are coalesced.
+    """
+
+    def __init__(self, topics: tuple[Hashable, ...]):
+        self.topics = topics
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._lock = threading.Lock()
+        self._fired: set[Hashable] = set()
+
+    def _wake(self, topic: Hashable):
+        with self._lock:
+            pending = bool(self._fired)
+            self._fired.add(topic)
+        if not pending:
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    def take(self) -> set[Hashable]:
+        """Topics notified since the last call."""
+        with self._lock:
+            fired, self._fired = self._fired, set()
+            self._event.clear()
+        return fired
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for a notification, returns False on timeout."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+_lock = threading.Lock()
+_subscriptions: dict[Hashable, set[Subscription]] = {}
+
+
+def notify(topic: Hashable):
+    subscriptions = _subscriptions.get(topic)
+    if not subscriptions:
+        return  # nobody listening, keep the hot path cheap
+    with _lock:
+        subscriptions = list(subscriptions)
+    for subscription in subscriptions:
+        subscription._wake(topic)
+
+
+def subscribe(*topics: Hashable) -> Subscription:
+    subscription = Subscription(topics)
+    with _lock:
+        for topic in topics:
+            _subscriptions.setdefault(topic, set()).add(subscription)
+    return subscription
+
+
+def unsubscribe(subscription: Subscription):
+    with _lock:
+        for topic in subscription.topics:
+            subscriptions = _subscriptions.get(topic)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del _subscriptions[topic]
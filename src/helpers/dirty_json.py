@@ -1,4 +1,5 @@
 import json
+import re
 
 
 def try_parse(json_string: str):
@@ -334,3 +335,230 @@ class DirtyJson:
         chars = ["{", "[", '"']
         indices = [input_str.find(char) for char in chars if input_str.find(char) != -1]
         return min(indices) if indices else 0
+
+
+class _StreamFrame:
+    __slots__ = ("container", "key", "expect")
+
+    def __init__(self, container: dict | list):
+        self.container = container
+        self.key = None
+        # object: key -> colon -> value -> comma, array: value -> comma
+        self.expect = "key" if isinstance(container, dict) else "value"
+
+
+class DirtyJsonStream:
+    """
+    Incremental parser for a JSON object streamed in chunks (LLM responses).
+    feed() only processes the new chunk and partially received strings, objects and
+    arrays are visible in value right away. It accepts unquoted keys and values,
+    single/backtick quotes and trailing commas, but no comments or multiline strings,
+    so the complete text should still be parsed with DirtyJson.
+    """
+
+    _ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+    _STRING_STOPS = {q: re.compile(r"[\\" + q + "]") for q in "\"'`"}
+
+    def __init__(self):
+        self.value: dict | list | None = None
+        self.completed: list[str] = []  # top-level keys with fully received values
+        self.changed: set[str] = set()  # top-level keys whose values the last feed changed
+        self.done = False
+        self._stack: list[_StreamFrame] = []
+        self._token = ""
+        self._token_kind = ""  # "string", "bare" or "" when outside a token
+        self._token_role = ""  # "key" or "value"
+        self._quote = ""
+        self._escape = ""
+        self._changed = False
+
+    def feed(self, chunk: str) -> bool:
+        """Parse the next chunk, returns True if value changed."""
+        self._changed = False
+        self.changed = set()
+        i, n = 0, len(chunk)
+        while i < n and not self.done:
+            if self._token_kind == "string":
+                i = self._feed_string(chunk, i)
+                continue
+            c = chunk[i]
+            if self._token_kind == "bare":
+                if c in ",}]" or (
+                    self._token_role == "key" and (c == ":" or c.isspace())
+                ):
+                    self._finish_token()
+                    continue  # the delimiter belongs to the enclosing structure
+                self._token += c
+                i += 1
+                continue
+            i += 1
+            if not self._stack:
+                if self.value is None and c in "{[":
+                    self.value = {} if c == "{" else []
+                    self._stack.append(_StreamFrame(self.value))
+                    self._changed = True
+                continue
+            if not c.isspace():
+                self._feed_structural(c)
+
+        # expose the string received so far
+        if self._token_kind == "string" and self._token_role == "value":
+            self._set_value(self._token, new=False)
+        return self._changed
+
+    def _feed_structural(self, c: str):
+        frame = self._stack[-1]
+        if isinstance(frame.container, dict):
+            if frame.expect == "key":
+                if c == "}":
+                    self._pop()
+                elif c not in ",{":  # stray commas and doubled braces are skipped
+                    self._start_token(c, "key")
+            elif frame.expect == "colon":
+                if c == ":":
+                    frame.expect = "value"
+                elif c == "}":
+                    self._set_value(None, new=True)
+                    self._value_done(frame)
+                    self._pop()
+                else:  # missing colon
+                    frame.expect = "value"
+                    self._feed_structural(c)
+            elif frame.expect == "value":
+                if c == "}":
+                    self._set_value(None, new=True)
+                    self._value_done(frame)
+                    self._pop()
+                else:
+                    self._start_value(c)
+            elif c == ",":
+                frame.expect = "key"
+            elif c == "}":
+                self._pop()
+        else:
+            if frame.expect == "value":
+                if c == "]":
+                    self._pop()
+                elif c != ",":
+                    self._start_value(c)
+            elif c == ",":
+                frame.expect = "value"
+            elif c == "]":
+                self._pop()
+
+    def _start_value(self, c: str):
+        if c in "{[":
+            container: dict | list = {} if c == "{" else []
+            self._set_value(container, new=True)
+            self._stack.append(_StreamFrame(container))
+        else:
+            self._start_token(c, "value")
+            if self._token_kind == "string":
+                self._set_value("", new=True)
+
+    def _start_token(self, c: str, role: str):
+        self._token_role = role
+        if c in "\"'`":
+            self._token_kind = "string"
+            self._quote = c
+            self._token = ""
+        else:
+            self._token_kind = "bare"
+            self._token = c
+
+    def _feed_string(self, chunk: str, i: int) -> int:
+        if self._escape:
+            c = chunk[i]
+            if self._escape == "\\":
+                if c == "u":
+                    self._escape = "\\u"
+                else:
+                    self._token += self._ESCAPES.get(c, c)
+                    self._escape = ""
+            else:
+                self._escape += c
+                if len(self._escape) == 6:
+                    try:
+                        self._token += chr(int(self._escape[2:], 16))
+                    except ValueError:
+                        self._token += self._escape
+                    self._escape = ""
+            return i + 1
+
+        match = self._STRING_STOPS[self._quote].search(chunk, i)
+        if not match:
+            self._token += chunk[i:]
+            return len(chunk)
+        pos = match.start()
+        self._token += chunk[i:pos]
+        if chunk[pos] == "\\":
+            self._escape = "\\"
+        else:
+            self._finish_token()
+        return pos + 1
+
+    def _finish_token(self):
+        text, kind, role = self._token, self._token_kind, self._token_role
+        self._token, self._token_kind, self._token_role = "", "", ""
+        frame = self._stack[-1]
+        if role == "key":
+            frame.key = text.strip() if kind == "bare" else text
+            frame.expect = "colon"
+        else:
+            if kind == "string":
+                self._set_value(text, new=False)
+            else:
+                self._set_value(self._convert_bare(text), new=True)
+            self._value_done(frame)
+
+    def _set_value(self, value, new: bool):
+        frame = self._stack[-1]
+        if not new and self._current(frame) == value:
+            return  # string exposed again without new text
+        if isinstance(frame.container, dict):
+            frame.container[frame.key] = value
+        elif new or not frame.container:
+            frame.container.append(value)
+        else:
+            frame.container[-1] = value
+        self._changed = True
+        top = self._stack[0]
+        if isinstance(top.container, dict) and top.key is not None:
+            self.changed.add(top.key)
+
+    @staticmethod
+    def _current(frame: _StreamFrame):
+        if isinstance(frame.container, dict):
+            return frame.container.get(frame.key)  # type: ignore
+        return frame.container[-1] if frame.container else None
+
+    def _value_done(self, frame: _StreamFrame):
+        frame.expect = "comma"
+        if len(self._stack) == 1 and isinstance(frame.container, dict):
+            self.completed.append(frame.key)  # type: ignore
+
+    def _pop(self):
+        self._stack.pop()
+        if self._stack:
+            self._value_done(self._stack[-1])
+        else:
+            self.done = True
+
+    @staticmethod
+    def _convert_bare(text: str):
+        text = text.strip()
+        lower = text.lower()
+        if lower == "true":
+            return True
+        if lower == "false":
+            return False
+        if lower in ("null", "undefined", "none"):
+            return None
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return float(text)
+        except ValueError:
+            return text
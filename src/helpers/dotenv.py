@@ -9,6 +9,7 @@ KEY_AUTH_LOGIN = "AUTH_LOGIN"
 KEY_AUTH_PASSWORD = "AUTH_PASSWORD"
 KEY_RFC_PASSWORD = "RFC_PASSWORD"
 KEY_ROOT_PASSWORD = "ROOT_PASSWORD"
+KEY_HOT_RELOAD = "HOT_RELOAD"
 
 
 def load_dotenv():
@@ -1,10 +1,14 @@
 import re
 import os
+import sys
+import time
+import threading
 import importlib
 import inspect
 from typing import Any, Type, TypeVar
 from .dirty_json import DirtyJson
 from .files import get_abs_path
+from . import dotenv
 import regex
 from fnmatch import fnmatch
 
@@ -106,3 +110,99 @@ def load_classes_from_folder(
                     break
 
     return classes
+
+
+# discovered classes by (folder, name_pattern, base_class, one_per_file)
+_class_cache: dict[tuple, tuple[Any, list[type]]] = {}
+_class_cache_lock = threading.Lock()
+# time spent discovering vs executing classes, by folder
+_class_stats: dict[str, dict[str, float]] = {}
+
+
+def load_classes_cached(
+    folder: str, name_pattern: str, base_class: Type[T], one_per_file: bool = True
+) -> list[Type[T]]:
+    """
+    Cached load_classes_from_folder. Each folder/pattern is scanned once; with HOT_RELOAD
+    enabled in .env, changed files are re-imported and the folder rescanned.
+    """
+    started = time.perf_counter()
+    key = (folder, name_pattern, base_class, one_per_file)
+    hot_reload = _is_hot_reload()
+    signature = _folder_signature(folder, name_pattern) if hot_reload else None
+
+    with _class_cache_lock:
+        cached = _class_cache.get(key)
+    if cached and (not hot_reload or cached[0] == signature):
+        classes = cached[1]
+    else:
+        if cached and hot_reload:
+            _reload_changed_modules(folder, cached[0], signature)
+        classes = load_classes_from_folder(folder, name_pattern, base_class, one_per_file)
+        with _class_cache_lock:
+            _class_cache[key] = (signature, classes)
+        _add_stat(folder, "scans", 1)
+
+    _add_stat(folder, "discovery_calls", 1)
+    _add_stat(folder, "discovery_seconds", time.perf_counter() - started)
+    return classes  # type: ignore
+
+
+def record_execution(folder: str, seconds: float):
+    _add_stat(folder, "execute_calls", 1)
+    _add_stat(folder, "execute_seconds", seconds)
+
+
+def get_class_stats() -> dict[str, dict[str, float]]:
+    with _class_cache_lock:
+        return {folder: stats.copy() for folder, stats in _class_stats.items()}
+
+
+def clear_class_cache():
+    with _class_cache_lock:
+        _class_cache.clear()
+
+
+def _add_stat(folder: str, key: str, value: float):
+    with _class_cache_lock:
+        stats = _class_stats.setdefault(
+            folder,
+            {
+                "scans": 0,
+                "discovery_calls": 0,
+                "discovery_seconds": 0.0,
+                "execute_calls": 0,
+                "execute_seconds": 0.0,
+            },
+        )
+        stats[key] += value
+
+
+def _is_hot_reload() -> bool:
+    return (dotenv.get_dotenv_value(dotenv.KEY_HOT_RELOAD) or "").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+
+def _folder_signature(folder: str, name_pattern: str) -> dict[str, int]:
+    abs_folder = get_abs_path(folder)
+    return {
+        file_name: os.stat(os.path.join(abs_folder, file_name)).st_mtime_ns
+        for file_name in os.listdir(abs_folder)
+        if fnmatch(file_name, name_pattern) and file_name.endswith(".py")
+    }
+
+
+def _reload_changed_modules(
+    folder: str, previous: dict[str, int] | None, current: dict[str, int] | None
+):
+    # without a previous signature (hot reload just enabled) everything counts as changed
+    previous = previous or {}
+    for file_name, mtime in (current or {}).items():
+        if previous.get(file_name) == mtime:
+            continue
+        module = sys.modules.get(folder.replace("/", ".") + "." + file_name[:-3])
+        if module:
+            importlib.reload(module)
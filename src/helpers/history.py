@@ -2,9 +2,10 @@ from abc import abstractmethod
 import anyio
 from collections import OrderedDict
 from collections.abc import Mapping
+import hashlib
 import json
 import math
-from typing import Coroutine, Literal, TypedDict, cast, Union, Dict, List, Any
+from typing import Awaitable, Callable, Coroutine, Literal, TypedDict, cast, Union, Dict, List, Any
 from src.helpers import messages, tokens, settings, call_llm
 from src.helpers.prompt_engine import get_prompt_engine
 from enum import Enum
@@ -18,6 +19,12 @@ HISTORY_BULK_RATIO = 0.2
 TOPIC_COMPRESS_RATIO = 0.65
 LARGE_MESSAGE_TO_TOPIC_RATIO = 0.25
 RAW_MESSAGE_OUTPUT_TEXT_TRIM = 100
+# expected size of a summary relative to its input, used to plan compression
+SUMMARY_TOKENS_RATIO = 0.2
+# utility model calls running at once while compressing
+COMPRESS_CONCURRENCY = 4
+# summaries kept by their input, not requested again when compression is retried
+SUMMARY_CACHE_SIZE = 64
 
 
 class RawMessage(TypedDict):
@@ -82,6 +89,7 @@ class Message(Record):
         self.content = content
         self.summary: str = ""
         self.tokens: int = tokens or self.calculate_tokens()
+        self._langchain: list[BaseMessage] | None = None
 
     def get_tokens(self) -> int:
         if not self.tokens:
@@ -95,6 +103,7 @@ class Message(Record):
     def set_summary(self, summary: str):
         self.summary = summary
         self.tokens = self.calculate_tokens()
+        self._langchain = None
 
     async def compress(self):
         return False
@@ -103,7 +112,10 @@ class Message(Record):
         return [OutputMessage(ai=self.ai, content=self.summary or self.content)]
 
     def output_langchain(self):
-        return output_langchain(self.output())
+        # converted once, messages only change when summarized
+        if self._langchain is None:
+            self._langchain = output_langchain(self.output())
+        return self._langchain
 
     def output_text(self, human_label="user", ai_label="ai"):
         return output_text(self.output(), ai_label, human_label)
@@ -126,15 +138,63 @@ class Message(Record):
         return msg
 
 
-class Topic(Record):
+class Summarized(Record):
+    """
+    Record with an optional summary replacing its parts.
+    The summary token count and the LangChain output are cached until the record changes.
+    """
+
+    def __init__(self):
+        self._summary: str = ""
+        self._summary_tokens: int | None = None
+        self._langchain: list[BaseMessage] | None = None
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, value: str):
+        self._summary = value
+        self._summary_tokens = None
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop cached output after the parts have changed."""
+        self._langchain = None
+
+    @abstractmethod
+    def get_parts(self) -> list:
+        pass
+
+    def get_summary_tokens(self) -> int:
+        if self._summary_tokens is None:
+            self._summary_tokens = tokens.approximate_tokens(self._summary)
+        return self._summary_tokens
+
+    def output_langchain(self):
+        if self._langchain is None:
+            if self.summary:
+                self._langchain = output_langchain(self.output())
+            else:
+                self._langchain = group_messages_abab(
+                    [m for part in self.get_parts() for m in part.output_langchain()]
+                )
+        return self._langchain
+
+
+class Topic(Summarized):
     def __init__(self, history: "History"):
+        super().__init__()
         self.history = history
-        self.summary: str = ""
         self.messages: list[Message] = []
 
+    def get_parts(self) -> list[Message]:
+        return self.messages
+
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return self.get_summary_tokens()
         else:
             return sum(msg.get_tokens() for msg in self.messages)
 
@@ -143,6 +203,7 @@ class Topic(Record):
     ) -> Message:
         msg = Message(ai=ai, content=content, tokens=tokens)
         self.messages.append(msg)
+        self.invalidate()
         return msg
 
     def output(self) -> list[OutputMessage]:
@@ -192,6 +253,7 @@ class Topic(Record):
                 )
                 msg.set_summary(_json_dumps(trunc))
 
+            self.invalidate()
             return True
         return False
 
@@ -217,20 +279,14 @@ class Topic(Record):
                 sum_msg_content = result
             sum_msg = Message(False, sum_msg_content)
             self.messages[1 : cnt_to_sum + 1] = [sum_msg]
+            self.invalidate()
             return True
         return False
 
     async def summarize_messages(self, messages: list[Message]):
         # FIXME: vision bytes are sent to utility LLM, send summary instead
         msg_txt = [m.output_text() for m in messages]
-        engine = get_prompt_engine()
-        summary = await self.history.agent.call_utility_model(
-            system=engine.render("components/frameworks/topic_summary_system.j2"),
-            message=engine.render(
-                "components/frameworks/topic_summary_message.j2", content=msg_txt
-            ),
-        )
-        return summary
+        return await self.history.summarize_content(msg_txt)
 
     def to_dict(self):
         return {
@@ -246,20 +302,24 @@ class Topic(Record):
         topic.messages = [
             Message.from_dict(m, history=history) for m in data.get("messages", [])
         ]
+        topic.invalidate()
         return topic
 
 
-class Bulk(Record):
+class Bulk(Summarized):
     def __init__(self, history: "History"):
+        super().__init__()
         self.history = history
-        self.summary: str = ""
         self.records: list[Record] = []
 
+    def get_parts(self) -> list[Record]:
+        return self.records
+
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            return self.get_summary_tokens()
         else:
-            return sum([r.get_tokens() for r in self.records])
+            return sum(r.get_tokens() for r in self.records)
 
     def output(
         self, human_label: str = "user", ai_label: str = "ai"
@@ -274,13 +334,7 @@ class Bulk(Record):
         return False
 
     async def summarize(self):
-        engine = get_prompt_engine()
-        self.summary = await self.history.agent.call_utility_model(
-            system=engine.render("components/frameworks/topic_summary_system.j2"),
-            message=engine.render(
-                "components/frameworks/topic_summary_message.j2", content=self.output_text()
-            ),
-        )
+        self.summary = await self.history.summarize_content(self.output_text())
         return self.summary
 
     def to_dict(self):
@@ -296,6 +350,7 @@ class Bulk(Record):
         bulk.summary = data["summary"]
         cls = data["_cls"]
         bulk.records = [Record.from_dict(r, history=history) for r in data["records"]]
+        bulk.invalidate()
         return bulk
 
 
@@ -307,6 +362,8 @@ class History(Record):
         self.topics: list[Topic] = []
         self.current = Topic(history=self)
         self.agent: Agent = agent
+        self._summaries: OrderedDict[str, str] = OrderedDict()
+        self._limiter: anyio.CapacityLimiter | None = None
 
     def get_tokens(self) -> int:
         return (
@@ -346,6 +403,13 @@ class History(Record):
         result += self.current.output()
         return result
 
+    def output_langchain(self):
+        """History converted to LangChain messages from per record caches."""
+        records: list[Record] = [*self.bulks, *self.topics, self.current]
+        return group_messages_abab(
+            [m for record in records for m in record.output_langchain()]
+        )
+
     @staticmethod
     def from_dict(data: dict, history: "History"):
         history.bulks = [Bulk.from_dict(b, history=history) for b in data["bulks"]]
@@ -367,68 +431,104 @@ class History(Record):
 
     async def compress(self):
         compressed = False
-        while True:
-            curr, hist, bulk = (
-                self.get_current_topic_tokens(),
-                self.get_topics_tokens(),
-                self.get_bulks_tokens(),
-            )
-            total = _get_ctx_size_for_history()
-            ratios = [
-                (curr, CURRENT_TOPIC_RATIO, "current_topic"),
-                (hist, HISTORY_TOPIC_RATIO, "history_topic"),
-                (bulk, HISTORY_BULK_RATIO, "history_bulk"),
-            ]
-            ratios = sorted(ratios, key=lambda x: (x[0] / total) / x[1], reverse=True)
-            compressed_part = False
-            for ratio in ratios:
-                if ratio[0] > ratio[1] * total:
-                    match ratio[2]:
-                        case "current_topic":
-                            compressed_part = await self.current.compress()
-                        case "history_topic":
-                            compressed_part = await self.compress_topics()
-                        case "history_bulk":
-                            compressed_part = await self.compress_bulks()
-                        case _:
-                            compressed_part = False
-                    if compressed_part:
-                        break
-
-            if compressed_part:
+        self._limiter = anyio.CapacityLimiter(COMPRESS_CONCURRENCY)
+        try:
+            while True:
+                changed, jobs = await self.plan_compression()
+                if jobs:
+                    # independent summaries run concurrently, bounded by the limiter
+                    async with anyio.create_task_group() as tg:
+                        for job in jobs:
+                            tg.start_soon(job)
+                if not changed and not jobs:
+                    return compressed
                 compressed = True
-                continue
-            else:
-                return compressed
-
-    async def compress_topics(self) -> bool:
-        # summarize topics one by one
-        for topic in self.topics:
-            if not topic.summary:
-                await topic.summarize()
-                return True
-
-        # move oldest topic to bulks and summarize
-        for topic in self.topics:
-            bulk = Bulk(history=self)
-            bulk.records.append(topic)
-            if topic.summary:
-                bulk.summary = topic.summary
-            else:
-                await bulk.summarize()
-            self.bulks.append(bulk)
-            self.topics.remove(topic)
-            return True
-        return False
+        finally:
+            self._limiter = None
+
+    async def plan_compression(
+        self,
+    ) -> tuple[bool, list[Callable[[], Awaitable[Any]]]]:
+        """
+        Plan the summaries needed to bring each part of the history under its share
+        of the context window. Changes without model calls are applied right away,
+        returns whether anything changed and the summary jobs to run.
+        """
+        total = _get_ctx_size_for_history()
+        changed = False
+        jobs: list[Callable[[], Awaitable[Any]]] = []
+
+        # current topic - truncate large messages, then summarize the middle
+        current_limit = total * CURRENT_TOPIC_RATIO
+        while (
+            self.get_current_topic_tokens() > current_limit
+            and await self.current.compress_large_messages()
+        ):
+            changed = True
+        if (
+            self.get_current_topic_tokens() > current_limit
+            and len(self.current.messages) > 2
+        ):
+            jobs.append(self.current.compress_attention)
+
+        # history topics - summarize oldest topics, move summarized ones to bulks
+        topics_limit = total * HISTORY_TOPIC_RATIO
+        topics_tokens = self.get_topics_tokens()
+        if topics_tokens > topics_limit:
+            for topic in self.topics:
+                if topics_tokens <= topics_limit:
+                    break
+                if not topic.summary:
+                    jobs.append(topic.summarize)
+                    topics_tokens -= topic.get_tokens() * (1 - SUMMARY_TOKENS_RATIO)
+            if topics_tokens > topics_limit:
+                while (
+                    self.topics
+                    and self.topics[0].summary
+                    and self.get_topics_tokens() > topics_limit
+                ):
+                    topic = self.topics.pop(0)
+                    bulk = Bulk(history=self)
+                    bulk.records.append(topic)
+                    bulk.summary = topic.summary
+                    self.bulks.append(bulk)
+                    changed = True
+
+        # bulks - merge in groups, a single bulk left over the limit is dropped
+        if self.get_bulks_tokens() > total * HISTORY_BULK_RATIO:
+            if len(self.bulks) > 1:
+                jobs.append(lambda: self.merge_bulks_by(BULK_MERGE_COUNT))
+            elif self.bulks:
+                self.bulks.pop(0)
+                changed = True
+
+        return changed, jobs
+
+    async def summarize_content(self, content: MessageContent) -> str:
+        """Summarize with the utility model, identical inputs reuse the previous summary."""
+        engine = get_prompt_engine()
+        system = engine.render("components/frameworks/topic_summary_system.j2")
+        message = engine.render(
+            "components/frameworks/topic_summary_message.j2", content=content
+        )
 
-    async def compress_bulks(self):
-        # merge bulks if possible
-        compressed = await self.merge_bulks_by(BULK_MERGE_COUNT)
-        # remove oldest bulk if necessary
-        if not compressed:
-            self.bulks.pop(0)
-            return True
-        return compressed
+        key = hashlib.sha256(f"{system}\0{message}".encode()).hexdigest()
+        if key in self._summaries:
+            self._summaries.move_to_end(key)
+            return self._summaries[key]
+
+        if self._limiter:
+            async with self._limiter:
+                summary = await self.agent.call_utility_model(
+                    system=system, message=message
+                )
+        else:
+            summary = await self.agent.call_utility_model(system=system, message=message)
+
+        self._summaries[key] = summary
+        if len(self._summaries) > SUMMARY_CACHE_SIZE:
+            self._summaries.popitem(last=False)
+        return summary
 
     async def merge_bulks_by(self, count: int):
         # if bulks is empty, return False
@@ -457,6 +557,7 @@ class History(Record):
     async def merge_bulks(self, bulks: list[Bulk]) -> Bulk:
         bulk = Bulk(history=self)
         bulk.records = cast(list[Record], bulks)
+        bulk.invalidate()
         await bulk.summarize()
         return bulk
 
@@ -1,12 +1,13 @@
-import anyio
-from datetime import datetime
+from datetime import datetime, timezone
 import time
 from src.helpers.task_scheduler import TaskScheduler
 from src.helpers.print_style import PrintStyle
 from src.helpers import errors
 from src.helpers import runtime
+from src.helpers import change_notifier
 
 
+# longest sleep between ticks, also the heartbeat of the development pause signal
 SLEEP_TIME = 60
 
 keep_running = True
@@ -16,34 +17,45 @@ pause_time = 0
 async def run_loop():
     global pause_time, keep_running
 
-    while True:
-        if runtime.is_development():
-            # Signal to container that the job loop should be paused
-            # if we are runing a development instance to avoid duble-running the jobs
-            try:
-                await runtime.call_development_function(pause_loop)
-            except Exception as e:
-                PrintStyle().error(
-                    "Failed to pause job loop by development instance: "
-                    + errors.error_text(e)
-                )
-        if not keep_running and (time.time() - pause_time) > (SLEEP_TIME * 2):
-            resume_loop()
-        if keep_running:
-            try:
-                await scheduler_tick()
-            except Exception as e:
-                PrintStyle().error(errors.format_error(e))
-        await anyio.sleep(
-            SLEEP_TIME
-        )  # TODO! - if we lower it under 1min, it can run a 5min job multiple times in it's target minute
-
-
-async def scheduler_tick():
+    # saved task changes wake the loop early, they may move the next fire time
+    subscription = change_notifier.subscribe(change_notifier.TASKS)
+    last_pause_signal = 0.0
+    try:
+        while True:
+            if runtime.is_development() and time.time() - last_pause_signal >= SLEEP_TIME:
+                # Signal to container that the job loop should be paused
+                # if we are runing a development instance to avoid duble-running the jobs
+                last_pause_signal = time.time()
+                try:
+                    await runtime.call_development_function(pause_loop)
+                except Exception as e:
+                    PrintStyle().error(
+                        "Failed to pause job loop by development instance: "
+                        + errors.error_text(e)
+                    )
+            if not keep_running and (time.time() - pause_time) > (SLEEP_TIME * 2):
+                resume_loop()
+            sleep_time = SLEEP_TIME
+            if keep_running:
+                try:
+                    next_fire_time = await scheduler_tick()
+                    if next_fire_time is not None:
+                        # sleep exactly until the next due task
+                        until_next = (next_fire_time - datetime.now(timezone.utc)).total_seconds()
+                        sleep_time = min(SLEEP_TIME, max(0.0, until_next))
+                except Exception as e:
+                    PrintStyle().error(errors.format_error(e))
+            if await subscription.wait(sleep_time):
+                subscription.take()
+    finally:
+        change_notifier.unsubscribe(subscription)
+
+
+async def scheduler_tick() -> datetime | None:
     # Get the task scheduler instance and print detailed debug info
     scheduler = TaskScheduler.get()
-    # Run the scheduler tick
-    await scheduler.tick()
+    # Run the scheduler tick, returns when the next task is due
+    return await scheduler.tick()
 
 
 def pause_loop():
@@ -1,7 +1,10 @@
+from concurrent.futures import ProcessPoolExecutor
 import glob
+import multiprocessing
 import os
 import hashlib
 import json
+from stat import S_ISREG
 from typing import Any, Dict, Literal, TypedDict
 from langchain_community.document_loaders import (
     CSVLoader,
@@ -21,41 +24,66 @@ text_loader_kwargs = {"autodetect_encoding": True}
 class KnowledgeImport(TypedDict):
     file: str
     checksum: str
+    # stat of the file when it was last hashed, contents are rehashed only if it changes
+    size: int
+    mtime_ns: int
+    inode: int
     ids: list[str]
     state: Literal["changed", "original", "removed"]
     documents: list[Any]
 
 
+HASH_CHUNK_SIZE = 1024 * 1024
+# below this many changed files, parsing in place is faster than starting workers
+POOL_MIN_FILES = 4
+
+# Mapping file extensions to corresponding loader classes
+file_types_loaders = {
+    "txt": TextLoader,
+    "pdf": PyPDFLoader,
+    "csv": CSVLoader,
+    "html": UnstructuredHTMLLoader,
+    # "json": JSONLoader,
+    "json": TextLoader,
+    # "md": UnstructuredMarkdownLoader,
+    "md": TextLoader,
+}
+
+
 def calculate_checksum(file_path: str) -> str:
     hasher = hashlib.md5()
     with open(file_path, "rb") as f:
-        buf = f.read()
-        hasher.update(buf)
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
     return hasher.hexdigest()
 
 
+def loader_pool() -> ProcessPoolExecutor:
+    """Pool for parsing knowledge files, workers are only started once files are submitted."""
+    # spawn, forking a process with running threads and event loops is not safe
+    return ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+
+
+def load_and_split(file_path: str, ext: str) -> list[Any]:
+    loader_cls = file_types_loaders[ext]
+    loader = loader_cls(
+        file_path,
+        **(text_loader_kwargs if ext in ["txt", "csv", "html", "md"] else {}),
+    )
+    return loader.load_and_split()
+
+
 def load_knowledge(
     log_item: LogItem | None,
     knowledge_dir: str,
     index: Dict[str, KnowledgeImport],
     metadata: dict[str, Any] = {},
     filename_pattern: str = "**/*",
+    pool: ProcessPoolExecutor | None = None,
 ) -> Dict[str, KnowledgeImport]:
 
     # from src.helpers.memory import Memory
 
-    # Mapping file extensions to corresponding loader classes
-    file_types_loaders = {
-        "txt": TextLoader,
-        "pdf": PyPDFLoader,
-        "csv": CSVLoader,
-        "html": UnstructuredHTMLLoader,
-        # "json": JSONLoader,
-        "json": TextLoader,
-        # "md": UnstructuredMarkdownLoader,
-        "md": TextLoader,
-    }
-
     cnt_files = 0
     cnt_docs = 0
 
@@ -67,8 +95,14 @@ def load_knowledge(
     #     continue
 
     # Fetch all files in the directory with specified extensions
-    kn_files = glob.glob(knowledge_dir + "/" + filename_pattern, recursive=True)
-    kn_files = [f for f in kn_files if os.path.isfile(f)]
+    kn_files = []
+    for file_path in glob.glob(knowledge_dir + "/" + filename_pattern, recursive=True):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        if S_ISREG(stat.st_mode):
+            kn_files.append((file_path, stat))
 
     if kn_files:
         PrintStyle.standard(
@@ -79,41 +113,51 @@ def load_knowledge(
                 progress=f"\nFound {len(kn_files)} knowledge files in {knowledge_dir}, processing...",
             )
 
-    for file_path in kn_files:
+    changed: list[tuple[str, str]] = []
+    for file_path, stat in kn_files:
         ext = file_path.split(".")[-1].lower()
         if ext in file_types_loaders:
-            checksum = calculate_checksum(file_path)
             file_key = file_path  # os.path.relpath(file_path, knowledge_dir)
 
             # Load existing data from the index or create a new entry
             file_data = index.get(file_key, {})
 
-            if file_data.get("checksum") == checksum:
+            file_stat = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "inode": stat.st_ino,
+            }
+            if file_data.get("checksum") and all(
+                file_data.get(key) == value for key, value in file_stat.items()
+            ):
+                # untouched since it was hashed
                 file_data["state"] = "original"
             else:
-                file_data["state"] = "changed"
-
-            if file_data["state"] == "changed":
-                file_data["checksum"] = checksum
-                loader_cls = file_types_loaders[ext]
-                loader = loader_cls(
-                    file_path,
-                    **(
-                        text_loader_kwargs
-                        if ext in ["txt", "csv", "html", "md"]
-                        else {}
-                    ),
-                )
-                file_data["documents"] = loader.load_and_split()
-                for doc in file_data["documents"]:
-                    doc.metadata = {**doc.metadata, **metadata}
-                cnt_files += 1
-                cnt_docs += len(file_data["documents"])
-                # PrintStyle.standard(f"Imported {len(file_data['documents'])} documents from {file_path}")
+                checksum = calculate_checksum(file_path)
+                if file_data.get("checksum") == checksum:
+                    file_data["state"] = "original"
+                else:
+                    file_data["state"] = "changed"
+                    file_data["checksum"] = checksum
+                    changed.append((file_key, ext))
+                file_data.update(file_stat)  # type: ignore
 
             # Update the index
             index[file_key] = file_data  # type: ignore
 
+    # parse and split changed files, in worker processes if there are enough of them
+    if pool and len(changed) >= POOL_MIN_FILES:
+        loaded = pool.map(load_and_split, *zip(*changed), chunksize=16)
+    else:
+        loaded = (load_and_split(file_path, ext) for file_path, ext in changed)
+    for (file_key, _), documents in zip(changed, loaded):
+        for doc in documents:
+            doc.metadata = {**doc.metadata, **metadata}
+        index[file_key]["documents"] = documents
+        cnt_files += 1
+        cnt_docs += len(documents)
+        # PrintStyle.standard(f"Imported {len(documents)} documents from {file_key}")
+
     # loop index where state is not set and mark it as removed
     for file_key, file_data in index.items():
         if not file_data.get("state", ""):
@@ -4,6 +4,8 @@ from typing import Any, Literal, Optional, Dict
 import uuid
 from collections import OrderedDict  # Import OrderedDict
 
+from src.helpers import change_notifier
+
 Type = Literal[
     "agent",
     "browser",
@@ -22,6 +24,13 @@ Type = Literal[
 
 ProgressUpdate = Literal["persistent", "temporary", "none"]
 
+# fields sent to the client, each tracked with the log version of its last change
+OUTPUT_FIELDS = ("type", "heading", "content", "temp", "kvps")
+
+# number of most recently changed items kept for delta output,
+# clients further behind receive the whole log
+UPDATES_WINDOW = 1000
+
 
 @dataclass
 class LogItem:
@@ -35,6 +44,7 @@ class LogItem:
     kvps: Optional[OrderedDict] = None  # Use OrderedDict for kvps
     id: Optional[str] = None  # Add id field
     guid: str = ""
+    versions: dict[str, int] = field(default_factory=dict, repr=False)
 
     def __post_init__(self):
         self.guid = self.log.guid
@@ -47,8 +57,10 @@ class LogItem:
         kvps: dict | None = None,
         temp: bool | None = None,
         update_progress: ProgressUpdate | None = None,
+        kvps_update: dict | None = None,
         **kwargs,
     ):
+        # kvps replaces all values, kvps_update and kwargs set only the given keys
         if self.guid == self.log.guid:
             self.log._update_item(
                 self.no,
@@ -58,6 +70,7 @@ class LogItem:
                 kvps=kvps,
                 temp=temp,
                 update_progress=update_progress,
+                kvps_update=kvps_update,
                 **kwargs,
             )
 
@@ -76,23 +89,25 @@ class LogItem:
             prev = self.kvps.get(k, "") if self.kvps else ""
             self.update(**{k: prev + v})
 
-    def output(self):
-        return {
-            "no": self.no,
-            "id": self.id,  # Include id in output
-            "type": self.type,
-            "heading": self.heading,
-            "content": self.content,
-            "temp": self.temp,
-            "kvps": self.kvps,
-        }
+    def output(self, since: int | None = None):
+        out: dict[str, Any] = {"no": self.no, "id": self.id}  # Include id in output
+        for key in OUTPUT_FIELDS:
+            # only fields changed after the given log version
+            if not since or self.versions.get(key, 0) > since:
+                out[key] = getattr(self, key)
+        return out
 
 
 class Log:
 
-    def __init__(self):
+    def __init__(self, window: int = UPDATES_WINDOW):
         self.guid: str = str(uuid.uuid4())
-        self.updates: list[int] = []
+        self.window = window
+        self.version = 0
+        # item no -> log version of its last change, least recently changed first
+        self.updates: OrderedDict[int, int] = OrderedDict()
+        # changes up to this version were dropped from updates
+        self.updates_floor = 0
         self.logs: list[LogItem] = []
         self.set_initial_progress()
 
@@ -124,7 +139,7 @@ class Log:
             id=id,  # Pass id to LogItem
         )
         self.logs.append(item)
-        self.updates += [item.no]
+        self._mark_updated(item, OUTPUT_FIELDS)
         self._update_progress_from_item(item)
         return item
 
@@ -137,62 +152,86 @@ class Log:
         kvps: dict | None = None,
         temp: bool | None = None,
         update_progress: ProgressUpdate | None = None,
+        kvps_update: dict | None = None,
         **kwargs,
     ):
         item = self.logs[no]
+        changed = []
         if type is not None:
             item.type = type
+            changed.append("type")
         if update_progress is not None:
             item.update_progress = update_progress
         if heading is not None:
             item.heading = heading
+            changed.append("heading")
         if content is not None:
             item.content = content
+            changed.append("content")
         if kvps is not None:
             item.kvps = OrderedDict(kvps)  # Use OrderedDict to keep the order
+            changed.append("kvps")
 
         if temp is not None:
             item.temp = temp
+            changed.append("temp")
 
+        kwargs.update(kvps_update or {})
         if kwargs:
             if item.kvps is None:
                 item.kvps = OrderedDict()  # Ensure kvps is an OrderedDict
             for k, v in kwargs.items():
                 item.kvps[k] = v
+            changed.append("kvps")
 
-        self.updates += [item.no]
+        if not changed:
+            return
+        self._mark_updated(item, changed)
         self._update_progress_from_item(item)
 
+    def _mark_updated(self, item: LogItem, fields: tuple[str, ...] | list[str]):
+        self.version += 1
+        for key in fields:
+            item.versions[key] = self.version
+        self.updates[item.no] = self.version
+        self.updates.move_to_end(item.no)
+        if len(self.updates) > self.window:
+            _, self.updates_floor = self.updates.popitem(last=False)
+        change_notifier.notify(self)
+
     def set_progress(self, progress: str, no: int = 0, active: bool = True):
         self.progress = progress
         if not no:
             no = len(self.logs)
         self.progress_no = no
         self.progress_active = active
+        change_notifier.notify(self)
 
     def set_initial_progress(self):
         self.set_progress("Waiting for input", 0, False)
 
-    def output(self, start=None, end=None):
-        if start is None:
-            start = 0
-        if end is None:
-            end = len(self.updates)
+    def output(self, start: int | None = None):
+        """Items changed after log version start, with only their changed fields."""
+        if not start or start < self.updates_floor or start > self.version:
+            # new client, too far behind or from another log state
+            return [item.output() for item in self.logs]
 
         out = []
-        seen = set()
-        for update in self.updates[start:end]:
-            if update not in seen:
-                out.append(self.logs[update].output())
-                seen.add(update)
-
+        for no, version in reversed(self.updates.items()):
+            if version <= start:
+                break
+            out.append(self.logs[no].output(since=start))
+        out.reverse()
         return out
 
     def reset(self):
         self.guid = str(uuid.uuid4())
-        self.updates = []
+        self.version = 0
+        self.updates = OrderedDict()
+        self.updates_floor = 0
         self.logs = []
         self.set_initial_progress()
+        change_notifier.notify(change_notifier.CONTEXTS)  # log guid changed
 
     def _update_progress_from_item(self, item: LogItem):
         if item.heading and item.update_progress != "none":
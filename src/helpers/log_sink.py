@@ -0,0 +1,148 @@
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Literal
+
+HTML_HEADER = "<html><body style='background-color:black;font-family: Arial, Helvetica, sans-serif;'><pre>\n"
+HTML_FOOTER = "</pre></body></html>"
+
+# writes are collected and flushed in one go after this long or once this much is pending
+FLUSH_SECONDS = 0.5
+FLUSH_CHARS = 64 * 1024
+# pending text beyond this is dropped or waited for, depending on the overflow policy
+MAX_PENDING_CHARS = 4 * 1024 * 1024
+# longest a writer waits for space with the "block" policy before dropping anyway
+BLOCK_SECONDS = 1.0
+# a log file is closed and continued in a new part once it grows past this
+ROTATE_BYTES = 20 * 1024 * 1024
+
+
+class HtmlLogSink:
+    """
+    Append-only HTML log written by a background thread.
+    Writers only queue text, the thread flushes it in batches and rotates files by size.
+    When the queue is full text is dropped ("drop") or the writer waits a bounded time ("block").
+    """
+
+    def __init__(
+        self,
+        path: str,
+        overflow: Literal["drop", "block"] = "drop",
+        rotate_bytes: int = ROTATE_BYTES,
+    ):
+        self.path = path
+        self.overflow = overflow
+        self.rotate_bytes = rotate_bytes
+        self.dropped = 0  # writes lost to a full queue in total
+        self._unreported = 0  # dropped writes not yet noted in the log
+        self._base, self._ext = os.path.splitext(path)
+        self._part = 1
+        self._pending: deque[str] = deque()
+        self._pending_chars = 0
+        self._written = 0  # total chars handed to the file, for flush()
+        self._queued = 0  # total chars queued
+        self._closed = False
+        self._flush_requested = False
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write(HTML_HEADER)
+        self._file.flush()
+
+    def write(self, text: str):
+        with self._cond:
+            if self._closed:
+                return
+            if self._pending_chars + len(text) > MAX_PENDING_CHARS:
+                if self.overflow == "block":
+                    self._cond.notify_all()
+                    self._cond.wait_for(
+                        lambda: self._pending_chars + len(text) <= MAX_PENDING_CHARS,
+                        BLOCK_SECONDS,
+                    )
+                if self._pending_chars + len(text) > MAX_PENDING_CHARS:
+                    self.dropped += 1
+                    self._unreported += 1
+                    return
+            if self._unreported:
+                # note the gap where text was lost
+                note = f"<br>[{self._unreported} log writes dropped]<br>"
+                self._unreported = 0
+                self._pending.append(note)
+                self._pending_chars += len(note)
+                self._queued += len(note)
+            self._pending.append(text)
+            self._pending_chars += len(text)
+            self._queued += len(text)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="html-log", daemon=True
+                )
+                self._thread.start()
+            elif self._pending_chars >= FLUSH_CHARS:
+                self._cond.notify_all()
+
+    def flush(self, timeout: float | None = None):
+        """Wait until everything queued so far is written to the file."""
+        with self._cond:
+            target = self._queued
+            self._flush_requested = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: self._written >= target or not self._thread, timeout)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            self._cond.notify_all()
+        if thread:
+            thread.join()
+        self._write_batch()  # anything queued without a thread
+        self._file.write(HTML_FOOTER)
+        self._file.close()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed
+                    or self._flush_requested
+                    or self._pending_chars >= FLUSH_CHARS,
+                    FLUSH_SECONDS,
+                )
+                closed = self._closed
+                self._flush_requested = False
+            self._write_batch()
+            if closed:
+                return
+
+    def _write_batch(self):
+        with self._cond:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, deque()
+            chars, self._pending_chars = self._pending_chars, 0
+            self._cond.notify_all()  # room for blocked writers
+        self._file.write("".join(batch))
+        self._file.flush()
+        if self._file.tell() >= self.rotate_bytes:
+            self._rotate()
+        with self._cond:
+            self._written += chars
+            self._cond.notify_all()
+
+    def _rotate(self):
+        self._part += 1
+        path = f"{self._base}_part{self._part}{self._ext}"
+        self._file.write(HTML_FOOTER)
+        self._file.close()
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write(HTML_HEADER)
+        self._file.write(
+            f"<br>[continued from {os.path.basename(self.path)}, {datetime.now():%Y-%m-%d %H:%M:%S}]<br>\n"
+        )
+        self._file.flush()
+        self.path = path
@@ -16,8 +16,12 @@ from typing import (
     TypeVar,
 )
 import threading
+import time
 import anyio
+import anyio.to_thread
+from anyio.from_thread import start_blocking_portal
 from contextlib import AsyncExitStack
+from dataclasses import dataclass
 from shutil import which
 from datetime import timedelta
 import json
@@ -45,6 +49,33 @@ from src.helpers.print_style import PrintStyle
 from src.helpers.tool import Tool, Response
 
 
+# Module-level portal that owns long-lived MCP sessions
+_mcp_portal_cm = None
+_mcp_portal = None
+
+
+def _get_mcp_portal():
+    """Get or create the MCP session portal"""
+    global _mcp_portal_cm, _mcp_portal
+    if _mcp_portal is None:
+        _mcp_portal_cm = start_blocking_portal(backend="asyncio")
+        _mcp_portal = _mcp_portal_cm.__enter__()
+    return _mcp_portal
+
+
+# bumped whenever the servers or their tool lists change, prompts built from them go stale
+_tools_version = 0
+
+
+def tools_version() -> int:
+    return _tools_version
+
+
+def _tools_changed():
+    global _tools_version
+    _tools_version += 1
+
+
 def normalize_name(name: str) -> str:
     # Lowercase and strip whitespace
     name = name.strip().lower()
@@ -241,13 +272,24 @@ class MCPServerRemote(BaseModel):
         with self.__lock:
             return self.__client.has_tool(tool_name)  # type: ignore
 
+    def get_stats(self) -> dict[str, Any]:
+        """Get session pool and latency counters"""
+        with self.__lock:
+            return self.__client.get_stats()  # type: ignore
+
     async def call_tool(
         self, tool_name: str, input_data: Dict[str, Any]
     ) -> CallToolResult:
         """Call a tool with the given input data"""
         with self.__lock:
-            # We already run in an event loop, dont believe Pylance
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        # do not hold the lock while awaiting, the session pool caps concurrency
+        return await client.call_tool(tool_name, input_data)  # type: ignore
+
+    def close(self):
+        """Close pooled sessions of this server"""
+        with self.__lock:
+            self.__client.close()  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerRemote":
         with self.__lock:
@@ -316,13 +358,24 @@ class MCPServerLocal(BaseModel):
         with self.__lock:
             return self.__client.has_tool(tool_name)  # type: ignore
 
+    def get_stats(self) -> dict[str, Any]:
+        """Get session pool and latency counters"""
+        with self.__lock:
+            return self.__client.get_stats()  # type: ignore
+
     async def call_tool(
         self, tool_name: str, input_data: Dict[str, Any]
     ) -> CallToolResult:
         """Call a tool with the given input data"""
         with self.__lock:
-            # We already run in an event loop, dont believe Pylance
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        # do not hold the lock while awaiting, the session pool caps concurrency
+        return await client.call_tool(tool_name, input_data)  # type: ignore
+
+    def close(self):
+        """Close pooled sessions of this server"""
+        with self.__lock:
+            self.__client.close()  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerLocal":
         with self.__lock:
@@ -454,6 +507,15 @@ class MCPConfig(BaseModel):
                 "servers": servers_data
             }  # Prepare data for re-initialization or update
 
+            # close pooled sessions of the servers being replaced
+            for server in instance.servers:
+                try:
+                    server.close()
+                except Exception as e:
+                    PrintStyle.error(
+                        f"Failed to close MCP sessions of '{server.name}': {e}"
+                    )
+
             # Option 1: Re-initialize the existing instance (if __init__ is idempotent for other fields)
             instance.__init__(servers_list=servers_data)
 
@@ -472,6 +534,7 @@ class MCPConfig(BaseModel):
             #         )
 
             cls.__initialized = True
+            _tools_changed()
             return instance
 
     @classmethod
@@ -628,6 +691,8 @@ class MCPConfig(BaseModel):
                 error = server.get_error()
                 # get log bool
                 has_log = server.get_log() != ""
+                # session pool and latency counters
+                stats = server.get_stats()
 
                 # add server status to result
                 result.append(
@@ -637,6 +702,7 @@ class MCPConfig(BaseModel):
                         "error": error,
                         "tool_count": tool_count,
                         "has_log": has_log,
+                        "stats": stats,
                     }
                 )
 
@@ -794,19 +860,265 @@ class MCPConfig(BaseModel):
             raise ValueError(f"Tool {tool_name} not found")
         server_name_part, tool_name_part = tool_name.split(".")
         with self.__lock:
-            for server in self.servers:
-                if server.name == server_name_part and server.has_tool(tool_name_part):
-                    return await server.call_tool(tool_name_part, input_data)
+            target = next(
+                (
+                    server
+                    for server in self.servers
+                    if server.name == server_name_part
+                    and server.has_tool(tool_name_part)
+                ),
+                None,
+            )
+        if target is None:
             raise ValueError(f"Tool {tool_name} not found")
+        return await target.call_tool(tool_name_part, input_data)
 
 
 T = TypeVar("T")
 
+# errors that mean the transport behind a pooled session went away
+_TRANSPORT_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+    OSError,
+)
+
+
+def _unwrap_exception(e: BaseException) -> BaseException:
+    # transports run in task groups, report the first real error instead of the group
+    excs = getattr(e, "exceptions", None)
+    while excs:
+        e = excs[0]
+        excs = getattr(e, "exceptions", None)
+    return e
+
+
+@dataclass
+class _PooledSession:
+    session: ClientSession
+    closing: anyio.Event
+    last_used: float
+    fresh: bool = True
+    broken: bool = False
+
+
+class MCPSessionPool:
+    """
+    Long-lived, initialized MCP sessions for a single server.
+    Sessions are owned by tasks on the MCP portal loop, so they outlive the event loops
+    of their callers. Idle sessions are health-checked on reuse and evicted after
+    idle_timeout seconds, max_sessions caps concurrent operations on the server.
+    """
+
+    HEALTH_CHECK_INTERVAL = 30  # ping sessions idle for longer than this on checkout
+    HEALTH_CHECK_TIMEOUT = 5
+
+    def __init__(self, client: "MCPClientBase", max_sessions: int, idle_timeout: int):
+        self.client = client
+        self.max_sessions = max(1, max_sessions)
+        self.idle_timeout = idle_timeout
+        self._slots = threading.BoundedSemaphore(self.max_sessions)
+        self._lock = threading.Lock()
+        self._idle: list[_PooledSession] = []
+        self._in_use = 0
+        self._closed = False
+        self._reaper_started = False
+        self._stats = {
+            "calls": 0,
+            "errors": 0,
+            "reconnects": 0,
+            "sessions_opened": 0,
+            "total_latency": 0.0,
+            "max_latency": 0.0,
+            "last_latency": 0.0,
+        }
+
+    def execute(
+        self,
+        coro_func: Callable[[ClientSession], Awaitable[T]],
+        read_timeout_seconds: int,
+    ) -> T:
+        """Run coro_func with a pooled session. Blocking, call from a worker thread."""
+        portal = _get_mcp_portal()
+        with self._slots:
+            with self._lock:
+                self._in_use += 1
+            started = time.perf_counter()
+            pooled = None
+            try:
+                pooled = self._checkout(portal, read_timeout_seconds)
+                try:
+                    result = portal.call(coro_func, pooled.session)
+                except _TRANSPORT_ERRORS:
+                    if pooled.fresh:
+                        raise
+                    # stale session from the pool, reconnect once and retry
+                    self._discard(portal, pooled)
+                    self._count("reconnects")
+                    pooled = self._open(portal, read_timeout_seconds)
+                    result = portal.call(coro_func, pooled.session)
+            except BaseException as e:
+                if pooled:
+                    self._discard(portal, pooled)
+                self._record(started, error=True)
+                raise _unwrap_exception(e)
+            finally:
+                with self._lock:
+                    self._in_use -= 1
+            self._record(started)
+            self._checkin(portal, pooled)
+            return result
+
+    def close(self):
+        """Close idle sessions now and busy sessions when they are returned"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        if idle:
+            _get_mcp_portal().start_task_soon(self._close_sessions, idle)
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            stats = self._stats
+            calls = stats["calls"]
+            return {
+                "calls": calls,
+                "errors": stats["errors"],
+                "reconnects": stats["reconnects"],
+                "sessions_opened": stats["sessions_opened"],
+                "idle_sessions": len(self._idle),
+                "active_calls": self._in_use,
+                "avg_latency_ms": (
+                    round(stats["total_latency"] / calls * 1000, 1) if calls else 0
+                ),
+                "max_latency_ms": round(stats["max_latency"] * 1000, 1),
+                "last_latency_ms": round(stats["last_latency"] * 1000, 1),
+            }
+
+    def _checkout(self, portal, read_timeout_seconds: int) -> _PooledSession:
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise ConnectionError(
+                        f"MCP session pool for '{self.client.server.name}' is closed"
+                    )
+                # LIFO keeps the most recently used session hot
+                pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                return self._open(portal, read_timeout_seconds)
+
+            idle_for = time.monotonic() - pooled.last_used
+            if pooled.broken or self._is_expired(pooled):
+                self._discard(portal, pooled)
+                continue
+            if idle_for > self.HEALTH_CHECK_INTERVAL and not portal.call(
+                self._ping, pooled
+            ):
+                self._discard(portal, pooled)
+                self._count("reconnects")
+                continue
+            pooled.fresh = False
+            return pooled
+
+    def _checkin(self, portal, pooled: _PooledSession):
+        pooled.last_used = time.monotonic()
+        with self._lock:
+            if not self._closed and not pooled.broken:
+                self._idle.append(pooled)
+                return
+        self._discard(portal, pooled)
+
+    def _open(self, portal, read_timeout_seconds: int) -> _PooledSession:
+        future, pooled = portal.start_task(self._own_session, read_timeout_seconds)
+        # the owner task ending means the transport is gone
+        future.add_done_callback(lambda _: setattr(pooled, "broken", True))
+        self._count("sessions_opened")
+        if self.idle_timeout > 0:
+            with self._lock:
+                start_reaper = not self._reaper_started
+                self._reaper_started = True
+            if start_reaper:
+                portal.start_task_soon(self._reap_idle)
+        return pooled
+
+    def _discard(self, portal, pooled: _PooledSession):
+        pooled.broken = True
+        try:
+            portal.call(pooled.closing.set)
+        except Exception:
+            pass
+
+    async def _own_session(
+        self, read_timeout_seconds: int, *, task_status=anyio.TASK_STATUS_IGNORED
+    ):
+        # transports are task group based, so the session must be entered and exited in this task
+        closing = anyio.Event()
+        async with AsyncExitStack() as stack:
+            stdio, write = await self.client._create_stdio_transport(stack)
+            session = await stack.enter_async_context(
+                ClientSession(
+                    stdio,  # type: ignore
+                    write,  # type: ignore
+                    read_timeout_seconds=timedelta(seconds=read_timeout_seconds),
+                )
+            )
+            await session.initialize()
+            task_status.started(
+                _PooledSession(
+                    session=session, closing=closing, last_used=time.monotonic()
+                )
+            )
+            await closing.wait()
+
+    async def _ping(self, pooled: _PooledSession) -> bool:
+        try:
+            with anyio.fail_after(self.HEALTH_CHECK_TIMEOUT):
+                await pooled.session.send_ping()
+            return True
+        except Exception:
+            return False
+
+    async def _reap_idle(self):
+        while not self._closed:
+            await anyio.sleep(max(1, self.idle_timeout / 2))
+            with self._lock:
+                expired = [p for p in self._idle if p.broken or self._is_expired(p)]
+                self._idle = [p for p in self._idle if p not in expired]
+            await self._close_sessions(expired)
+
+    async def _close_sessions(self, sessions: list[_PooledSession]):
+        for pooled in sessions:
+            pooled.broken = True
+            pooled.closing.set()
+
+    def _is_expired(self, pooled: _PooledSession) -> bool:
+        return (
+            self.idle_timeout > 0
+            and time.monotonic() - pooled.last_used > self.idle_timeout
+        )
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _record(self, started: float, error: bool = False):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            stats = self._stats
+            stats["calls"] += 1
+            if error:
+                stats["errors"] += 1
+            stats["total_latency"] += elapsed
+            stats["max_latency"] = max(stats["max_latency"], elapsed)
+            stats["last_latency"] = elapsed
+
 
 class MCPClientBase(ABC):
     # server: Union[MCPServerLocal, MCPServerRemote] # Defined in __init__
     # tools: List[dict[str, Any]] # Defined in __init__
-    # No self.session, self.exit_stack, self.stdio, self.write as persistent instance fields
+    # Sessions live in self._pool (MCPSessionPool), not as instance fields
 
     __lock: ClassVar[threading.Lock] = threading.Lock()
 
@@ -816,6 +1128,7 @@ class MCPClientBase(ABC):
         self.error: str = ""
         self.log: List[str] = []
         self.log_file: Optional[TextIO] = None
+        self._pool: Optional[MCPSessionPool] = None
 
     # Protected method
     @abstractmethod
@@ -828,68 +1141,53 @@ class MCPClientBase(ABC):
         """Create stdio/write streams using the provided exit_stack."""
         ...
 
+    def _get_pool(self) -> MCPSessionPool:
+        with self.__lock:
+            if self._pool is None:
+                set = settings.get_settings()
+                self._pool = MCPSessionPool(
+                    self,
+                    max_sessions=set["mcp_client_pool_size"],
+                    idle_timeout=set["mcp_client_idle_timeout"],
+                )
+            return self._pool
+
     async def _execute_with_session(
         self,
         coro_func: Callable[[ClientSession], Awaitable[T]],
         read_timeout_seconds=60,
     ) -> T:
         """
-        Manages the lifecycle of an MCP session for a single operation.
-        Creates a temporary session, executes coro_func with it, and ensures cleanup.
+        Executes coro_func with a pooled, already initialized session.
+        A new session (with read_timeout_seconds) is only opened when no healthy idle one exists.
         """
         operation_name = coro_func.__name__  # For logging
-        # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name}): Creating new session for operation '{operation_name}'...")
-        # Store the original exception outside the async block
-        original_exception = None
         try:
-            async with AsyncExitStack() as temp_stack:
-                try:
-
-                    stdio, write = await self._create_stdio_transport(temp_stack)
-                    # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name} - {operation_name}): Transport created. Initializing session...")
-                    session = await temp_stack.enter_async_context(
-                        ClientSession(
-                            stdio,  # type: ignore
-                            write,  # type: ignore
-                            read_timeout_seconds=timedelta(
-                                seconds=read_timeout_seconds
-                            ),
-                        )
-                    )
-                    await session.initialize()
-
-                    result = await coro_func(session)
-
-                    return result
-                except Exception as e:
-                    # Store the original exception and raise a dummy exception
-                    excs = getattr(e, "exceptions", None)  # Python 3.11+ ExceptionGroup
-                    if excs:
-                        original_exception = excs[0]
-                    else:
-                        original_exception = e
-                    # Create a dummy exception to break out of the async block
-                    raise RuntimeError("Dummy exception to break out of async block")
+            return await anyio.to_thread.run_sync(
+                self._get_pool().execute,
+                coro_func,
+                read_timeout_seconds,
+                abandon_on_cancel=True,
+            )
         except Exception as e:
-            # Check if this is our dummy exception
-            if original_exception is not None:
-                e = original_exception
-            # We have the original exception stored
             PrintStyle(
                 background_color="#AA4455", font_color="white", padding=False
             ).print(
                 f"MCPClientBase ({self.server.name} - {operation_name}): Error during operation: {type(e).__name__}: {e}"
             )
-            raise e  # Re-raise the original exception
-        # finally:
-        #     PrintStyle(font_color="cyan").print(
-        #         f"MCPClientBase ({self.server.name} - {operation_name}): Session and transport will be closed by AsyncExitStack."
-        #     )
-        # This line should ideally be unreachable if the try/except/finally logic within the 'async with' is exhaustive.
-        # Adding it to satisfy linters that might not fully trace the raise/return paths through async context managers.
-        raise RuntimeError(
-            f"MCPClientBase ({self.server.name} - {operation_name}): _execute_with_session exited 'async with' block unexpectedly."
-        )
+            raise e
+
+    def close(self):
+        """Close all pooled sessions, e.g. when the server config is replaced"""
+        with self.__lock:
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.close()
+
+    def get_stats(self) -> dict[str, Any]:
+        with self.__lock:
+            pool = self._pool
+        return pool.get_stats() if pool else {}
 
     async def update_tools(self) -> "MCPClientBase":
         # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name}): Starting 'update_tools' operation...")
@@ -928,6 +1226,7 @@ class MCPClientBase(ABC):
             with self.__lock:
                 self.tools = []  # Ensure tools are cleared on failure
                 self.error = f"Failed to initialize. {error_text[:200]}{'...' if len(error_text) > 200 else ''}"  # store error from tools fetch
+        _tools_changed()
         return self
 
     def has_tool(self, tool_name: str) -> bool:
@@ -1,6 +1,10 @@
-import ast
+from collections import OrderedDict
 from datetime import datetime
-from typing import Any, List, Sequence
+import heapq
+import operator
+from typing import Any, Callable, Iterable, List, Sequence
+import threading
+import anyio
 from langchain.storage import InMemoryByteStore, LocalFileStore
 from langchain.embeddings import CacheBackedEmbeddings
 
@@ -20,6 +24,8 @@ from langchain_core.embeddings import Embeddings
 
 import os
 import json
+import pickle
+import shutil
 
 import numpy as np
 
@@ -28,6 +34,9 @@ from . import files
 from langchain_core.documents import Document
 import uuid
 from src.helpers import knowledge_import
+from src.helpers import memory_index
+from src.helpers.memory_filter import MemoryFilter, MetadataColumns, compile_filter
+from src.helpers.memory_wal import MemoryWal
 from src.helpers.log import Log, LogItem
 from enum import Enum
 from src.core.agent import Agent, ModelConfig
@@ -35,6 +44,123 @@ from src import models
 
 
 class MyFaiss(FAISS):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # metadata arrays aligned with index positions for filtering
+        self.columns = MetadataColumns(
+            self._metadatas, lambda: len(self.index_to_docstore_id)
+        )
+        # positions of deleted documents still in an HNSW graph, mapped to id None
+        self.deleted: np.ndarray | None = None
+        if None in self.index_to_docstore_id.values():
+            self.deleted = np.array(
+                [
+                    self.index_to_docstore_id[i] is None
+                    for i in range(len(self.index_to_docstore_id))
+                ]
+            )
+        # bumped whenever positions shift, a rebuild started before is discarded
+        self.layout = 0
+        self.rebuilding = False
+
+    def _metadatas(self) -> list[dict[str, Any]]:
+        return [
+            self.docstore._dict[id].metadata if id is not None else {}  # type: ignore
+            for id in (
+                self.index_to_docstore_id[i] for i in range(len(self.index_to_docstore_id))
+            )
+        ]
+
+    def live_mask(self) -> np.ndarray | None:
+        """Positions of documents not deleted, None when all are."""
+        return None if self.deleted is None else ~self.deleted
+
+    def needs_purge(self) -> bool:
+        return (
+            self.deleted is not None
+            and np.count_nonzero(self.deleted)
+            > memory_index.HNSW_DELETED_RATIO * len(self.deleted)
+        )
+
+    def rebuild(self, kind: str, nprobe: int, ef_search: int):
+        """Move the live vectors to a new index of the given type, dropping deleted ones."""
+        vectors = memory_index.vectors_of(self.index)
+        live = self.live_mask()
+        index = memory_index.build(
+            kind, vectors if live is None else vectors[live], self.index.d
+        )
+        memory_index.set_search_params(index, nprobe, ef_search)
+        self._swap_index(index, np.flatnonzero(self.deleted) if live is not None else None)
+
+    def rebuild_in_background(
+        self,
+        kind: str,
+        nprobe: int,
+        ef_search: int,
+        lock: threading.RLock,
+        done: Callable[[], None],
+    ) -> bool:
+        """
+        Same as rebuild, with only the copy and the swap under lock and training and
+        building in a worker thread. Vectors added meanwhile are carried over, a delete
+        that shifted positions meanwhile discards the new index. Calls done after a swap,
+        returns False when a rebuild is already running.
+        """
+        with lock:
+            if self.rebuilding:
+                return False
+            self.rebuilding = True
+            layout = self.layout
+            vectors = memory_index.vectors_of(self.index)
+            deleted = None if self.deleted is None else self.deleted.copy()
+
+        def run():
+            try:
+                index = memory_index.build(
+                    kind, vectors if deleted is None else vectors[~deleted], self.index.d
+                )
+                memory_index.set_search_params(index, nprobe, ef_search)
+                with lock:
+                    if self.layout != layout:
+                        return  # positions shifted, the next persist starts over
+                    index.add(memory_index.vectors_of(self.index, len(vectors)))
+                    self._swap_index(
+                        index, None if deleted is None else np.flatnonzero(deleted)
+                    )
+                done()
+            except Exception as e:
+                PrintStyle.error(f"Memory index rebuild failed: {e}")
+            finally:
+                self.rebuilding = False
+
+        threading.Thread(target=run, name="memory-index", daemon=True).start()
+        return True
+
+    def _swap_index(self, index: faiss.Index, removed: np.ndarray | None):
+        # index holds the vectors of self.index except those at positions removed
+        if removed is not None and len(removed):
+            self._remove_positions(removed)
+        self.index = index
+        if self.deleted is not None and memory_index.index_type(index) != memory_index.HNSW:
+            # deleted while building an index that can remove vectors
+            positions = np.flatnonzero(self.deleted)
+            memory_index.remove_positions(index, positions)
+            self._remove_positions(positions)
+
+    def _remove_positions(self, positions: np.ndarray):
+        # drop positions from the mappings and shift the following ones down
+        removed = set(positions.tolist())
+        self.columns.delete(positions)
+        if self.deleted is not None:
+            self.deleted = np.delete(self.deleted, positions)
+            if not self.deleted.any():
+                self.deleted = None
+        remaining_ids = [
+            id_ for i, id_ in sorted(self.index_to_docstore_id.items()) if i not in removed
+        ]
+        self.index_to_docstore_id = {i: id_ for i, id_ in enumerate(remaining_ids)}
+        self.layout += 1
+
     # override aget_by_ids
     def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
         # return all self.docstore._dict[id] in ids
@@ -46,6 +172,398 @@ class MyFaiss(FAISS):
     def get_all_docs(self):
         return self.docstore._dict  # type: ignore
 
+    # override the private add all adds go through, to keep metadata columns in step
+    def _FAISS__add(
+        self,
+        texts: Iterable[str],
+        embeddings: Iterable[List[float]],
+        metadatas: Iterable[dict] | None = None,
+        ids: list[str] | None = None,
+    ) -> list[str]:
+        texts = list(texts)
+        metadatas = list(metadatas) if metadatas is not None else None
+        ids = FAISS._FAISS__add(self, texts, embeddings, metadatas, ids)  # type: ignore
+        self.columns.append(metadatas or [{} for _ in texts])
+        if self.deleted is not None:
+            self.deleted = np.concatenate((self.deleted, np.zeros(len(texts), dtype=bool)))
+        return ids
+
+    # override delete, approximate indexes don't shift positions on removal like flat ones
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> bool | None:
+        if ids is None:
+            raise ValueError("No ids provided to delete.")
+        reversed_index = {
+            id_: idx for idx, id_ in self.index_to_docstore_id.items() if id_ is not None
+        }
+        missing_ids = set(ids).difference(reversed_index)
+        if missing_ids:
+            raise ValueError(f"Some specified ids do not exist in the store: {missing_ids}")
+
+        positions = np.fromiter({reversed_index[id_] for id_ in ids}, dtype=np.int64)
+        self.docstore.delete(ids)
+        if memory_index.index_type(self.index) == memory_index.HNSW:
+            # the graph keeps the nodes, searches skip them until the next rebuild
+            if self.deleted is None:
+                self.deleted = np.zeros(len(self.index_to_docstore_id), dtype=bool)
+            self.deleted[positions] = True
+            for position in positions.tolist():
+                self.index_to_docstore_id[position] = None
+            return True
+
+        memory_index.remove_positions(self.index, positions)
+        self._remove_positions(positions)
+        return True
+
+    # override search, compiled filters select vectors inside faiss instead of
+    # checking over-fetched documents one by one
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Any = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        live = self.live_mask()
+        if not isinstance(filter, MemoryFilter) and (filter is not None or live is None):
+            # LangChain's own filters, Memory only passes compiled ones
+            return super().similarity_search_with_score_by_vector(
+                embedding, k, filter, fetch_k, **kwargs
+            )
+
+        if filter is None:
+            mask = live
+        else:
+            mask = self.columns.mask(filter)
+            if live is not None:
+                mask = mask & live
+        selected = int(np.count_nonzero(mask))
+        if not selected:
+            return []
+        vector = np.array([embedding], dtype=np.float32)
+        scores, indices = memory_index.search(
+            self.index, vector, min(k, selected), None if selected == len(mask) else mask
+        )
+
+        docs = [
+            (self.docstore._dict[self.index_to_docstore_id[i]], float(score))  # type: ignore
+            for score, i in zip(scores[0], indices[0])
+            if i != -1
+        ]
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            # same comparison as the base class, scores are distances for cosine
+            cmp = (
+                operator.ge
+                if self.distance_strategy
+                in (DistanceStrategy.MAX_INNER_PRODUCT, DistanceStrategy.JACCARD)
+                else operator.le
+            )
+            docs = [(doc, score) for doc, score in docs if cmp(score, score_threshold)]
+        return docs
+
+
+class PartitionSnapshot:
+    """
+    Partition files of one snapshot, written to a new generation directory. The manifest
+    naming the generation is switched in with a single os.replace, so a crash leaves either
+    the previous snapshot or this one, never the files of two snapshots mixed.
+    """
+
+    GENERATION_PREFIX = "gen_"
+
+    def __init__(self, areas: dict[str, str], data: dict[str, bytes]):
+        self.areas = areas  # area name -> partition file name
+        self.data = data  # file name -> content
+        self.generation = ""
+
+    def write(self, folder_path: str):
+        numbers = [
+            int(name[len(self.GENERATION_PREFIX) :])
+            for name in os.listdir(folder_path)
+            if name.startswith(self.GENERATION_PREFIX)
+            and name[len(self.GENERATION_PREFIX) :].isdigit()
+        ]
+        self.generation = f"{self.GENERATION_PREFIX}{max(numbers, default=0) + 1}"
+        generation_path = os.path.join(folder_path, self.generation)
+        os.makedirs(generation_path)
+        for name, content in self.data.items():
+            with open(os.path.join(generation_path, name), "wb") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+        _fsync_dir(generation_path)
+        MemoryWal.write_atomic(
+            os.path.join(folder_path, PartitionedFaiss.MANIFEST),
+            json.dumps({"generation": self.generation, "areas": self.areas}).encode(),
+        )
+        _fsync_dir(folder_path)
+
+    def remove_stale(self, folder_path: str):
+        """Remove earlier generations, unfinished ones and the single index of older stores."""
+        for name in os.listdir(folder_path):
+            path = os.path.join(folder_path, name)
+            if name.startswith(self.GENERATION_PREFIX) and name != self.generation:
+                shutil.rmtree(path, ignore_errors=True)
+            elif name.startswith(PartitionedFaiss.LEGACY_INDEX + ".") and name.endswith(
+                (".faiss", ".pkl", ".tmp")
+            ):
+                os.remove(path)
+
+
+def _fsync_dir(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class PartitionedFaiss:
+    """
+    Memory store split into one MyFaiss per memory area, behind the calls Memory makes.
+    Searches visit only the areas a filter can match and merge their top results.
+    """
+
+    # current snapshot generation and area name -> partition file name,
+    # its presence marks the partitioned layout
+    MANIFEST = "areas.json"
+    # single index layout of older stores, split into areas on load
+    LEGACY_INDEX = "index"
+
+    def __init__(
+        self,
+        embedding_function: Embeddings,
+        relevance_score_fn: Callable[[float], float],
+    ):
+        self.embeddings = embedding_function
+        self.relevance_score_fn = relevance_score_fn
+        self.partitions: dict[str, MyFaiss] = {}
+        self.areas: dict[str, str] = {}  # document id -> area
+
+    @staticmethod
+    def area_of(metadata: dict[str, Any]) -> str:
+        return metadata.get("area") or Memory.Area.MAIN.value
+
+    @staticmethod
+    def exists(folder_path: str) -> bool:
+        return files.exists(folder_path, PartitionedFaiss.MANIFEST) or files.exists(
+            folder_path, PartitionedFaiss.LEGACY_INDEX + ".faiss"
+        )
+
+    @staticmethod
+    def is_legacy(folder_path: str) -> bool:
+        return not files.exists(folder_path, PartitionedFaiss.MANIFEST)
+
+    @classmethod
+    def load_local(
+        cls,
+        folder_path: str,
+        embeddings: Embeddings,
+        relevance_score_fn: Callable[[float], float],
+    ) -> "PartitionedFaiss":
+        db = cls(embeddings, relevance_score_fn)
+        if cls.is_legacy(folder_path):
+            # older stores keep all areas in one index, move the vectors over as they are
+            legacy = db._load_partition(folder_path, cls.LEGACY_INDEX)
+            docs = [
+                legacy.docstore._dict[legacy.index_to_docstore_id[i]]  # type: ignore
+                for i in range(len(legacy.index_to_docstore_id))
+            ]
+            vectors = memory_index.vectors_of(legacy.index)
+            db.add_embeddings(
+                text_embeddings=[(doc.page_content, v) for doc, v in zip(docs, vectors)],
+                metadatas=[doc.metadata for doc in docs],
+                ids=[legacy.index_to_docstore_id[i] for i in range(len(docs))],
+            )
+            return db
+
+        manifest = json.loads(files.read_file(os.path.join(folder_path, cls.MANIFEST)))
+        partitions_path = os.path.join(folder_path, manifest["generation"])
+        for area, name in manifest["areas"].items():
+            partition = db._load_partition(partitions_path, name)
+            db.partitions[area] = partition
+            for id in partition.index_to_docstore_id.values():
+                if id is not None:
+                    db.areas[id] = area
+        return db
+
+    def _load_partition(self, folder_path: str, name: str) -> MyFaiss:
+        return MyFaiss.load_local(
+            folder_path=folder_path,
+            embeddings=self.embeddings,  # type: ignore
+            index_name=name,
+            allow_dangerous_deserialization=True,
+            distance_strategy=DistanceStrategy.COSINE,
+            # normalize_L2=True,
+            relevance_score_fn=self.relevance_score_fn,
+        )  # type: ignore
+
+    def _partition(self, area: str, dimension: int) -> MyFaiss:
+        partition = self.partitions.get(area)
+        if partition is None:
+            partition = MyFaiss(
+                embedding_function=self.embeddings,
+                index=faiss.IndexFlatIP(dimension),
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={},
+                distance_strategy=DistanceStrategy.COSINE,
+                # normalize_L2=True,
+                relevance_score_fn=self.relevance_score_fn,
+            )
+            self.partitions[area] = partition
+        return partition
+
+    def snapshot(self) -> "PartitionSnapshot":
+        """Serialized copy of all partitions, taken while writers are held off."""
+        areas: dict[str, str] = {}
+        data: dict[str, bytes] = {}
+        for area, partition in self.partitions.items():
+            name = "area_" + files.safe_file_name(area)
+            while name in areas.values():
+                name += "_"  # areas differing only in unsafe characters
+            areas[area] = name
+            data[name + ".faiss"] = faiss.serialize_index(partition.index).tobytes()
+            data[name + ".pkl"] = pickle.dumps(
+                (partition.docstore, partition.index_to_docstore_id)
+            )
+        return PartitionSnapshot(areas, data)
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[tuple[str, Sequence[float]]],
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+    ) -> list[str]:
+        text_embeddings = list(text_embeddings)
+        ids = ids or [str(uuid.uuid4()) for _ in text_embeddings]
+        metadatas = metadatas or [{} for _ in text_embeddings]
+        groups: dict[str, list[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            groups.setdefault(self.area_of(metadata), []).append(i)
+        for area, positions in groups.items():
+            partition = self._partition(area, len(text_embeddings[positions[0]][1]))
+            partition.add_embeddings(
+                text_embeddings=[text_embeddings[i] for i in positions],
+                metadatas=[metadatas[i] for i in positions],
+                ids=[ids[i] for i in positions],
+            )
+            for i in positions:
+                self.areas[ids[i]] = area
+        return ids
+
+    def add_documents(self, documents: list[Document], ids: list[str]) -> list[str]:
+        vectors = self.embeddings.embed_documents([doc.page_content for doc in documents])
+        return self.add_embeddings(
+            text_embeddings=[(doc.page_content, v) for doc, v in zip(documents, vectors)],
+            metadatas=[doc.metadata for doc in documents],
+            ids=ids,
+        )
+
+    def delete(self, ids: list[str]) -> bool:
+        missing_ids = set(ids).difference(self.areas)
+        if missing_ids:
+            raise ValueError(f"Some specified ids do not exist in the store: {missing_ids}")
+        groups: dict[str, list[str]] = {}
+        for id in ids:
+            groups.setdefault(self.areas[id], []).append(id)
+        for area, area_ids in groups.items():
+            self.partitions[area].delete(ids=area_ids)
+            for id in area_ids:
+                del self.areas[id]
+        return True
+
+    def has(self, id: str) -> bool:
+        return id in self.areas
+
+    def get_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        return [
+            self.partitions[self.areas[id]].docstore._dict[id]  # type: ignore
+            for id in (ids if isinstance(ids, list) else [ids])
+            if id in self.areas
+        ]
+
+    async def aget_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        return self.get_by_ids(ids)
+
+    def get_all_docs(self) -> dict[str, Document]:
+        docs: dict[str, Document] = {}
+        for partition in self.partitions.values():
+            docs.update(partition.get_all_docs())
+        return docs
+
+    def similar_ids(
+        self,
+        areas: list[str],
+        vectors: list[list[float]],
+        score_threshold: float,
+        k: int = 100,
+    ) -> list[str]:
+        """Ids of stored documents at least score_threshold relevant to any vector,
+        searched with one batched query per area in the area of each vector."""
+        groups: dict[str, list[int]] = {}
+        for i, area in enumerate(areas):
+            groups.setdefault(area, []).append(i)
+
+        found: dict[str, None] = {}  # ordered set
+        for area, rows in groups.items():
+            partition = self.partitions.get(area)
+            if partition is None or not partition.index.ntotal:
+                continue
+            queries = np.array([vectors[i] for i in rows], dtype=np.float32)
+            live = partition.live_mask()
+            limit = min(k, partition.index.ntotal)
+            while True:
+                scores, indices = memory_index.search(
+                    partition.index, queries, limit, live
+                )
+                relevance = np.vectorize(self.relevance_score_fn, otypes=[float])(scores)
+                relevant = relevance >= score_threshold
+                # a full row of matches may continue past the limit, widen and search again
+                if relevant[:, -1].any() and limit < partition.index.ntotal:
+                    limit = min(limit * 4, partition.index.ntotal)
+                    continue
+                break
+            for position in indices[relevant & (indices != -1)]:
+                found[partition.index_to_docstore_id[int(position)]] = None
+        return list(found)
+
+    def _areas_for(self, filter: MemoryFilter | None) -> list[str]:
+        areas = filter.values("area") if filter else None
+        if areas is None:
+            return list(self.partitions)
+        return [area for area in list(self.partitions) if area in areas]
+
+    def search(
+        self,
+        embedding: list[float],
+        k: int,
+        score_threshold: float,
+        filter: MemoryFilter | None = None,
+    ) -> list[Document]:
+        """Top k documents over the areas the filter can match, by relevance."""
+        results: list[tuple[Document, float]] = []
+        for area in self._areas_for(filter):
+            for doc, score in self.partitions[area].similarity_search_with_score_by_vector(
+                embedding, k, filter=filter
+            ):
+                relevance = self.relevance_score_fn(score)
+                if relevance >= score_threshold:
+                    results.append((doc, relevance))
+        return [doc for doc, _ in heapq.nlargest(k, results, key=lambda r: r[1])]
+
+    async def asearch(
+        self,
+        query: str,
+        k: int,
+        score_threshold: float,
+        filter: MemoryFilter | None = None,
+    ) -> list[Document]:
+        embedding = await self.embeddings.aembed_query(query)
+        return await anyio.to_thread.run_sync(
+            self.search, embedding, k, score_threshold, filter
+        )
+
 
 class Memory:
 
@@ -55,7 +573,14 @@ class Memory:
         SOLUTIONS = "solutions"
         INSTRUMENTS = "instruments"
 
-    index: dict[str, "MyFaiss"] = {}
+    index: dict[str, "PartitionedFaiss"] = {}
+    # changes per memory subdir, cached search results of older versions are stale
+    versions: dict[str, int] = {}
+    search_cache: OrderedDict[tuple, tuple[int, list[Document]]] = OrderedDict()
+    SEARCH_CACHE_SIZE = 64
+    # documents per embedding request and requests in flight when inserting in bulk
+    EMBED_BATCH_SIZE = 64
+    EMBED_CONCURRENCY = 4
 
     @staticmethod
     async def get(agent: Agent):
@@ -70,8 +595,12 @@ class Memory:
                 agent.config.embeddings_model,
                 memory_subdir,
                 False,
+                index_type=agent.config.memory_index,
+                nprobe=agent.config.memory_nprobe,
+                ef_search=agent.config.memory_ef_search,
             )
             Memory.index[memory_subdir] = db
+            Memory._bump_version(memory_subdir)
             wrap = Memory(agent, db, memory_subdir=memory_subdir)
             if agent.config.knowledge_subdirs:
                 await wrap.preload_knowledge(
@@ -98,7 +627,10 @@ class Memory:
         model_config: ModelConfig,
         memory_subdir: str,
         in_memory=False,
-    ) -> tuple[MyFaiss, bool]:
+        index_type: str = memory_index.FLAT,
+        nprobe: int = 16,
+        ef_search: int = 512,
+    ) -> tuple[PartitionedFaiss, bool]:
 
         PrintStyle.standard("Initializing VectorDB...")
 
@@ -135,21 +667,32 @@ class Memory:
         )
 
         # initial DB and docs variables
-        db: MyFaiss | None = None
+        db: PartitionedFaiss | None = None
         docs: dict[str, Document] | None = None
 
         created = False
+        legacy = False
+
+        wal = MemoryWal.get(db_dir)
 
         # if db folder exists and is not empty:
-        if os.path.exists(db_dir) and files.exists(db_dir, "index.faiss"):
-            db = MyFaiss.load_local(
-                folder_path=db_dir,
-                embeddings=embedder,
-                allow_dangerous_deserialization=True,
-                distance_strategy=DistanceStrategy.COSINE,
-                # normalize_L2=True,
-                relevance_score_fn=Memory._cosine_normalizer,
-            )  # type: ignore
+        if os.path.exists(db_dir) and PartitionedFaiss.exists(db_dir):
+            legacy = PartitionedFaiss.is_legacy(db_dir)
+            if legacy:
+                PrintStyle.standard("Splitting memory into areas...")
+                if log_item:
+                    log_item.stream(progress="\nSplitting memory into areas")
+            with wal.snapshot_lock:
+                db = PartitionedFaiss.load_local(
+                    db_dir, embedder, Memory._cosine_normalizer
+                )
+
+                # apply changes logged after the last snapshot
+                replayed = wal.replay(db)
+            if replayed:
+                PrintStyle.standard(f"Replayed {replayed} memory log records")
+                if log_item:
+                    log_item.stream(progress=f"\nReplayed {replayed} memory log records")
 
             # if there is a mismatch in embeddings used, re-index the whole DB
             emb_ok = False
@@ -170,17 +713,7 @@ class Memory:
 
         # DB not loaded, create one
         if not db:
-            index = faiss.IndexFlatIP(len(embedder.embed_query("example")))
-
-            db = MyFaiss(
-                embedding_function=embedder,
-                index=index,
-                docstore=InMemoryDocstore(),
-                index_to_docstore_id={},
-                distance_strategy=DistanceStrategy.COSINE,
-                # normalize_L2=True,
-                relevance_score_fn=Memory._cosine_normalizer,
-            )
+            db = PartitionedFaiss(embedder, Memory._cosine_normalizer)
 
             # insert docs if reindexing
             if docs:
@@ -188,6 +721,7 @@ class Memory:
                 if log_item:
                     log_item.stream(progress="\nIndexing memories")
                 db.add_documents(documents=list(docs.values()), ids=list(docs.keys()))
+                Memory._tune_index(db, log_item, index_type, nprobe, ef_search)
 
             # save DB
             Memory._save_db_file(db, memory_subdir)
@@ -205,17 +739,27 @@ class Memory:
 
             created = True
 
+        elif (
+            Memory._tune_index(db, log_item, index_type, nprobe, ef_search) or legacy
+        ):
+            # migrated to another index type or layout, snapshot it
+            Memory._save_db_file(db, memory_subdir)
+
+        elif wal.should_compact():
+            wal.compact_in_background(db)
+
         return db, created
 
     def __init__(
         self,
         agent: Agent,
-        db: MyFaiss,
+        db: PartitionedFaiss,
         memory_subdir: str,
     ):
         self.agent = agent
         self.db = db
         self.memory_subdir = memory_subdir
+        self.wal = MemoryWal.get(Memory._abs_db_dir(memory_subdir))
 
     async def preload_knowledge(
         self, log_item: LogItem | None, kn_dirs: list[str], memory_subdir: str
@@ -238,20 +782,42 @@ class Memory:
             with open(index_path, "r") as f:
                 index = json.load(f)
 
-        # preload knowledge folders
-        index = self._preload_knowledge_folders(log_item, kn_dirs, index)
+        # preload knowledge folders, off the event loop as parsing is CPU heavy
+        index = await anyio.to_thread.run_sync(
+            self._preload_knowledge_folders, log_item, kn_dirs, index
+        )
 
-        for file in index:
-            if index[file]["state"] in ["changed", "removed"] and index[file].get(
-                "ids", []
-            ):  # for knowledge files that have been changed or removed and have IDs
-                await self.delete_documents_by_ids(
-                    index[file]["ids"]
-                )  # remove original version
-            if index[file]["state"] == "changed":
-                index[file]["ids"] = await self.insert_documents(
-                    index[file]["documents"]
-                )  # insert new version
+        # remove original versions of changed and removed files
+        old_ids = [
+            id
+            for file in index
+            if index[file]["state"] in ["changed", "removed"]
+            for id in index[file].get("ids", [])
+        ]
+        if old_ids:
+            await self.delete_documents_by_ids(old_ids)
+
+        # insert new versions of all changed files in one go
+        changed = [file for file in index if index[file]["state"] == "changed"]
+        docs = [doc for file in changed for doc in index[file]["documents"]]
+        if docs:
+
+            def progress(done: int, total: int):
+                if log_item:
+                    log_item.update(
+                        heading=f"Preloading knowledge... {done}/{total} documents embedded"
+                    )
+
+            ids = await self.insert_documents(docs, progress=progress)
+            start = 0
+            for file in changed:
+                count = len(index[file]["documents"])
+                index[file]["ids"] = ids[start : start + count]
+                start += count
+            if log_item:
+                log_item.stream(
+                    progress=f"\nEmbedded {len(docs)} documents from {len(changed)} files."
+                )
 
         # remove index where state="removed"
         index = {k: v for k, v in index.items() if v["state"] != "removed"}
@@ -271,31 +837,34 @@ class Memory:
         kn_dirs: list[str],
         index: dict[str, knowledge_import.KnowledgeImport],
     ):
-        # load knowledge folders, subfolders by area
-        for kn_dir in kn_dirs:
-            for area in Memory.Area:
-                index = knowledge_import.load_knowledge(
-                    log_item,
-                    files.get_abs_path("knowledge", kn_dir, area.value),
-                    index,
-                    {"area": area.value},
-                )
-
-        # load instruments descriptions
-        index = knowledge_import.load_knowledge(
-            log_item,
-            files.get_abs_path("instruments"),
-            index,
-            {"area": Memory.Area.INSTRUMENTS.value},
-            filename_pattern="**/*.md",
-        )
+        with knowledge_import.loader_pool() as pool:
+            # load knowledge folders, subfolders by area
+            for kn_dir in kn_dirs:
+                for area in Memory.Area:
+                    index = knowledge_import.load_knowledge(
+                        log_item,
+                        files.get_abs_path("knowledge", kn_dir, area.value),
+                        index,
+                        {"area": area.value},
+                        pool=pool,
+                    )
+
+            # load instruments descriptions
+            index = knowledge_import.load_knowledge(
+                log_item,
+                files.get_abs_path("instruments"),
+                index,
+                {"area": Memory.Area.INSTRUMENTS.value},
+                filename_pattern="**/*.md",
+                pool=pool,
+            )
 
         return index
 
     async def search_similarity_threshold(
         self, query: str, limit: int, threshold: float, filter: str = ""
     ):
-        comparator = Memory._get_comparator(filter) if filter else None
+        comparator = compile_filter(filter) if filter else None
 
         # rate limiter
         await self.agent.rate_limiter(
@@ -304,12 +873,28 @@ class Memory:
 
         return await self.db.asearch(
             query,
-            search_type="similarity_score_threshold",
             k=limit,
             score_threshold=threshold,
             filter=comparator,
         )
 
+    async def search_similarity_threshold_cached(
+        self, query: str, limit: int, threshold: float, filter: str = ""
+    ) -> list[Document]:
+        """Search reusing results of the same query until the memory changes."""
+        key = (self.memory_subdir, query, limit, threshold, filter)
+        version = Memory.versions.get(self.memory_subdir, 0)
+        cached = Memory.search_cache.get(key)
+        if cached and cached[0] == version:
+            Memory.search_cache.move_to_end(key)
+            return cached[1]
+
+        docs = await self.search_similarity_threshold(query, limit, threshold, filter)
+        Memory.search_cache[key] = (version, docs)
+        if len(Memory.search_cache) > Memory.SEARCH_CACHE_SIZE:
+            Memory.search_cache.popitem(last=False)
+        return docs
+
     async def delete_documents_by_query(
         self, query: str, threshold: float, filter: str = ""
     ):
@@ -333,7 +918,7 @@ class Memory:
                 # fnd = self.db.get(where={"id": {"$in": document_ids}})
                 # if fnd["ids"]: self.db.delete(ids=fnd["ids"])
                 # tot += len(fnd["ids"])
-                await self.db.adelete(ids=document_ids)
+                self._apply_delete(document_ids)
                 tot += len(document_ids)
 
             # If fewer than K document IDs, break the loop
@@ -341,7 +926,7 @@ class Memory:
                 break
 
         if tot:
-            self._save_db()  # persist
+            self._persist()
         return removed
 
     async def delete_documents_by_ids(self, ids: list[str]):
@@ -351,10 +936,8 @@ class Memory:
         )  # existing docs to remove (prevents error)
         if rem_docs:
             rem_ids = [doc.metadata["id"] for doc in rem_docs]  # ids to remove
-            await self.db.adelete(ids=rem_ids)
-
-        if rem_docs:
-            self._save_db()  # persist
+            self._apply_delete(rem_ids)
+            self._persist()
         return rem_docs
 
     async def insert_text(self, text, metadata: dict = {}):
@@ -362,9 +945,28 @@ class Memory:
         ids = await self.insert_documents([doc])
         return ids[0]
 
-    async def insert_documents(self, docs: list[Document]):
+    async def insert_documents(
+        self,
+        docs: list[Document],
+        progress: Callable[[int, int], None] | None = None,
+    ):
+        """Embed and insert documents with a single index update and save.
+        progress is called with the number of embedded and all documents after each batch."""
+        ids, _ = await self.upsert_documents(docs, progress=progress)
+        return ids
+
+    async def upsert_documents(
+        self,
+        docs: list[Document],
+        replace_threshold: float = 0,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> tuple[list[str], list[Document]]:
+        """Insert documents like insert_documents, first removing stored documents of the same
+        area at least replace_threshold similar to any of them. Embeds every text once and
+        saves once, returns the new ids and the removed documents."""
         ids = [str(uuid.uuid4()) for _ in range(len(docs))]
         timestamp = self.get_timestamp()
+        removed: list[Document] = []
 
         if ids:
             for doc, id in zip(docs, ids):
@@ -373,34 +975,151 @@ class Memory:
                 if not doc.metadata.get("area", ""):
                     doc.metadata["area"] = Memory.Area.MAIN.value
 
-            # rate limiter
-            docs_txt = "".join(self.format_docs_plain(docs))
-            await self.agent.rate_limiter(
-                model_config=self.agent.config.embeddings_model, input=docs_txt
+            # embed here instead of aadd_documents so the vectors can be logged
+            vectors = await self._embed_documents(docs, progress)
+
+            if replace_threshold > 0:
+                similar = await anyio.to_thread.run_sync(
+                    self.db.similar_ids,
+                    [doc.metadata["area"] for doc in docs],
+                    vectors,
+                    replace_threshold,
+                )
+                if similar:
+                    removed = self.db.get_by_ids(similar)
+                    self._apply_delete(similar)
+
+            self._apply_insert(docs, vectors)
+            self._persist()
+        return ids, removed
+
+    async def _embed_documents(
+        self,
+        docs: list[Document],
+        progress: Callable[[int, int], None] | None = None,
+    ) -> list[list[float]]:
+        vectors: list[list[float]] = [[] for _ in docs]
+        limiter = anyio.CapacityLimiter(self.EMBED_CONCURRENCY)
+        done = 0
+
+        async def embed_batch(start: int, end: int):
+            nonlocal done
+            batch = docs[start:end]
+            async with limiter:
+                # rate limiter
+                await self.agent.rate_limiter(
+                    model_config=self.agent.config.embeddings_model,
+                    input="".join(self.format_docs_plain(batch)),
+                )
+                # cache backed, only texts not embedded before are sent to the model
+                vectors[start:end] = await self.db.embeddings.aembed_documents(  # type: ignore
+                    [doc.page_content for doc in batch]
+                )
+            done += len(batch)
+            if progress:
+                progress(done, len(docs))
+
+        async with anyio.create_task_group() as tg:
+            for start in range(0, len(docs), self.EMBED_BATCH_SIZE):
+                tg.start_soon(embed_batch, start, start + self.EMBED_BATCH_SIZE)
+        return vectors
+
+    def _apply_insert(self, docs: list[Document], vectors: list[list[float]]):
+        with self.wal.lock:
+            self.db.add_embeddings(
+                text_embeddings=[
+                    (doc.page_content, vector) for doc, vector in zip(docs, vectors)
+                ],
+                metadatas=[doc.metadata for doc in docs],
+                ids=[doc.metadata["id"] for doc in docs],
             )
+            if self._uses_wal():
+                self.wal.append_insert(docs, vectors)
+            Memory._bump_version(self.memory_subdir)
+
+    def _apply_delete(self, ids: list[str]):
+        with self.wal.lock:
+            self.db.delete(ids=ids)
+            if self._uses_wal():
+                self.wal.append_delete(ids)
+            Memory._bump_version(self.memory_subdir)
+
+    def _persist(self):
+        # the store may have grown enough to train the configured index, or an HNSW
+        # graph collected enough deleted nodes, rebuild off the event loop
+        config = self.agent.config
+        with self.wal.lock:
+            for partition in self.db.partitions.values():
+                kind = memory_index.target_type(config.memory_index, partition.index)
+                if kind != memory_index.index_type(partition.index) or (
+                    partition.needs_purge()
+                ):
+                    partition.rebuild_in_background(
+                        kind,
+                        config.memory_nprobe,
+                        config.memory_ef_search,
+                        self.wal.lock,
+                        self._snapshot_rebuilt,
+                    )
+        if not self._uses_wal():
+            self._save_db()  # full snapshot
+        elif self.wal.should_compact():
+            self.wal.compact_in_background(self.db)
+
+    def _snapshot_rebuilt(self):
+        # saves loading from retraining, the log stays valid for any index type
+        if self._uses_wal():
+            self.wal.compact_in_background(self.db)
+        else:
+            self._save_db()
 
-            await self.db.aadd_documents(documents=docs, ids=ids)
-            self._save_db()  # persist
-        return ids
+    @staticmethod
+    def _tune_index(
+        db: PartitionedFaiss,
+        log_item: LogItem | None,
+        index_type: str,
+        nprobe: int,
+        ef_search: int,
+    ) -> bool:
+        """Move the vectors of each area to the configured index type once it applies and
+        set its search parameters, returns whether any index was rebuilt. Runs on load,
+        later changes rebuild in the background from _persist."""
+        migrated = False
+        for area, partition in db.partitions.items():
+            kind = memory_index.target_type(index_type, partition.index)
+            if kind != memory_index.index_type(partition.index) or (
+                partition.deleted is not None
+            ):
+                PrintStyle.standard(f"Migrating memory index of {area} to {kind}...")
+                if log_item:
+                    log_item.stream(
+                        progress=f"\nMigrating memory index of {area} to {kind}"
+                    )
+                partition.rebuild(kind, nprobe, ef_search)
+                migrated = True
+            memory_index.set_search_params(partition.index, nprobe, ef_search)
+        return migrated
+
+    @staticmethod
+    def _bump_version(memory_subdir: str):
+        Memory.versions[memory_subdir] = Memory.versions.get(memory_subdir, 0) + 1
+
+    def _uses_wal(self) -> bool:
+        return self.agent.config.memory_persistence == "wal"
 
     def _save_db(self):
         Memory._save_db_file(self.db, self.memory_subdir)
 
     @staticmethod
-    def _save_db_file(db: MyFaiss, memory_subdir: str):
+    def _save_db_file(db: PartitionedFaiss, memory_subdir: str):
         abs_dir = Memory._abs_db_dir(memory_subdir)
-        db.save_local(folder_path=abs_dir)
-
-    @staticmethod
-    def _get_comparator(condition: str):
-        def comparator(data: dict[str, Any]):
-            try:
-                return ast.literal_eval(condition, {}, data)
-            except Exception as e:
-                # PrintStyle.error(f"Error evaluating condition: {e}")
-                return False
-
-        return comparator
+        wal = MemoryWal.get(abs_dir)
+        with wal.snapshot_lock:
+            with wal.lock:
+                snapshot = db.snapshot()
+            snapshot.write(abs_dir)
+            wal.reset()  # snapshot contains everything logged so far
+            snapshot.remove_stale(abs_dir)
 
     @staticmethod
     def _score_normalizer(val: float) -> float:
@@ -0,0 +1,311 @@
+import ast
+import operator
+import threading
+from functools import lru_cache, reduce
+from typing import Any, Callable
+
+import numpy as np
+
+from src.helpers.print_style import PrintStyle
+
+# metadata value of documents without the key, comparisons with it are always false
+MISSING = object()
+# filter masks kept between changes of the store, recall runs the same few filters
+MASK_CACHE_SIZE = 32
+
+_COMPARISONS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+# same comparison with the sides swapped, for "'main' == area"
+_REFLECTED: dict[type, type] = {
+    ast.Eq: ast.Eq,
+    ast.NotEq: ast.NotEq,
+    ast.Lt: ast.Gt,
+    ast.LtE: ast.GtE,
+    ast.Gt: ast.Lt,
+    ast.GtE: ast.LtE,
+}
+
+MaskFn = Callable[["MetadataColumns"], np.ndarray]
+MatchFn = Callable[[dict[str, Any]], bool]
+
+
+class MetadataColumns:
+    """
+    Metadata values of a vector store by index position, one array per key used in filters.
+    Arrays are built on first use and kept in step with adds and deletes.
+    """
+
+    def __init__(
+        self,
+        metadatas: Callable[[], list[dict[str, Any]]],
+        size: Callable[[], int],
+    ):
+        self._metadatas = metadatas
+        self._size = size
+        # key -> (values, whether the document has the key)
+        self._columns: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self._masks: dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def size(self) -> int:
+        return self._size()
+
+    def get(self, key: str) -> tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            column = self._columns.get(key)
+            if column is None:
+                column = _column([m.get(key, MISSING) for m in self._metadatas()])
+                self._columns[key] = column
+            return column
+
+    def append(self, metadatas: list[dict[str, Any]]):
+        with self._lock:
+            self._masks.clear()
+            for key, (values, present) in self._columns.items():
+                added, added_present = _column([m.get(key, MISSING) for m in metadatas])
+                self._columns[key] = (
+                    np.concatenate((values, added)),
+                    np.concatenate((present, added_present)),
+                )
+
+    def delete(self, positions: np.ndarray):
+        with self._lock:
+            self._masks.clear()
+            for key, (values, present) in self._columns.items():
+                self._columns[key] = (
+                    np.delete(values, positions),
+                    np.delete(present, positions),
+                )
+
+    def mask(self, filter: "MemoryFilter") -> np.ndarray:
+        """Positions matching the filter, read only."""
+        with self._lock:
+            mask = self._masks.get(filter.condition)
+            if mask is None:
+                mask = filter.mask(self)
+                mask.flags.writeable = False
+                if len(self._masks) >= MASK_CACHE_SIZE:
+                    self._masks.clear()
+                self._masks[filter.condition] = mask
+            return mask
+
+
+class MemoryFilter:
+    """
+    Metadata filter parsed from a python expression like "area == 'main' or area == 'fragments'".
+    Supports and, or, not, comparisons and in / not in between metadata keys and literals.
+    Evaluates to a mask over MetadataColumns, or to a bool when called with one metadata dict.
+    """
+
+    def __init__(
+        self, condition: str, mask: MaskFn, match: MatchFn, tree: ast.expr | None = None
+    ):
+        self.condition = condition
+        self._mask = mask
+        self._match = match
+        self._tree = tree
+
+    def mask(self, columns: MetadataColumns) -> np.ndarray:
+        return self._mask(columns)
+
+    def values(self, key: str) -> frozenset | None:
+        """Values of key a matching document can have, None when not limited by the filter."""
+        if self._tree is None:
+            return frozenset()  # invalid filter, nothing matches
+        return _key_values(self._tree, key)
+
+    def __call__(self, metadata: dict[str, Any]) -> bool:
+        return self._match(metadata)
+
+
+@lru_cache(maxsize=256)
+def compile_filter(condition: str) -> MemoryFilter:
+    """Parse a filter expression once, invalid expressions match nothing."""
+    try:
+        tree = ast.parse(condition.strip(), mode="eval").body
+        mask, match = _compile(tree)
+    except (SyntaxError, ValueError) as e:
+        PrintStyle.error(f"Invalid memory filter '{condition}': {e}")
+        return MemoryFilter(
+            condition,
+            lambda columns: np.zeros(columns.size, dtype=bool),
+            lambda metadata: False,
+        )
+    return MemoryFilter(condition, mask, match, tree)
+
+
+def _column(values: list[Any]) -> tuple[np.ndarray, np.ndarray]:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array, np.fromiter((v is not MISSING for v in values), bool, len(values))
+
+
+def _compile(node: ast.expr) -> tuple[MaskFn, MatchFn]:
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return _all(parts)
+        return (
+            lambda columns: reduce(np.logical_or, (p[0](columns) for p in parts)),
+            lambda metadata: any(p[1](metadata) for p in parts),
+        )
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        mask, match = _compile(node.operand)
+        return (
+            lambda columns: ~mask(columns),
+            lambda metadata: not match(metadata),
+        )
+
+    if isinstance(node, ast.Compare):
+        # chained comparisons like "'a' < timestamp < 'b'" hold when every pair does
+        parts = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            parts.append(_comparison(left, op, right))
+            left = right
+        return _all(parts)
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, bool):
+        value = node.value
+        return (
+            lambda columns: np.full(columns.size, value),
+            lambda metadata: value,
+        )
+
+    raise ValueError(f"unsupported expression '{ast.unparse(node)}'")
+
+
+def _all(parts: list[tuple[MaskFn, MatchFn]]) -> tuple[MaskFn, MatchFn]:
+    if len(parts) == 1:
+        return parts[0]
+    return (
+        lambda columns: reduce(np.logical_and, (p[0](columns) for p in parts)),
+        lambda metadata: all(p[1](metadata) for p in parts),
+    )
+
+
+def _comparison(left: ast.expr, op: ast.cmpop, right: ast.expr) -> tuple[MaskFn, MatchFn]:
+    if isinstance(op, (ast.In, ast.NotIn)):
+        if not isinstance(left, ast.Name):
+            raise ValueError("'in' needs a metadata key on the left")
+        key, options = left.id, _literal(right)
+        if not isinstance(options, (list, tuple, set, frozenset)):
+            raise ValueError("'in' needs a list of values on the right")
+        options = list(options)
+        negate = isinstance(op, ast.NotIn)
+        return _key_test(
+            key,
+            lambda values: reduce(
+                np.logical_or,
+                (values == option for option in options),
+                np.zeros(len(values), dtype=bool),
+            ),
+            lambda value: value in options,
+            negate,
+        )
+
+    if type(op) not in _COMPARISONS:
+        raise ValueError(f"unsupported operator '{type(op).__name__}'")
+    if isinstance(right, ast.Name) and not isinstance(left, ast.Name):
+        left, right, op = right, left, _REFLECTED[type(op)]()
+    if not isinstance(left, ast.Name):
+        raise ValueError("comparisons need a metadata key on one side")
+    key, constant = left.id, _literal(right)
+    compare = _COMPARISONS[type(op)]
+    return _key_test(
+        key,
+        lambda values: compare(values, constant),
+        lambda value: compare(value, constant),
+    )
+
+
+def _key_test(
+    key: str,
+    vector: Callable[[np.ndarray], Any],
+    scalar: Callable[[Any], Any],
+    negate: bool = False,
+) -> tuple[MaskFn, MatchFn]:
+    def safe_scalar(value: Any) -> bool:
+        try:
+            return bool(scalar(value)) != negate
+        except TypeError:
+            return False  # values of another type never match, like a failed eval did
+
+    def mask(columns: MetadataColumns) -> np.ndarray:
+        values, present = columns.get(key)
+        values = values[present]
+        result = np.zeros(len(present), dtype=bool)
+        try:
+            hits = np.asarray(vector(values), dtype=bool)
+            if hits.shape != values.shape:
+                raise TypeError("not elementwise")
+            result[present] = hits != negate
+        except TypeError:
+            # mixed value types, compare one by one
+            result[present] = np.fromiter(map(safe_scalar, values), bool, len(values))
+        return result
+
+    def match(metadata: dict[str, Any]) -> bool:
+        return key in metadata and safe_scalar(metadata[key])
+
+    return mask, match
+
+
+def _key_values(node: ast.expr, key: str) -> frozenset | None:
+    if isinstance(node, ast.BoolOp):
+        parts = [_key_values(value, key) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return _intersect(parts)
+        if any(part is None for part in parts):
+            return None
+        return frozenset().union(*parts)  # type: ignore
+
+    if isinstance(node, ast.Compare):
+        parts = []
+        left = node.left
+        for op, right in zip(node.ops, node.comparators):
+            parts.append(_pair_values(left, op, right, key))
+            left = right
+        return _intersect(parts)
+
+    if isinstance(node, ast.Constant) and node.value is False:
+        return frozenset()
+    return None  # negations and constants don't pin values down
+
+
+def _pair_values(
+    left: ast.expr, op: ast.cmpop, right: ast.expr, key: str
+) -> frozenset | None:
+    try:
+        if isinstance(op, ast.Eq):
+            if isinstance(right, ast.Name):
+                left, right = right, left
+            if isinstance(left, ast.Name) and left.id == key:
+                return frozenset([_literal(right)])
+        elif isinstance(op, ast.In) and isinstance(left, ast.Name) and left.id == key:
+            return frozenset(_literal(right))
+    except TypeError:
+        pass  # unhashable literal
+    return None
+
+
+def _intersect(parts: list[frozenset | None]) -> frozenset | None:
+    limits = [part for part in parts if part is not None]
+    if not limits:
+        return None
+    return frozenset.intersection(*limits)
+
+
+def _literal(node: ast.expr) -> Any:
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise ValueError(f"'{ast.unparse(node)}' is not a literal value")
@@ -0,0 +1,163 @@
+import math
+
+# faiss needs to be patched for python 3.12 on arm #TODO remove once not needed
+from src.helpers import faiss_monkey_patch
+import faiss
+import numpy as np
+
+# index types selectable for Memory, all of them score by inner product (cosine on normalized vectors)
+FLAT = "flat"
+IVF_FLAT = "ivf_flat"
+IVF_PQ = "ivf_pq"
+HNSW = "hnsw"
+INDEX_TYPES = (FLAT, IVF_FLAT, IVF_PQ, HNSW)
+
+# approximate indexes are trained once a store has this many vectors, exact search is fast enough below
+TRAIN_MIN_VECTORS = 10_000
+# IVF training points per list, fewer make faiss warn about poor clustering
+TRAIN_POINTS_PER_LIST = 39
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+PQ_BITS = 8
+# HNSW graphs can't drop nodes, deleted ones are skipped in searches and the graph is
+# rebuilt in the background once they make up this share of it
+HNSW_DELETED_RATIO = 0.2
+# graph search ends early when few nodes pass a filter, this few are compared directly
+HNSW_EXACT_MAX = 4096
+
+
+def index_type(index: faiss.Index) -> str:
+    if isinstance(index, faiss.IndexHNSW):
+        return HNSW
+    if isinstance(index, faiss.IndexIVFPQ):
+        return IVF_PQ
+    if isinstance(index, faiss.IndexIVF):
+        return IVF_FLAT
+    return FLAT
+
+
+def target_type(configured: str, index: faiss.Index) -> str:
+    """Type the index should have, the configured one once there are enough vectors to train it."""
+    if configured not in INDEX_TYPES:
+        return FLAT
+    if index.ntotal >= TRAIN_MIN_VECTORS or index_type(index) == configured:
+        return configured
+    return FLAT
+
+
+def build(kind: str, vectors: np.ndarray, dimension: int) -> faiss.Index:
+    """New index of the given type trained on and filled with vectors."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if kind == HNSW:
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif kind in (IVF_FLAT, IVF_PQ):
+        nlist = max(
+            1,
+            min(int(4 * math.sqrt(len(vectors))), len(vectors) // TRAIN_POINTS_PER_LIST),
+        )
+        quantizer = faiss.IndexFlatIP(dimension)
+        if kind == IVF_PQ:
+            index = faiss.IndexIVFPQ(
+                quantizer,
+                dimension,
+                nlist,
+                _pq_subquantizers(dimension),
+                PQ_BITS,
+                faiss.METRIC_INNER_PRODUCT,
+            )
+        else:
+            index = faiss.IndexIVFFlat(
+                quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT
+            )
+        index.train(vectors)
+    else:
+        index = faiss.IndexFlatIP(dimension)
+    if len(vectors):
+        index.add(vectors)
+    return index
+
+
+def vectors_of(index: faiss.Index, start: int = 0) -> np.ndarray:
+    """Stored vectors from position start on in insertion order, approximate for IVF-PQ."""
+    if start >= index.ntotal:
+        return np.zeros((0, index.d), dtype=np.float32)
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+        try:
+            return index.reconstruct_n(start, index.ntotal - start)
+        finally:
+            index.set_direct_map_type(faiss.DirectMap.NoMap)
+    return index.reconstruct_n(start, index.ntotal - start)
+
+
+def set_search_params(index: faiss.Index, nprobe: int, ef_search: int):
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = max(1, min(nprobe, index.nlist))
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = max(1, ef_search)
+
+
+def search(
+    index: faiss.Index, vectors: np.ndarray, k: int, mask: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Search only the positions set in mask, faiss skips the others while scanning."""
+    if mask is None:
+        return index.search(vectors, k)
+    if isinstance(index, faiss.IndexHNSW):
+        positions = np.flatnonzero(mask)
+        if len(positions) <= HNSW_EXACT_MAX:
+            return _exact_search(index, vectors, k, positions)
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(bitmap)
+    # search parameters replace the ones set on the index, copy them over
+    if isinstance(index, faiss.IndexIVF):
+        params = faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    elif isinstance(index, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+    else:
+        params = faiss.SearchParameters(sel=selector)
+    return index.search(vectors, k, params=params)
+
+
+def remove_positions(index: faiss.Index, positions: np.ndarray):
+    """
+    Remove vectors at positions of a flat or IVF index and shift the following ones down
+    like a flat index does, LangChain maps positions to document ids.
+    """
+    if index_type(index) == HNSW:
+        raise ValueError("HNSW indexes can't remove vectors, mark them deleted instead")
+    positions = np.unique(positions.astype(np.int64))
+    index.remove_ids(positions)
+    if index_type(index) != FLAT:
+        # IVF lists keep their labels on removal, renumber them to positions
+        invlists = index.invlists
+        for list_no in range(index.nlist):
+            size = invlists.list_size(list_no)
+            if size:
+                ids = faiss.rev_swig_ptr(invlists.get_ids(list_no), size)
+                ids -= np.searchsorted(positions, ids)
+
+
+def _exact_search(
+    index: faiss.Index, vectors: np.ndarray, k: int, positions: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    candidates = index.reconstruct_batch(positions)
+    scores = np.asarray(vectors, dtype=np.float32) @ candidates.T
+    order = np.argsort(-scores, axis=1)[:, :k]
+    found_scores = np.take_along_axis(scores, order, axis=1)
+    labels = positions[order]
+    if order.shape[1] < k:
+        # same shape as a faiss search, missing results are -1
+        pad = k - order.shape[1]
+        found_scores = np.pad(found_scores, ((0, 0), (0, pad)), constant_values=-np.finfo(np.float32).max)
+        labels = np.pad(labels, ((0, 0), (0, pad)), constant_values=-1)
+    return found_scores, labels
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    # largest common sub-vector count that divides the dimension
+    for m in (64, 48, 32, 24, 16, 12, 8, 4, 2):
+        if dimension % m == 0:
+            return m
+    return 1
@@ -0,0 +1,179 @@
+import os
+import pickle
+import struct
+import threading
+from typing import TYPE_CHECKING, Any, Sequence
+
+from langchain_core.documents import Document
+
+from src.helpers.print_style import PrintStyle
+
+if TYPE_CHECKING:
+    from src.helpers.memory import PartitionedFaiss
+
+
+WAL_FILE = "index.wal"
+# segment frozen by a running (or interrupted) compaction, replayed before WAL_FILE
+COMPACTING_FILE = "index.wal.compacting"
+
+# compact into a new snapshot once the log holds this many records or bytes
+COMPACT_RECORDS = 500
+COMPACT_BYTES = 32 * 1024 * 1024
+
+_FRAME_HEADER = struct.Struct("<I")
+
+
+class MemoryWal:
+    """
+    Append-only write-ahead log of memory inserts and deletes on top of the last
+    FAISS snapshot (one index per memory area) in a memory folder.
+    Records are length-prefixed pickles of embedded documents or deleted ids, so replay
+    never calls the embedding model. A torn record at the end of the log is ignored.
+    """
+
+    _instances: dict[str, "MemoryWal"] = {}
+    _instances_lock = threading.Lock()
+
+    @staticmethod
+    def get(db_dir: str) -> "MemoryWal":
+        with MemoryWal._instances_lock:
+            wal = MemoryWal._instances.get(db_dir)
+            if wal is None:
+                wal = MemoryWal(db_dir)
+                MemoryWal._instances[db_dir] = wal
+            return wal
+
+    def __init__(self, db_dir: str):
+        self.db_dir = db_dir
+        self.path = os.path.join(db_dir, WAL_FILE)
+        self.compacting_path = os.path.join(db_dir, COMPACTING_FILE)
+        # guards db mutations together with their log records
+        self.lock = threading.RLock()
+        # guards snapshot files and log segments on disk
+        self.snapshot_lock = threading.Lock()
+        self.records = 0
+        self.compacting = False
+
+    def append_insert(self, docs: Sequence[Document], vectors: Sequence[Any]):
+        self._append(
+            {
+                "op": "insert",
+                "docs": [
+                    (doc.metadata["id"], doc.page_content, doc.metadata, vector)
+                    for doc, vector in zip(docs, vectors)
+                ],
+            }
+        )
+
+    def append_delete(self, ids: Sequence[str]):
+        self._append({"op": "delete", "ids": list(ids)})
+
+    def replay(self, db: "PartitionedFaiss") -> int:
+        """Apply logged records to a freshly loaded snapshot. Call with snapshot_lock held."""
+        self.records = 0
+        for path in (self.compacting_path, self.path):
+            for record in self._read(path):
+                self._apply(db, record)
+                self.records += 1
+        return self.records
+
+    def reset(self):
+        """Drop the log after a full snapshot has been written."""
+        with self.lock:
+            for path in (self.compacting_path, self.path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.records = 0
+
+    def should_compact(self) -> bool:
+        if self.compacting:
+            return False
+        if self.records >= COMPACT_RECORDS:
+            return True
+        return os.path.exists(self.path) and os.path.getsize(self.path) >= COMPACT_BYTES
+
+    def compact_in_background(self, db: "PartitionedFaiss"):
+        with self.lock:
+            if self.compacting:
+                return
+            self.compacting = True
+        threading.Thread(target=self._compact, args=(db,), daemon=True).start()
+
+    def _compact(self, db: "PartitionedFaiss"):
+        try:
+            with self.snapshot_lock:
+                with self.lock:
+                    # freeze the current state and send new records to a fresh segment
+                    snapshot = db.snapshot()
+                    self._rotate()
+                    self.records = 0
+                # slow part runs without blocking writers, the frozen segment and the
+                # previous generation are removed only once the new one is switched in
+                snapshot.write(self.db_dir)
+                if os.path.exists(self.compacting_path):
+                    os.remove(self.compacting_path)
+                snapshot.remove_stale(self.db_dir)
+        except Exception as e:
+            PrintStyle.error(f"Memory WAL compaction failed in '{self.db_dir}': {e}")
+        finally:
+            self.compacting = False
+
+    def _rotate(self):
+        if not os.path.exists(self.path):
+            return
+        if os.path.exists(self.compacting_path):
+            # an earlier compaction did not finish, keep its records in front
+            with open(self.compacting_path, "ab") as dst, open(self.path, "rb") as src:
+                dst.write(src.read())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.compacting_path)
+
+    def _append(self, record: dict[str, Any]):
+        data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            with open(self.path, "ab") as f:
+                f.write(_FRAME_HEADER.pack(len(data)) + data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.records += 1
+
+    @staticmethod
+    def _read(path: str):
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_FRAME_HEADER.size)
+                if len(header) < _FRAME_HEADER.size:
+                    return
+                (length,) = _FRAME_HEADER.unpack(header)
+                data = f.read(length)
+                if len(data) < length:
+                    return  # torn write at the end of the log
+                yield pickle.loads(data)
+
+    @staticmethod
+    def _apply(db: "PartitionedFaiss", record: dict[str, Any]):
+        if record["op"] == "insert":
+            # replay is idempotent, a snapshot may already contain the records
+            docs = [doc for doc in record["docs"] if not db.has(doc[0])]
+            if docs:
+                db.add_embeddings(
+                    text_embeddings=[(content, vector) for _, content, _, vector in docs],
+                    metadatas=[metadata for _, _, metadata, _ in docs],
+                    ids=[id for id, _, _, _ in docs],
+                )
+        elif record["op"] == "delete":
+            ids = [id for id in record["ids"] if db.has(id)]
+            if ids:
+                db.delete(ids=ids)
+
+    @staticmethod
+    def write_atomic(path: str, data: bytes):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
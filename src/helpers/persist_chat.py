@@ -9,7 +9,7 @@ from src.helpers import files, history
 import json
 from src.config.initialization import initialize_agent
 
-from src.helpers.log import Log, LogItem
+from src.helpers.log import Log, LogItem, OUTPUT_FIELDS
 
 CHATS_FOLDER = "tmp/chats"
 LOG_SIZE = 1000
@@ -129,6 +129,12 @@ def _serialize_context(context: AgentContext):
 def _serialize_agent(agent: Agent):
     data = {k: v for k, v in agent.data.items() if not k.startswith("_")}
 
+    # the live prompt can't be serialized and formatting it on every save is costly,
+    # only the token count is saved
+    window = data.get(Agent.DATA_NAME_CTX_WINDOW)
+    if isinstance(window, dict):
+        data[Agent.DATA_NAME_CTX_WINDOW] = {"tokens": window.get("tokens", 0)}
+
     history = agent.history.serialize()
 
     return {
@@ -235,18 +241,17 @@ def _deserialize_log(data: dict[str, Any]) -> "Log":
     # Deserialize the list of LogItem objects
     i = 0
     for item_data in data.get("logs", []):
-        log.logs.append(
-            LogItem(
-                log=log,  # restore the log reference
-                no=i,  # item_data["no"],
-                type=item_data["type"],
-                heading=item_data.get("heading", ""),
-                content=item_data.get("content", ""),
-                kvps=OrderedDict(item_data["kvps"]) if item_data["kvps"] else None,
-                temp=item_data.get("temp", False),
-            )
+        item = LogItem(
+            log=log,  # restore the log reference
+            no=i,  # item_data["no"],
+            type=item_data["type"],
+            heading=item_data.get("heading", ""),
+            content=item_data.get("content", ""),
+            kvps=OrderedDict(item_data["kvps"]) if item_data["kvps"] else None,
+            temp=item_data.get("temp", False),
         )
-        log.updates.append(i)
+        log.logs.append(item)
+        log._mark_updated(item, OUTPUT_FIELDS)
         i += 1
 
     return log
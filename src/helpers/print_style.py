@@ -4,11 +4,13 @@ import html
 import sys
 from datetime import datetime
 from . import files
+from .log_sink import HtmlLogSink
 
 
 class PrintStyle:
     last_endline = True
     log_file_path = None
+    log_sink: HtmlLogSink | None = None
 
     def __init__(
         self,
@@ -34,10 +36,8 @@ class PrintStyle:
             os.makedirs(logs_dir, exist_ok=True)
             log_filename = datetime.now().strftime("log_%Y%m%d_%H%M%S.html")
             PrintStyle.log_file_path = os.path.join(logs_dir, log_filename)
-            with open(PrintStyle.log_file_path, "w") as f:
-                f.write(
-                    "<html><body style='background-color:black;font-family: Arial, Helvetica, sans-serif;'><pre>\n"
-                )
+            # written in batches by a background thread, streaming calls this per token
+            PrintStyle.log_sink = HtmlLogSink(PrintStyle.log_file_path)
 
     def _get_rgb_color_code(self, color, is_background=False):
         try:
@@ -100,14 +100,12 @@ class PrintStyle:
             self.padding_added = True
 
     def _log_html(self, html):
-        with open(PrintStyle.log_file_path, "a", encoding="utf-8") as f:  # type: ignore # add encoding='utf-8'
-            f.write(html)
+        PrintStyle.log_sink.write(html)  # type: ignore
 
     @staticmethod
     def _close_html_log():
-        if PrintStyle.log_file_path:
-            with open(PrintStyle.log_file_path, "a") as f:
-                f.write("</pre></body></html>")
+        if PrintStyle.log_sink:
+            PrintStyle.log_sink.close()
 
     def get(self, *args, sep=" ", **kwargs):
         text = sep.join(map(str, args))
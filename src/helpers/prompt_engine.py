@@ -4,6 +4,7 @@ Replaces the old file-based prompt system with a more powerful and structured ap
 """
 
 import os
+import time
 import yaml
 from pathlib import Path
 from typing import Dict, Any, Optional, List
@@ -27,6 +28,9 @@ class PromptMetadata:
 
 class PromptEngine:
     """Jinja2-based prompt engine with YAML frontmatter support."""
+
+    # template files are checked for changes at most this often
+    SOURCES_CHECK_SECONDS = 2.0
     
     def __init__(self, prompts_dir: str = "prompts"):
         self.prompts_dir = get_abs_path(prompts_dir)
@@ -44,6 +48,11 @@ class PromptEngine:
         
         # Cache for parsed templates
         self._template_cache: Dict[str, tuple[Template, PromptMetadata]] = {}
+
+        # Change tracking of template files for callers caching rendered prompts
+        self._sources_signature: Optional[tuple] = None
+        self._sources_version = 0
+        self._sources_checked = 0.0
     
     def _upper_first(self, text: str) -> str:
         """Capitalize first letter."""
@@ -143,6 +152,31 @@ class PromptEngine:
         
         return sorted(templates)
     
+    def sources_version(self) -> int:
+        """Number that changes when a template file is added, removed or modified.
+        Parsed templates are dropped on change so renders pick up the new content."""
+        now = time.monotonic()
+        if now - self._sources_checked < self.SOURCES_CHECK_SECONDS:
+            return self._sources_version
+        self._sources_checked = now
+
+        entries = []
+        for root, dirs, files in os.walk(self.prompts_dir):
+            for file in files:
+                try:
+                    stat = os.stat(os.path.join(root, file))
+                except FileNotFoundError:
+                    continue  # removed while scanning
+                entries.append((root, file, stat.st_mtime_ns, stat.st_size))
+        signature = tuple(sorted(entries))
+
+        if signature != self._sources_signature:
+            if self._sources_signature is not None:
+                self._template_cache.clear()
+            self._sources_signature = signature
+            self._sources_version += 1
+        return self._sources_version
+    
     def get_metadata(self, template_path: str) -> PromptMetadata:
         """Get metadata for a template without rendering."""
         _, metadata = self.get_template(template_path)
@@ -1,59 +1,146 @@
-import anyio
+import asyncio
+import math
+import threading
 import time
-from typing import Callable, Awaitable
+from collections import deque
+from typing import Any, Awaitable, Callable
+
+# values added within one slot share a window entry, expiring with the slot's end
+SLOT_SECONDS = 0.1
+
+
+class _Waiter:
+    """Caller queued in wait(), woken on its own event loop from any thread."""
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def wake(self):
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    async def sleep(self, timeout: float | None):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
 
 
 class RateLimiter:
+    """
+    Sliding window limits like requests or tokens per minute, shared by all agents using a model.
+    Keeps running totals, adding and checking is O(1). Callers over a limit queue in order
+    and each sleeps once until enough of the window has expired.
+    """
+
     def __init__(self, seconds: int = 60, **limits: int):
         self.timeframe = seconds
         self.limits = {
             key: value if isinstance(value, (int, float)) else 0
             for key, value in (limits or {}).items()
         }
-        self.values = {key: [] for key in self.limits.keys()}
-        self._lock = anyio.Lock()
+        # key -> deque of [slot, value] oldest first, and the sum of its values
+        self._window: dict[str, deque[list]] = {}
+        self._totals: dict[str, float] = {}
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
 
     def add(self, **kwargs: int):
-        now = time.time()
-        for key, value in kwargs.items():
-            if key not in self.values:
-                self.values[key] = []
-            self.values[key].append((now, value))
-
-    async def cleanup(self):
-        async with self._lock:
-            now = time.time()
-            cutoff = now - self.timeframe
-            for key in self.values:
-                self.values[key] = [(t, v) for t, v in self.values[key] if t > cutoff]
+        slot = math.floor(time.time() / SLOT_SECONDS)
+        with self._lock:
+            for key, value in kwargs.items():
+                entries = self._window.get(key)
+                if entries is None:
+                    entries = self._window[key] = deque()
+                    self._totals[key] = 0
+                if entries and entries[-1][0] == slot:
+                    entries[-1][1] += value
+                else:
+                    entries.append([slot, value])
+                self._totals[key] += value
+
+    def get_total(self, key: str) -> float:
+        with self._lock:
+            self._expire(time.time())
+            return self._totals.get(key, 0)
 
-    async def get_total(self, key: str) -> int:
-        async with self._lock:
-            if key not in self.values:
-                return 0
-            return sum(value for _, value in self.values[key])
+    def state(self) -> dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            wait, _, _, _ = self._next_free(now)
+            return {
+                "timeframe": self.timeframe,
+                "limits": dict(self.limits),
+                "totals": dict(self._totals),
+                "waiting": len(self._waiters),
+                "free_in": round(wait, 2),
+            }
 
     async def wait(
         self,
         callback: Callable[[str, str, int, int], Awaitable[None]] | None = None,
     ):
-        while True:
-            await self.cleanup()
-            should_wait = False
+        with self._lock:
+            if not self._waiters:
+                # nobody queued and within limits, the usual case
+                now = time.time()
+                self._expire(now)
+                if self._next_free(now)[0] <= 0:
+                    return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
 
-            for key, limit in self.limits.items():
-                if limit <= 0:  # Skip if no limit set
+        try:
+            while True:
+                with self._lock:
+                    first = self._waiters[0] is waiter
+                    if first:
+                        now = time.time()
+                        self._expire(now)
+                        delay, key, total, limit = self._next_free(now)
+                        if delay <= 0:
+                            return
+                if not first:
+                    await waiter.sleep(None)  # woken when the one before leaves
                     continue
+                if callback:
+                    msg = f"Rate limit exceeded for {key} ({total}/{limit}), waiting..."
+                    await callback(msg, key, total, limit)
+                await waiter.sleep(delay)
+        finally:
+            with self._lock:
+                first = self._waiters[0] is waiter
+                self._waiters.remove(waiter)
+                if first and self._waiters:
+                    self._waiters[0].wake()
 
-                total = await self.get_total(key)
-                if total > limit:
-                    if callback:
-                        msg = f"Rate limit exceeded for {key} ({total}/{limit}), waiting..."
-                        await callback(msg, key, total, limit)
-                    should_wait = True
-                    break
+    def _expire(self, now: float):
+        # slots expire a full timeframe after they end, same arithmetic as _next_free
+        for key, entries in self._window.items():
+            while entries and self._expires(entries[0][0]) <= now:
+                self._totals[key] -= entries.popleft()[1]
 
-            if not should_wait:
-                break
+    def _expires(self, slot: int) -> float:
+        return (slot + 1) * SLOT_SECONDS + self.timeframe
 
-            await anyio.sleep(1)
+    def _next_free(self, now: float) -> tuple[float, str, int, int]:
+        """Seconds until every limit holds, with the limit waited for longest."""
+        result = (0.0, "", 0, 0)
+        for key, limit in self.limits.items():
+            if limit <= 0:  # Skip if no limit set
+                continue
+            total = self._totals.get(key, 0)
+            excess = total - limit
+            if excess <= 0:
+                continue
+            # oldest slots leave the window first, find the one after which the total fits
+            for slot, value in self._window[key]:
+                excess -= value
+                if excess <= 0:
+                    break
+            wait = self._expires(slot) - now
+            if wait > result[0]:
+                result = (wait, key, total, limit)
+        return result
@@ -4,11 +4,12 @@ import json
 import os
 import re
 import subprocess
+import threading
 from typing import Any, Literal, Optional, Dict, List
 from pydantic import BaseModel, Field, ConfigDict
 
 from src import models
-from src.helpers import runtime, whisper
+from src.helpers import change_notifier, runtime, whisper
 from . import files, dotenv
 from src.helpers.print_style import PrintStyle
 from anyio.from_thread import start_blocking_portal
@@ -16,7 +17,8 @@ from anyio.from_thread import start_blocking_portal
 
 class Settings(BaseModel):
     """Main settings configuration using Pydantic for validation and type safety"""
-    model_config = ConfigDict(extra='forbid')
+    # instances are shared snapshots, changes go through set_settings
+    model_config = ConfigDict(extra='forbid', frozen=True)
     
     # Chat model settings
     chat_model_provider: str = "OPENAI"
@@ -56,6 +58,10 @@ class Settings(BaseModel):
     agent_prompts_subdir: str = "default"
     agent_memory_subdir: str = "default"
     agent_knowledge_subdir: str = "custom"
+    agent_memory_persistence: str = "wal"
+    agent_memory_index: str = "flat"
+    agent_memory_nprobe: int = 16
+    agent_memory_ef_search: int = 512
 
     # API keys
     api_keys: Dict[str, str] = Field(default_factory=dict)
@@ -83,6 +89,8 @@ class Settings(BaseModel):
     mcp_servers: str = '{\n    "mcpServers": {}\n}'
     mcp_client_init_timeout: int = 5
     mcp_client_tool_timeout: int = 120
+    mcp_client_pool_size: int = 4
+    mcp_client_idle_timeout: int = 300
     mcp_server_enabled: bool = False
     mcp_server_token: str = ""
 
@@ -90,10 +98,6 @@ class Settings(BaseModel):
         """Allow dict-style access for backwards compatibility"""
         return getattr(self, key)
     
-    def __setitem__(self, key: str, value: Any) -> None:
-        """Allow dict-style assignment for backwards compatibility"""
-        setattr(self, key, value)
-    
     def get(self, key: str, default: Any = None) -> Any:
         """Allow dict-style .get() for backwards compatibility"""
         return getattr(self, key, default)
@@ -146,7 +150,11 @@ class SettingsOutput(BaseModel):
 PASSWORD_PLACEHOLDER = "****PSWD****"
 
 SETTINGS_FILE = files.get_abs_path("tmp/settings.json")
+# normalized snapshot, replaced as a whole and never modified
 _settings: Settings | None = None
+# bumped with every set_settings, change_notifier.SETTINGS is notified as well
+_version = 0
+_settings_lock = threading.RLock()
 
 # Module-level portal for settings background tasks
 _settings_portal_cm = None
@@ -620,6 +628,56 @@ def convert_out(settings: Settings) -> SettingsOutput:
         )
     )
 
+    agent_fields.append(
+        _create_field(
+            id="agent_memory_persistence",
+            title="Memory persistence",
+            description="How memory changes are written to disk. 'Write-ahead log' appends each insert/delete to a log and compacts it into the index in the background. 'Full snapshot' rewrites the whole index on every change.",
+            type="select",
+            value=settings["agent_memory_persistence"],
+            options=[
+                {"value": "wal", "label": "Write-ahead log"},
+                {"value": "snapshot", "label": "Full snapshot"},
+            ],
+        )
+    )
+
+    agent_fields.append(
+        _create_field(
+            id="agent_memory_index",
+            title="Memory index",
+            description="Vector index used for memory search. Flat search is exact. Approximate indexes are trained once the memory holds 10,000 entries and search large memories much faster. IVF-Flat and HNSW keep recall close to exact search, IVF-PQ trades noticeably lower recall for a much smaller index. Existing vectors are migrated without calling the embedding model. HNSW rebuilds its graph on deletions.",
+            type="select",
+            value=settings["agent_memory_index"],
+            options=[
+                {"value": "flat", "label": "Flat (exact)"},
+                {"value": "ivf_flat", "label": "IVF-Flat"},
+                {"value": "ivf_pq", "label": "IVF-PQ (compressed)"},
+                {"value": "hnsw", "label": "HNSW"},
+            ],
+        )
+    )
+
+    agent_fields.append(
+        _create_field(
+            id="agent_memory_nprobe",
+            title="Memory IVF nprobe",
+            description="Number of IVF lists searched per query. Higher values improve recall of IVF indexes and make search slower.",
+            type="number",
+            value=settings["agent_memory_nprobe"],
+        )
+    )
+
+    agent_fields.append(
+        _create_field(
+            id="agent_memory_ef_search",
+            title="Memory HNSW efSearch",
+            description="Size of the candidate list of HNSW search. Higher values improve recall of HNSW indexes and make search slower. Values well below the default lose noticeable recall.",
+            type="number",
+            value=settings["agent_memory_ef_search"],
+        )
+    )
+
     agent_fields.append(
         _create_field(
             id="agent_knowledge_subdir",
@@ -824,6 +882,26 @@ def convert_out(settings: Settings) -> SettingsOutput:
         )
     )
 
+    mcp_client_fields.append(
+        _create_field(
+            id="mcp_client_pool_size",
+            title="MCP Client Sessions per Server",
+            description="Maximum number of concurrent sessions kept open to each MCP server. Sessions are reused between tool calls instead of reconnecting (or respawning local servers) every time.",
+            type="number",
+            value=settings["mcp_client_pool_size"],
+        )
+    )
+
+    mcp_client_fields.append(
+        _create_field(
+            id="mcp_client_idle_timeout",
+            title="MCP Client Session Idle Timeout",
+            description="Idle MCP sessions are closed after this many seconds. 0 keeps them open until the MCP configuration changes.",
+            type="number",
+            value=settings["mcp_client_idle_timeout"],
+        )
+    )
+
     mcp_client_section = _create_section(
         id="mcp_client",
         title="External MCP Servers",
@@ -915,20 +993,37 @@ def convert_in(settings: dict) -> Settings:
 
 
 def get_settings() -> Settings:
+    """Current settings snapshot, shared and immutable, normalized once when set or loaded."""
+    settings = _settings
+    if settings is None:
+        with _settings_lock:
+            settings = _settings or _load_settings()
+    return settings
+
+
+def settings_version() -> int:
+    """Number that changes with every set_settings, for caches derived from settings."""
+    return _version
+
+
+def _load_settings() -> Settings:
     global _settings
-    if not _settings:
-        _settings = _read_settings_file()
-    if not _settings:
-        _settings = get_default_settings()
-    norm = normalize_settings(_settings)
-    return norm
+    _settings = _read_settings_file() or normalize_settings(get_default_settings())
+    return _settings
 
 
 def set_settings(settings: Settings, apply: bool = True):
-    global _settings
-    previous = _settings
-    _settings = normalize_settings(settings)
-    _write_settings_file(_settings)
+    global _settings, _version
+    with _settings_lock:
+        previous = _settings
+        normalized = normalize_settings(settings)
+        _write_settings_file(normalized)
+        # token is derived from the credentials just written to dotenv
+        _settings = normalized.model_copy(
+            update={"mcp_server_token": create_auth_token()}
+        )
+        _version += 1
+    change_notifier.notify(change_notifier.SETTINGS)
     if apply:
         _apply_settings(previous)
 
@@ -987,22 +1082,22 @@ def _read_settings_file() -> Settings | None:
 def _write_settings_file(settings: Settings):
     _write_sensitive_settings(settings)
     
-    # Create a copy for writing (so we don't modify the original)
-    settings_copy = settings.model_copy()
-    _remove_sensitive_settings(settings_copy)
-
     # write settings
-    content = json.dumps(settings_copy.model_dump(), indent=4)
+    content = json.dumps(_remove_sensitive_settings(settings).model_dump(), indent=4)
     files.write_file(SETTINGS_FILE, content)
 
 
-def _remove_sensitive_settings(settings: Settings):
-    settings["api_keys"] = {}
-    settings["auth_login"] = ""
-    settings["auth_password"] = ""
-    settings["rfc_password"] = ""
-    settings["root_password"] = ""
-    settings["mcp_server_token"] = ""
+def _remove_sensitive_settings(settings: Settings) -> Settings:
+    return settings.model_copy(
+        update={
+            "api_keys": {},
+            "auth_login": "",
+            "auth_password": "",
+            "rfc_password": "",
+            "root_password": "",
+            "mcp_server_token": "",
+        }
+    )
 
 
 def _write_sensitive_settings(settings: Settings):
@@ -1058,6 +1153,10 @@ def get_default_settings() -> Settings:
         agent_prompts_subdir="default",
         agent_memory_subdir="default",
         agent_knowledge_subdir="custom",
+        agent_memory_persistence="wal",
+        agent_memory_index="flat",
+        agent_memory_nprobe=16,
+        agent_memory_ef_search=512,
         rfc_auto_docker=True,
         rfc_url="localhost",
         rfc_password="",
@@ -1071,6 +1170,8 @@ def get_default_settings() -> Settings:
         mcp_servers='{\n    "mcpServers": {}\n}',
         mcp_client_init_timeout=5,
         mcp_client_tool_timeout=120,
+        mcp_client_pool_size=4,
+        mcp_client_idle_timeout=300,
         mcp_server_enabled=False,
         mcp_server_token=create_auth_token(),
     )
@@ -1,37 +1,139 @@
-import select
+import asyncio
+import codecs
+import os
 import subprocess
-import time
 import sys
+import threading
+from collections import deque
 from typing import Optional, Tuple
 
+# output kept per shell, the oldest output is dropped beyond this
+BUFFER_CHARS = 1_000_000
+READ_BYTES = 65536
+
+
+class OutputBuffer:
+    """
+    Ring buffer of shell output addressed by absolute positions, written by a reader thread.
+    Readers on any event loop await new output instead of polling for it.
+    """
+
+    def __init__(self, max_chars: int = BUFFER_CHARS):
+        self.max_chars = max_chars
+        self.start = 0  # position of the oldest buffered char
+        self.end = 0  # position after the newest buffered char
+        self.closed = False
+        self._chunks: deque[str] = deque()
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+
+    def write(self, text: str):
+        with self._lock:
+            self._chunks.append(text)
+            self.end += len(text)
+            excess = self.end - self.start - self.max_chars
+            while excess > 0:
+                first = self._chunks[0]
+                if len(first) <= excess:
+                    self._chunks.popleft()
+                    self.start += len(first)
+                    excess -= len(first)
+                else:
+                    self._chunks[0] = first[excess:]
+                    self.start += excess
+                    excess = 0
+        self._wake()
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+        self._wake()
+
+    def _wake(self):
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def read(self, position: int) -> tuple[str, int]:
+        """Output from position, or from the oldest buffered char if it was dropped,
+        and the position where it ends."""
+        with self._lock:
+            parts = []
+            chunk_start = self.end
+            for chunk in reversed(self._chunks):
+                if chunk_start <= position:
+                    break
+                chunk_start -= len(chunk)
+                parts.append(chunk[max(0, position - chunk_start) :])
+            return "".join(reversed(parts)), self.end
+
+    async def wait(self, position: int, timeout: float) -> bool:
+        """Wait until there is output past position, returns False on timeout."""
+        with self._lock:
+            if self.end > position or self.closed:
+                return True
+            waiter = (asyncio.get_running_loop(), asyncio.Event())
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+
+def _read_loop(fd: int, buffer: OutputBuffer):
+    # decode incrementally so multi-byte characters split between reads stay intact
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while data := os.read(fd, READ_BYTES):
+            text = decoder.decode(data)
+            if text:
+                buffer.write(text)
+        text = decoder.decode(b"", final=True)
+        if text:
+            buffer.write(text)
+    except OSError:
+        pass  # pipe closed with the process
+    finally:
+        buffer.close()
+
 
 class LocalInteractiveSession:
     def __init__(self):
         self.process = None
-        self.full_output = ""
+        self.output = OutputBuffer()
+        self._reader: threading.Thread | None = None
+        self._full_start = 0  # position where the output of the last command starts
+        self._read_pos = 0  # position up to which output was returned by read_output
 
     async def connect(self):
         # Start a new subprocess with the appropriate shell for the OS
         if sys.platform.startswith("win"):
             # Windows
-            self.process = subprocess.Popen(
-                ["cmd.exe"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-            )
+            shell = ["cmd.exe"]
         else:
             # macOS and Linux
-            self.process = subprocess.Popen(
-                ["/bin/bash"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-            )
+            shell = ["/bin/bash"]
+        self.process = subprocess.Popen(
+            shell,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+        # the shell outlives the agent task that started it and may be used from
+        # another event loop later, so output is pumped by a thread, not a task
+        self._reader = threading.Thread(
+            target=_read_loop,
+            args=(self.process.stdout.fileno(), self.output),  # type: ignore
+            name="shell-output",
+            daemon=True,
+        )
+        self._reader.start()
 
     def close(self):
         if self.process:
@@ -41,33 +143,31 @@ class LocalInteractiveSession:
     def send_command(self, command: str):
         if not self.process:
             raise Exception("Shell not connected")
-        self.full_output = ""
-        self.process.stdin.write(command + "\n")  # type: ignore
+        self._full_start = self._read_pos = self.output.end
+        self.process.stdin.write((command + "\n").encode())  # type: ignore
         self.process.stdin.flush()  # type: ignore
 
+    @property
+    def full_output(self) -> str:
+        return self.output.read(self._full_start)[0]
+
+    async def wait_output(self, timeout: float) -> bool:
+        """Wait until there is unread output, returns False on timeout."""
+        if not self.process:
+            raise Exception("Shell not connected")
+        return await self.output.wait(self._read_pos, timeout)
+
     async def read_output(
         self, timeout: float = 0, reset_full_output: bool = False
     ) -> Tuple[str, Optional[str]]:
         if not self.process:
             raise Exception("Shell not connected")
 
+        # buffered output is returned at once, timeout only caps reading from ssh
         if reset_full_output:
-            self.full_output = ""
-        partial_output = ""
-        start_time = time.time()
-
-        while timeout <= 0 or time.time() - start_time < timeout:
-            rlist, _, _ = select.select([self.process.stdout], [], [], 0.1)
-            if rlist:
-                line = self.process.stdout.readline()  # type: ignore
-                if line:
-                    partial_output += line
-                    self.full_output += line
-                    time.sleep(0.1)
-                else:
-                    break  # No more output
-            else:
-                break  # No data available
+            self._full_start = self._read_pos
+
+        partial_output, self._read_pos = self.output.read(self._read_pos)
 
         if not partial_output:
             return self.full_output, None
@@ -1,11 +1,13 @@
 import anyio
 import paramiko
 import time
-import re
 from typing import Tuple
 from src.helpers.log import Log
 from src.helpers.print_style import PrintStyle
-from src.helpers.strings import calculate_valid_match_lengths
+from src.helpers.strings import TerminalDecoder
+
+# bytes taken from the channel per recv, paramiko's default window is 2 MB
+RECV_BYTES = 65536
 
 
 class SSHInteractiveSession:
@@ -24,9 +26,7 @@ class SSHInteractiveSession:
         self.client = paramiko.SSHClient()
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.shell = None
-        self.full_output = b""
-        self.last_command = b""
-        self.trimmed_command_length = 0  # Initialize trimmed_command_length
+        self.decoder = TerminalDecoder()
 
     async def connect(self):
         # try 3 times with wait and then except
@@ -48,7 +48,7 @@ class SSHInteractiveSession:
                     full, part = await self.read_output()
                     if full and not part:
                         return
-                    time.sleep(0.1)
+                    await anyio.sleep(0.1)
             except Exception as e:
                 errors += 1
                 if errors < 3:
@@ -59,7 +59,7 @@ class SSHInteractiveSession:
                         temp=True,
                     )
 
-                    time.sleep(5)
+                    await anyio.sleep(5)
                 else:
                     raise e
 
@@ -72,14 +72,24 @@ class SSHInteractiveSession:
     def send_command(self, command: str):
         if not self.shell:
             raise Exception("Shell not connected")
-        self.full_output = b""
         # if len(command) > 10: # if command is long, add end_comment to split output
         #     command = (command + " \\\n" +SSHInteractiveSession.end_comment + "\n")
         # else:
         command = command + "\n"
-        self.last_command = command.encode()
-        self.trimmed_command_length = 0
-        self.shell.send(self.last_command)
+        self.decoder.reset(echo=command)
+        self.shell.send(command.encode())
+
+    async def wait_output(self, timeout: float) -> bool:
+        """Wait until there is output to receive, returns False on timeout."""
+        if not self.shell:
+            raise Exception("Shell not connected")
+        # paramiko channels can't be awaited, check them at a short interval
+        deadline = time.time() + timeout
+        while not self.shell.recv_ready():
+            if self.shell.closed or time.time() >= deadline:
+                return self.shell.recv_ready()
+            await anyio.sleep(0.05)
+        return True
 
     async def read_output(
         self, timeout: float = 0, reset_full_output: bool = False
@@ -88,126 +98,14 @@ class SSHInteractiveSession:
             raise Exception("Shell not connected")
 
         if reset_full_output:
-            self.full_output = b""
-        partial_output = b""
-        leftover = b""
+            self.decoder.reset()
+        partial_output = []
         start_time = time.time()
 
         while self.shell.recv_ready() and (
             timeout <= 0 or time.time() - start_time < timeout
         ):
+            partial_output.append(self.decoder.feed(self.shell.recv(RECV_BYTES)))
+            await anyio.sleep(0)  # let other tasks run between large chunks
 
-            # data = self.shell.recv(1024)
-            data = self.receive_bytes()
-
-            # Trim own command from output
-            if (
-                self.last_command
-                and len(self.last_command) > self.trimmed_command_length
-            ):
-                command_to_trim = self.last_command[self.trimmed_command_length :]
-                data_to_trim = leftover + data
-
-                trim_com, trim_out = calculate_valid_match_lengths(
-                    command_to_trim,
-                    data_to_trim,
-                    deviation_threshold=8,
-                    deviation_reset=2,
-                    ignore_patterns=[
-                        rb"\x1b\[\?\d{4}[a-zA-Z](?:> )?",  # ANSI escape sequences
-                        rb"\r",  # Carriage return
-                        rb">\s",  # Greater-than symbol
-                    ],
-                    debug=False,
-                )
-
-                leftover = b""
-                if trim_com > 0 and trim_out > 0:
-                    data = data_to_trim[trim_out:]
-                    leftover = data
-                    self.trimmed_command_length += trim_com
-
-            partial_output += data
-            self.full_output += data
-            await anyio.sleep(0.1)  # Prevent busy waiting
-
-        # Decode once at the end
-        decoded_partial_output = partial_output.decode("utf-8", errors="replace")
-        decoded_full_output = self.full_output.decode("utf-8", errors="replace")
-
-        decoded_partial_output = self.clean_string(decoded_partial_output)
-        decoded_full_output = self.clean_string(decoded_full_output)
-
-        return decoded_full_output, decoded_partial_output
-
-    def receive_bytes(self, num_bytes=1024):
-        if not self.shell:
-            raise Exception("Shell not connected")
-        # Receive initial chunk of data
-        shell = self.shell
-        data = self.shell.recv(num_bytes)
-
-        # Helper function to ensure that we receive exactly `num_bytes`
-        def recv_all(num_bytes):
-            data = b""
-            while len(data) < num_bytes:
-                chunk = shell.recv(num_bytes - len(data))
-                if not chunk:
-                    break  # Connection might be closed or no more data
-                data += chunk
-            return data
-
-        # Check if the last byte(s) form an incomplete multi-byte UTF-8 sequence
-        if len(data) > 0:
-            last_byte = data[-1]
-
-            # Check if the last byte is part of a multi-byte UTF-8 sequence (continuation byte)
-            if (last_byte & 0b11000000) == 0b10000000:  # It's a continuation byte
-                # Now, find the start of this sequence by checking earlier bytes
-                for i in range(
-                    2, 5
-                ):  # Look back up to 4 bytes (since UTF-8 is up to 4 bytes long)
-                    if len(data) - i < 0:
-                        break
-                    byte = data[-i]
-
-                    # Detect the leading byte of a multi-byte sequence
-                    if (byte & 0b11100000) == 0b11000000:  # 2-byte sequence (110xxxxx)
-                        data += recv_all(1)  # Need 1 more byte to complete
-                        break
-                    elif (
-                        byte & 0b11110000
-                    ) == 0b11100000:  # 3-byte sequence (1110xxxx)
-                        data += recv_all(2)  # Need 2 more bytes to complete
-                        break
-                    elif (
-                        byte & 0b11111000
-                    ) == 0b11110000:  # 4-byte sequence (11110xxx)
-                        data += recv_all(3)  # Need 3 more bytes to complete
-                        break
-
-        return data
-
-    def clean_string(self, input_string):
-        # Remove ANSI escape codes
-        ansi_escape = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
-        cleaned = ansi_escape.sub("", input_string)
-
-        # Replace '\r\n' with '\n'
-        cleaned = cleaned.replace("\r\n", "\n")
-
-        # remove leading \r
-        cleaned = cleaned.lstrip("\r")
-
-        # Split the string by newline characters to process each segment separately
-        lines = cleaned.split("\n")
-
-        for i in range(len(lines)):
-            # Handle carriage returns '\r' by splitting and taking the last part
-            parts = [part for part in lines[i].split("\r") if part.strip()]
-            if parts:
-                lines[i] = parts[
-                    -1
-                ].rstrip()  # Overwrite with the last part after the last '\r'
-
-        return "\n".join(lines)
+        return self.decoder.text, "".join(partial_output)
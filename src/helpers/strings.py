@@ -1,6 +1,5 @@
+import codecs
 import re
-import sys
-import time
 
 
 def sanitize_string(s: str, encoding: str = "utf-8") -> str:
@@ -10,107 +9,149 @@ def sanitize_string(s: str, encoding: str = "utf-8") -> str:
     return s.encode(encoding, "replace").decode(encoding, "replace")
 
 
-def calculate_valid_match_lengths(
-    first: bytes | str,
-    second: bytes | str,
-    deviation_threshold: int = 5,
-    deviation_reset: int = 5,
-    ignore_patterns: list[bytes | str] = [],
-    debug: bool = False,
-) -> tuple[int, int]:
-
-    first_length = len(first)
-    second_length = len(second)
-
-    i, j = 0, 0
-    deviations = 0
-    matched_since_deviation = 0
-    last_matched_i, last_matched_j = 0, 0  # Track the last matched index
-
-    def skip_ignored_patterns(s, index):
-        """Skip characters in `s` that match any pattern in `ignore_patterns` starting from `index`."""
-        while index < len(s):
-            for pattern in ignore_patterns:
-                match = re.match(pattern, s[index:])
-                if match:
-                    index += len(match.group(0))
-                    break
-            else:
-                break
-        return index
-
-    while i < first_length and j < second_length:
-        # Skip ignored patterns
-        i = skip_ignored_patterns(first, i)
-        j = skip_ignored_patterns(second, j)
-
-        if i < first_length and j < second_length and first[i] == second[j]:
-            last_matched_i, last_matched_j = (
-                i + 1,
-                j + 1,
-            )  # Update last matched position
-            i += 1
-            j += 1
-            matched_since_deviation += 1
-
-            # Reset the deviation counter if we've matched enough characters since the last deviation
-            if matched_since_deviation >= deviation_reset:
-                deviations = 0
-                matched_since_deviation = 0
-        else:
-            # Determine the look-ahead based on the remaining deviation threshold
-            look_ahead = deviation_threshold - deviations
-
-            # Look ahead to find the best match within the remaining deviation allowance
-            best_match = None
-            for k in range(1, look_ahead + 1):
-                if (
-                    i + k < first_length
-                    and j < second_length
-                    and first[i + k] == second[j]
-                ):
-                    best_match = ("i", k)
-                    break
-                if (
-                    j + k < second_length
-                    and i < first_length
-                    and first[i] == second[j + k]
-                ):
-                    best_match = ("j", k)
-                    break
-
-            if best_match:
-                if best_match[0] == "i":
-                    i += best_match[1]
-                elif best_match[0] == "j":
-                    j += best_match[1]
-            else:
-                i += 1
-                j += 1
-
-            deviations += 1
-            matched_since_deviation = 0
-
-            if deviations > deviation_threshold:
-                break
-
-        if debug:
-            output = (
-                f"First (up to {last_matched_i}): {first[:last_matched_i]!r}\n"
-                "\n"
-                f"Second (up to {last_matched_j}): {second[:last_matched_j]!r}\n"
-                "\n"
-                f"Current deviation: {deviations}\n"
-                f"Matched since last deviation: {matched_since_deviation}\n"
-                + "-" * 40
-                + "\n"
-            )
-            sys.stdout.write("\r" + output)
-            sys.stdout.flush()
-            time.sleep(0.01)  # Add a short delay for readability (optional)
-
-    # Return the last matched positions instead of the current indices
-    return last_matched_i, last_matched_j
+# ANSI escape sequences, CSI sequences and two-byte escapes
+ANSI_ESCAPE = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+# escape sequence cut off at the end of a chunk
+ANSI_ESCAPE_PARTIAL = re.compile(r"\x1B(?:\[[0-?]*[ -/]*)?$")
+
+
+class TerminalDecoder:
+    """
+    Turns terminal output into plain text in a single pass over each received chunk.
+    UTF-8 and escape sequences may be split between chunks, the echo of the last command
+    is dropped and carriage returns keep the last non-blank part of a line.
+    """
+
+    def __init__(self, deviation_threshold: int = 8, deviation_reset: int = 2):
+        # echo matching tolerates this many mismatching chars before giving up,
+        # the count resets after deviation_reset chars match again
+        self.deviation_threshold = deviation_threshold
+        self.deviation_reset = deviation_reset
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._escape = ""  # unfinished escape sequence at the end of the last chunk
+        self.reset(echo="")
+
+    def reset(self, echo: str | None = None):
+        """Start a new output. If echo is given, its echo is dropped from the start of the output,
+        otherwise an echo still being dropped stays so."""
+        self._lines: list[str] = []
+        self._committed: str | None = ""
+        self._segment: list[str] = []  # text after the last carriage return
+        self._line_last = ""  # last non-blank text of the line before a carriage return
+        self._emitted = ""  # text of the current line already returned by feed
+        if echo is not None:
+            self._echo = echo
+            self._echo_pos = 0
+            self._echo_held: list[str] = []  # chars skipped since the echo last matched
+            self._deviations = 0
+            self._matched_since_deviation = 0
+            self._prompt = ""  # continuation prompt seen since the last echoed newline
+
+    @property
+    def text(self) -> str:
+        """All output since reset."""
+        if self._committed is None:
+            self._committed = "\n".join(self._lines)
+        if not self._lines:
+            return self._render_line()
+        return self._committed + "\n" + self._render_line()
+
+    def feed(self, data: bytes) -> str:
+        """Add received bytes, returns the text they added to the output."""
+        text = self._escape + self._decoder.decode(data)
+        self._escape = ""
+        partial = ANSI_ESCAPE_PARTIAL.search(text)
+        if partial:
+            self._escape = text[partial.start() :]
+            text = text[: partial.start()]
+        text = ANSI_ESCAPE.sub("", text)
+        if text and self._echo_pos < len(self._echo):
+            text = self._trim_echo(text)
+        return self._write(text)
+
+    def _trim_echo(self, text: str) -> str:
+        echo, pos = self._echo, self._echo_pos
+        for index, char in enumerate(text):
+            if pos >= len(echo):
+                self._echo_pos, self._echo_held = pos, []
+                return text[index:]
+            if pos > 0 and echo[pos - 1] == "\n" and self._continuation(char):
+                self._echo_held.append(char)
+                continue  # "> " prompt of a command continued on the next line
+            if char == echo[pos]:
+                pos += 1
+                self._prompt = ""
+                self._echo_held = []
+                self._matched_since_deviation += 1
+                if self._matched_since_deviation >= self.deviation_reset:
+                    self._deviations = self._matched_since_deviation = 0
+                continue
+            self._echo_held.append(char)
+            if char == "\r":
+                continue  # line wrapping and \r\n of the echo
+            self._deviations += 1
+            self._matched_since_deviation = 0
+            if self._deviations > self.deviation_threshold:
+                # not an echo after all, output everything after the last match
+                held = "".join(self._echo_held)
+                self._echo, self._echo_pos, self._echo_held = "", 0, []
+                return held + text[index + 1 :]
+            # the terminal may have dropped some chars of the command, look ahead in it
+            look_ahead = self.deviation_threshold - self._deviations + 1
+            found = echo.find(char, pos + 1, pos + 1 + look_ahead)
+            if found != -1:
+                pos = found + 1
+                self._echo_held = []
+        self._echo_pos = pos
+        return ""
+
+    def _continuation(self, char: str) -> bool:
+        if (self._prompt, char) in (("", ">"), (">", " ")):
+            self._prompt += char
+            return True
+        return False
+
+    def _write(self, text: str) -> str:
+        if not text:
+            return ""
+        out = []
+        for index, line in enumerate(text.split("\n")):
+            if index > 0:
+                out.append(self._end_line())
+            for part_index, part in enumerate(line.split("\r")):
+                if part_index > 0:
+                    self._carriage_return()
+                if part:
+                    self._segment.append(part)
+        out.append(self._emit(self._render_line()))
+        return "".join(out)
+
+    def _render_line(self) -> str:
+        if len(self._segment) > 1:
+            self._segment = ["".join(self._segment)]
+        segment = self._segment[0] if self._segment else ""
+        return (segment if segment.strip() else self._line_last).rstrip()
+
+    def _carriage_return(self):
+        segment = "".join(self._segment)
+        if segment.strip():
+            self._line_last = segment
+        self._segment = []
+
+    def _end_line(self) -> str:
+        line = self._render_line()
+        out = self._emit(line) + "\n"
+        self._lines.append(line)
+        self._committed = None
+        self._segment, self._line_last, self._emitted = [], "", ""
+        return out
+
+    def _emit(self, line: str) -> str:
+        # only what was not returned yet, or the whole line again if it was overwritten
+        emitted, self._emitted = self._emitted, line
+        if line.startswith(emitted):
+            return line[len(emitted) :]
+        return "\r" + line
 
 
 def format_key(key: str) -> str:
@@ -1,4 +1,7 @@
 import anyio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
 import os
 import random
@@ -31,6 +34,7 @@ from src.helpers.persist_chat import save_tmp_chat
 from src.helpers.print_style import PrintStyle
 from src.helpers.files import get_abs_path, make_dirs, read_file, write_file
 from src.helpers.localization import Localization
+from src.helpers import change_notifier
 import pytz
 from typing import Annotated
 from anyio.from_thread import start_blocking_portal
@@ -219,6 +223,10 @@ class BaseTask(BaseModel):
     def get_next_run(self) -> datetime | None:
         return None
 
+    def get_next_fire_time(self, after: datetime) -> datetime | None:
+        """First time after the given one the task should be launched, None if never."""
+        return None
+
     def get_next_run_minutes(self) -> int | None:
         next_run = self.get_next_run()
         if next_run is None:
@@ -325,6 +333,8 @@ class AdHocTask(BaseTask):
 class ScheduledTask(BaseTask):
     type: Literal[TaskType.SCHEDULED] = TaskType.SCHEDULED
     schedule: TaskSchedule
+    # parsed crontab and timezone, keyed by the schedule they were parsed from
+    _compiled: tuple[tuple[str, str], CronTab, Any] | None = PrivateAttr(default=None)
 
     @classmethod
     def create(
@@ -378,35 +388,32 @@ class ScheduledTask(BaseTask):
             **kwargs,
         )
 
+    def _compiled_schedule(self) -> tuple[CronTab, Any]:
+        """Parse the schedule once, again only after it or its timezone changes."""
+        task_timezone = self.schedule.timezone or Localization.get().get_timezone()
+        key = (self.schedule.to_crontab(), task_timezone)
+        if self._compiled is None or self._compiled[0] != key:
+            self._compiled = (key, CronTab(crontab=key[0]), pytz.timezone(task_timezone))  # type: ignore
+        return self._compiled[1], self._compiled[2]
+
     def check_schedule(self, frequency_seconds: float = 60.0) -> bool:
         with self._lock:
-            crontab = CronTab(crontab=self.schedule.to_crontab())  # type: ignore
-
-            # Get the timezone from the schedule or use UTC as fallback
-            task_timezone = pytz.timezone(
-                self.schedule.timezone or Localization.get().get_timezone()
-            )
-
-            # Get reference time in task's timezone (by default now - frequency_seconds)
-            reference_time = datetime.now(timezone.utc) - timedelta(
-                seconds=frequency_seconds
-            )
-            reference_time = reference_time.astimezone(task_timezone)
-
-            # Get next run time as seconds until next execution
-            next_run_seconds: Optional[float] = crontab.next(  # type: ignore
-                now=reference_time, return_datetime=False
-            )  # type: ignore
-
-            if next_run_seconds is None:
-                return False
-
-            return next_run_seconds < frequency_seconds
+            # Launch if the schedule matched within the last frequency_seconds
+            now = datetime.now(timezone.utc)
+            next_run = self.get_next_fire_time(now - timedelta(seconds=frequency_seconds))
+            return next_run is not None and next_run < now
 
     def get_next_run(self) -> datetime | None:
         with self._lock:
-            crontab = CronTab(crontab=self.schedule.to_crontab())  # type: ignore
-            return crontab.next(now=datetime.now(timezone.utc), return_datetime=True)  # type: ignore
+            return self.get_next_fire_time(datetime.now(timezone.utc))
+
+    def get_next_fire_time(self, after: datetime) -> datetime | None:
+        with self._lock:
+            crontab, task_timezone = self._compiled_schedule()
+            # evaluated in the task's timezone so hours and days match the user's clock
+            return crontab.next(  # type: ignore
+                now=after.astimezone(task_timezone), return_datetime=True
+            )
 
 
 class PlannedTask(BaseTask):
@@ -466,12 +473,21 @@ class PlannedTask(BaseTask):
         with self._lock:
             return self.plan.get_next_launch_time()
 
+    def get_next_fire_time(self, after: datetime) -> datetime | None:
+        # overdue plan items are launched too, they stay in todo until they run
+        with self._lock:
+            return self.plan.get_next_launch_time()
+
     async def on_run(self):
         with self._lock:
             # Get the next launch time and set it as in_progress
             next_launch_time = self.plan.should_launch()
             if next_launch_time is not None:
                 self.plan.set_in_progress(next_launch_time)
+
+        # Persist the in_progress item, so a restart doesn't launch it again
+        if next_launch_time is not None:
+            await TaskScheduler.get().update_task(self.uuid, plan=self.plan)
         await super().on_run()
 
     async def on_finish(self):
@@ -522,38 +538,97 @@ class SchedulerTaskList(BaseModel):
                 make_dirs(path)
                 # Use the portal instead of anyio.run
                 portal = _get_scheduler_portal()
-                cls.__instance = portal.call(cls(tasks=[]).save)
+                cls.__instance = portal.call(cls(tasks=[]).save, True)
             else:
                 cls.__instance = cls.model_validate_json(read_file(path))
+                cls.__instance._file_stat = _file_stat(path)
         else:
-            # Use the portal instead of anyio.run
-            portal = _get_scheduler_portal()
-            portal.call(cls.__instance.reload)
+            cls.__instance._reload_if_changed()
         return cls.__instance
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._lock = threading.RLock()
+        # (mtime_ns, inode, size) of tasks.json when last read or written by us
+        self._file_stat: tuple[int, int, int] | None = None
+        self._dirty = False
+        self._batch_depth = 0
+        # uuids of tasks added, removed or updated since take_changes(), None after a full reload
+        self._changed: set[str] | None = None
+        self._reindex()
+
+    def _reindex(self):
+        with self._lock:
+            self._by_uuid: dict[str, Union[ScheduledTask, AdHocTask, PlannedTask]] = {}
+            self._by_name: dict[str, list[Union[ScheduledTask, AdHocTask, PlannedTask]]] = {}
+            self._by_context: dict[str, list[Union[ScheduledTask, AdHocTask, PlannedTask]]] = {}
+            for task in self.tasks:
+                self._by_uuid[task.uuid] = task
+                self._by_name.setdefault(task.name, []).append(task)
+                if task.context_id:
+                    self._by_context.setdefault(task.context_id, []).append(task)
 
-    async def reload(self) -> "SchedulerTaskList":
+    def _reload_if_changed(self) -> bool:
+        """Re-read tasks.json only if it was replaced or modified since we last read or wrote it."""
         path = get_abs_path(SCHEDULER_FOLDER, "tasks.json")
-        if exists(path):
-            with self._lock:
-                data = self.__class__.model_validate_json(read_file(path))
-                self.tasks.clear()
-                self.tasks.extend(data.tasks)
+        with self._lock:
+            stat = _file_stat(path)
+            if stat is None or stat == self._file_stat:
+                return False
+            if self._dirty:
+                return False  # unsaved changes of a batch win, they are written on flush
+            data = self.__class__.model_validate_json(read_file(path))
+            self.tasks.clear()
+            self.tasks.extend(data.tasks)
+            self._file_stat = stat
+            self._reindex()
+            self._changed = None
+            return True
+
+    async def reload(self) -> "SchedulerTaskList":
+        self._reload_if_changed()
         return self
 
+    def _mark_changed(self, task_uuid: str):
+        self._dirty = True
+        if self._changed is not None:
+            self._changed.add(task_uuid)
+
+    def take_changes(self) -> set[str] | None:
+        """Uuids of tasks changed since the last call, None if all of them may have changed."""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            return changed
+
     async def add_task(
         self, task: Union[ScheduledTask, AdHocTask, PlannedTask]
     ) -> "SchedulerTaskList":
         with self._lock:
             self.tasks.append(task)
+            self._reindex()
+            self._mark_changed(task.uuid)
             await self.save()
         return self
 
-    async def save(self) -> "SchedulerTaskList":
+    @asynccontextmanager
+    async def batch(self):
+        """Collect all saves inside the block into a single write at its end."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+            if self._batch_depth == 0:
+                await self.save()
+
+    async def save(self, force: bool = False) -> "SchedulerTaskList":
+        """Write tasks.json if anything changed since the last write, deferred while in a batch."""
         with self._lock:
+            if not force and (not self._dirty or self._batch_depth > 0):
+                return self
+
             # Debug: check for AdHocTasks with null tokens before saving
             for task in self.tasks:
                 if isinstance(task, AdHocTask):
@@ -573,25 +648,14 @@ class SchedulerTaskList(BaseModel):
             if not exists(path):
                 make_dirs(path)
 
-            # Get the JSON string before writing
-            json_data = self.model_dump_json()
-
-            # Debug: check if 'null' appears as token value in JSON
-            if '"type": "adhoc"' in json_data and '"token": null' in json_data:
-                PrintStyle(italic=True, font_color="red", padding=False).print(
-                    "ERROR: Found null token in JSON output for an adhoc task"
-                )
-
-            write_file(path, json_data)
-
-            # Debug: Verify after saving
-            if exists(path):
-                loaded_json = read_file(path)
-                if '"type": "adhoc"' in loaded_json and '"token": null' in loaded_json:
-                    PrintStyle(italic=True, font_color="red", padding=False).print(
-                        "ERROR: Null token persisted in JSON file for an adhoc task"
-                    )
+            # write to a temporary file and swap it in, readers never see a partial file
+            tmp_path = path + ".tmp"
+            write_file(tmp_path, self.model_dump_json())
+            os.replace(tmp_path, path)
+            self._file_stat = _file_stat(path)
+            self._dirty = False
 
+        change_notifier.notify(change_notifier.TASKS)
         return self
 
     async def update_task_by_uuid(
@@ -611,23 +675,20 @@ class SchedulerTaskList(BaseModel):
         Returns the updated task or None if not found.
         """
         with self._lock:
-            # Reload to ensure we have the latest state
-            await self.reload()
+            # Pick up changes made to the file by another process
+            self._reload_if_changed()
 
             # Find the task
-            task = next(
-                (
-                    task
-                    for task in self.tasks
-                    if task.uuid == task_uuid and verify_func(task)
-                ),
-                None,
-            )
-            if task is None:
+            task = self._by_uuid.get(task_uuid)
+            if task is None or not verify_func(task):
                 return None
 
             # Apply the updates via the provided function
+            name, context_id = task.name, task.context_id
             updater_func(task)
+            if task.name != name or task.context_id != context_id:
+                self._reindex()
+            self._mark_changed(task.uuid)
 
             # Save the changes
             await self.save()
@@ -644,31 +705,22 @@ class SchedulerTaskList(BaseModel):
         with self._lock:
             return [
                 task
-                for task in self.tasks
-                if task.context_id == context_id
-                and (not only_running or task.state == TaskState.RUNNING)
-            ]
-
-    async def get_due_tasks(self) -> list[Union[ScheduledTask, AdHocTask, PlannedTask]]:
-        with self._lock:
-            await self.reload()
-            return [
-                task
-                for task in self.tasks
-                if task.check_schedule() and task.state == TaskState.IDLE
+                for task in self._by_context.get(context_id, ())
+                if not only_running or task.state == TaskState.RUNNING
             ]
 
     def get_task_by_uuid(
         self, task_uuid: str
     ) -> Union[ScheduledTask, AdHocTask, PlannedTask] | None:
         with self._lock:
-            return next((task for task in self.tasks if task.uuid == task_uuid), None)
+            return self._by_uuid.get(task_uuid)
 
     def get_task_by_name(
         self, name: str
     ) -> Union[ScheduledTask, AdHocTask, PlannedTask] | None:
         with self._lock:
-            return next((task for task in self.tasks if task.name == name), None)
+            tasks = self._by_name.get(name)
+            return tasks[0] if tasks else None
 
     def find_task_by_name(
         self, name: str
@@ -678,17 +730,92 @@ class SchedulerTaskList(BaseModel):
 
     async def remove_task_by_uuid(self, task_uuid: str) -> "SchedulerTaskList":
         with self._lock:
-            self.tasks = [task for task in self.tasks if task.uuid != task_uuid]
+            if task_uuid in self._by_uuid:
+                self.tasks = [task for task in self.tasks if task.uuid != task_uuid]
+                self._reindex()
+                self._mark_changed(task_uuid)
             await self.save()
         return self
 
     async def remove_task_by_name(self, name: str) -> "SchedulerTaskList":
         with self._lock:
-            self.tasks = [task for task in self.tasks if task.name != name]
+            if name in self._by_name:
+                for task in self._by_name[name]:
+                    self._mark_changed(task.uuid)
+                self.tasks = [task for task in self.tasks if task.name != name]
+                self._reindex()
             await self.save()
         return self
 
 
+class FireQueue:
+    """
+    Min-heap of task uuids by their next fire time. Only tasks that changed are rescheduled,
+    replaced heap entries stay in the heap and are skipped when they reach the top.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, int, str]] = []
+        self._entries: dict[str, int] = {}  # uuid -> sequence number of its live entry
+        self._sequence = itertools.count()
+        # fire times up to this moment have been handled
+        self.horizon = datetime.now(timezone.utc)
+
+    def schedule(
+        self,
+        task: Union[ScheduledTask, AdHocTask, PlannedTask],
+        allow_overdue: bool = True,
+    ):
+        """Queue the task at its next fire time, overdue ones fire on the next pop unless not allowed."""
+        fire_time = task.get_next_fire_time(self.horizon)
+        if fire_time is None or (not allow_overdue and fire_time <= self.horizon):
+            self._entries.pop(task.uuid, None)
+            return
+        sequence = next(self._sequence)
+        self._entries[task.uuid] = sequence
+        heapq.heappush(self._heap, (fire_time, sequence, task.uuid))
+
+    def drop(self, task_uuid: str):
+        self._entries.pop(task_uuid, None)
+
+    def rebuild(self, tasks: list[Union[ScheduledTask, AdHocTask, PlannedTask]]):
+        self._heap.clear()
+        self._entries.clear()
+        for task in tasks:
+            fire_time = task.get_next_fire_time(self.horizon)
+            if fire_time is not None:
+                sequence = next(self._sequence)
+                self._entries[task.uuid] = sequence
+                self._heap.append((fire_time, sequence, task.uuid))
+        heapq.heapify(self._heap)
+
+    def _skip_stale(self):
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: datetime) -> list[str]:
+        due = []
+        self._skip_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, task_uuid = heapq.heappop(self._heap)
+            del self._entries[task_uuid]
+            due.append(task_uuid)
+            self._skip_stale()
+        return due
+
+    def next_fire_time(self) -> datetime | None:
+        self._skip_stale()
+        return self._heap[0][0] if self._heap else None
+
+
+def _file_stat(path: str) -> tuple[int, int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+
 class TaskScheduler:
 
     _tasks: SchedulerTaskList
@@ -706,6 +833,9 @@ class TaskScheduler:
         if not hasattr(self, "_initialized"):
             self._tasks = SchedulerTaskList.get()
             self._printer = PrintStyle(italic=True, font_color="green", padding=False)
+            self._queue = FireQueue()
+            self._queue_lock = threading.Lock()
+            self._queue_built = False
             self._initialized = True
 
     async def reload(self):
@@ -749,9 +879,41 @@ class TaskScheduler:
     ) -> list[Union[ScheduledTask, AdHocTask, PlannedTask]]:
         return self._tasks.find_task_by_name(name)
 
-    async def tick(self):
-        for task in await self._tasks.get_due_tasks():
+    async def tick(self) -> datetime | None:
+        """Launch the tasks that are due, returns the fire time of the next one."""
+        now = datetime.now(timezone.utc)
+        with self._queue_lock:
+            self._tasks._reload_if_changed()
+            changed = self._tasks.take_changes()
+            if changed is None or not self._queue_built:
+                self._queue.rebuild(self._tasks.get_tasks())
+                self._queue_built = True
+            else:
+                for task_uuid in changed:
+                    task = self._tasks.get_task_by_uuid(task_uuid)
+                    if task is None:
+                        self._queue.drop(task_uuid)
+                    else:
+                        self._queue.schedule(task)
+
+            fired = [
+                task
+                for task_uuid in self._queue.pop_due(now)
+                if (task := self._tasks.get_task_by_uuid(task_uuid)) is not None
+            ]
+            # tasks still running or disabled skip this launch
+            due = [task for task in fired if task.state == TaskState.IDLE]
+
+            self._queue.horizon = now
+            for task in fired:
+                # a plan item stays first in todo until its run starts,
+                # the task is queued again once the run updates it
+                self._queue.schedule(task, allow_overdue=False)
+            next_fire_time = self._queue.next_fire_time()
+
+        for task in due:
             await self._run_task(task)
+        return next_fire_time
 
     async def run_task_by_uuid(self, task_uuid: str, task_context: str | None = None):
         # First reload tasks to ensure we have the latest state
@@ -796,6 +958,9 @@ class TaskScheduler:
     async def save(self):
         await self._tasks.save()
 
+    def batch(self):
+        return self._tasks.batch()
+
     async def update_task_checked(
         self,
         task_uuid: str,
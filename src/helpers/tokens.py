@@ -1,20 +1,51 @@
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import math
+import threading
 from typing import Literal
 import tiktoken
 
 APPROX_BUFFER = 1.1
 TRIM_BUFFER = 0.8
 
+# average characters per token of cl100k_base on english text and code, for estimates
+CHARS_PER_TOKEN = 4
+# texts shorter than this are cheaper to encode than to hash and look up
+CACHE_MIN_CHARS = 256
+CACHE_SIZE = 4096
+
+_cache: OrderedDict[tuple[str, bytes], int] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str = "cl100k_base") -> tiktoken.Encoding:
+    return tiktoken.get_encoding(encoding_name)
+
 
 def count_tokens(text: str, encoding_name="cl100k_base") -> int:
     if not text:
         return 0
 
-    # Get the encoding
-    encoding = tiktoken.get_encoding(encoding_name)
+    if len(text) < CACHE_MIN_CHARS:
+        return len(get_encoding(encoding_name).encode(text))
+
+    # counts of longer texts are cached by content hash
+    key = (encoding_name, hashlib.blake2b(text.encode(), digest_size=16).digest())
+    with _cache_lock:
+        token_count = _cache.get(key)
+        if token_count is not None:
+            _cache.move_to_end(key)
+            return token_count
 
     # Encode the text and count the tokens
-    tokens = encoding.encode(text)
-    token_count = len(tokens)
+    token_count = len(get_encoding(encoding_name).encode(text))
+
+    with _cache_lock:
+        _cache[key] = token_count
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
 
     return token_count
 
@@ -25,6 +56,16 @@ def approximate_tokens(
     return int(count_tokens(text) * APPROX_BUFFER)
 
 
+def estimate_tokens(
+    text: str,
+) -> int:
+    """
+    Fast estimate from text length without tokenizing, for rate limiter accounting.
+    Rounds up, so streamed chunks shorter than a token still count as one.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN * APPROX_BUFFER)
+
+
 def trim_to_tokens(
     text: str,
     max_tokens: int,
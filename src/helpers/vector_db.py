@@ -1,4 +1,4 @@
-from typing import Any, List, Sequence
+from typing import List, Sequence
 import uuid
 from langchain_community.vectorstores import FAISS
 
@@ -16,6 +16,7 @@ from langchain_community.vectorstores.utils import (
 from langchain.embeddings import CacheBackedEmbeddings
 
 from src.core.agent import Agent
+from src.helpers.memory_filter import compile_filter
 
 
 class MyFaiss(FAISS):
@@ -60,7 +61,7 @@ class VectorDB:
     async def search_similarity_threshold(
         self, query: str, limit: int, threshold: float, filter: str = ""
     ):
-        comparator = get_comparator(filter) if filter else None
+        comparator = compile_filter(filter) if filter else None
 
         # rate limiter
         await self.agent.rate_limiter(
@@ -110,13 +111,3 @@ def cosine_normalizer(val: float) -> float:
     )  # float precision can cause values like 1.0000000596046448
     return res
 
-
-def get_comparator(condition: str):
-    def comparator(data: dict[str, Any]):
-        try:
-            return eval(condition, {}, data)
-        except Exception as e:
-            # PrintStyle.error(f"Error evaluating condition: {e}")
-            return False
-
-    return comparator
@@ -3,10 +3,13 @@ Model provider factory and utilities.
 This replaces the model provider logic from the old models.py file.
 """
 
+import hashlib
+import json
 from typing import Any
 from pydantic import SecretStr
 from src.providers.base import ModelType, ModelProvider, parse_chunk
-from src.helpers import dotenv, runtime
+from src.providers.registry import ModelClientRegistry
+from src.helpers import dotenv, runtime, settings
 from src.helpers.dotenv import load_dotenv
 from src.helpers.rate_limiter import RateLimiter
 
@@ -33,6 +36,15 @@ load_dotenv()
 
 rate_limiters: dict[str, RateLimiter] = {}
 
+# model clients reused across calls and agents, dropped when settings change
+model_clients = ModelClientRegistry()
+_model_clients_version = -1
+
+# providers whose LangChain clients take http_client / http_async_client and use the shared pool
+POOLED_PROVIDERS = {ModelProvider.OPENAI, ModelProvider.IOINTEL, ModelProvider.GROQ}
+# services of get_api_key that differ from the provider name
+API_KEY_SERVICES = {ModelProvider.MISTRALAI: "mistral"}
+
 
 # Utility function to get API keys from environment variables
 def get_api_key(service):
@@ -120,10 +132,44 @@ def get_mistralai_chat(model_name: str, **kwargs):
 
 
 def get_model(type: ModelType, provider: ModelProvider, name: str, **kwargs):
-    """Get a model instance from the specified provider"""
+    """Get a model instance from the specified provider, shared with other callers using the same one"""
+    global _model_clients_version
+    version = settings.settings_version()
+    if version != _model_clients_version:
+        _model_clients_version = version
+        model_clients.clear()
+
     fnc_name = f"get_{provider.name.lower()}_{type.name.lower()}"  # function name of model getter
-    model = globals()[fnc_name](name, **kwargs)  # call function by name
-    return model
+    key = (
+        fnc_name,
+        name,
+        json.dumps(kwargs, sort_keys=True, default=str),
+        _credentials_fingerprint(provider),
+    )
+    return model_clients.get(
+        key,
+        lambda **http: globals()[fnc_name](name, **kwargs, **http),  # call function by name
+        pooled=provider in POOLED_PROVIDERS,
+        label={"type": type.value, "provider": provider.value, "name": name},
+    )
+
+
+def get_model_client_stats() -> list[dict[str, Any]]:
+    """Request and latency counters of the model clients in use"""
+    return model_clients.stats()
+
+
+def _credentials_fingerprint(provider: ModelProvider) -> str:
+    # clients are rebuilt when the key or endpoint in .env changes, the key itself is not kept
+    service = API_KEY_SERVICES.get(provider, provider.name.lower())
+    values = [
+        get_api_key(service),
+        dotenv.get_dotenv_value(f"{provider.name}_BASE_URL") or "",
+        (dotenv.get_dotenv_value("HF_TOKEN") or "")
+        if provider == ModelProvider.HUGGINGFACE
+        else "",
+    ]
+    return hashlib.sha256("\0".join(values).encode()).hexdigest()[:16]
 
 
 def get_rate_limiter(
@@ -132,9 +178,20 @@ def get_rate_limiter(
     """Get or create a rate limiter for the specified provider and model"""
     # get or create
     key = f"{provider.name}\\{name}"
-    rate_limiters[key] = limiter = rate_limiters.get(key, RateLimiter(seconds=60))
+    limiter = rate_limiters.get(key)
+    if limiter is None:
+        rate_limiters[key] = limiter = RateLimiter(seconds=60)
     # always update
     limiter.limits["requests"] = requests or 0
     limiter.limits["input"] = input or 0
     limiter.limits["output"] = output or 0
     return limiter
+
+
+def get_rate_limiter_states() -> list[dict[str, Any]]:
+    """Window totals, limits and queued callers of every rate limiter"""
+    states = []
+    for key, limiter in list(rate_limiters.items()):
+        provider, name = key.split("\\", 1)
+        states.append({"provider": provider, "name": name, **limiter.state()})
+    return states
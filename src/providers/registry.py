@@ -0,0 +1,223 @@
+"""
+Registry of model clients shared across calls, iterations and agents.
+Clients of providers that accept httpx clients send through one keep-alive pool,
+so TLS connections to a provider are opened once and reused.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Callable, Hashable
+
+import httpx
+
+# pool shared by all model clients, sized for several agents streaming at once
+POOL_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0
+)
+# providers pass their own timeouts per request, this only covers requests that don't
+TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+# httpcore trace event of a newly opened connection
+_CONNECT_EVENT = "connection.connect_tcp.complete"
+
+
+class ClientStats:
+    """Request counters of one model client, updated from httpx event hooks."""
+
+    def __init__(self):
+        self.uses = 0  # times the client was handed out
+        self.requests = 0
+        self.errors = 0  # responses with an error status
+        self.connections = 0  # connections opened for its requests
+        self.seconds = 0.0  # time to response headers, summed over requests
+        self._lock = threading.Lock()
+
+    def record_use(self):
+        with self._lock:
+            self.uses += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connections += 1
+
+    def record_response(self, response: httpx.Response, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.seconds += seconds
+            if response.is_error:
+                self.errors += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "uses": self.uses,
+                "requests": self.requests,
+                "errors": self.errors,
+                "connections": self.connections,
+                "avg_latency_ms": (
+                    round(self.seconds / self.requests * 1000, 1)
+                    if self.requests
+                    else None
+                ),
+            }
+
+
+class _SharedTransport(httpx.BaseTransport):
+    """Pool used by many httpx clients, closing one of them leaves it open."""
+
+    def __init__(self):
+        self.pool = httpx.HTTPTransport(limits=POOL_LIMITS)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.pool.handle_request(request)
+
+    def close(self):
+        pass  # closed with the registry
+
+
+class _SharedAsyncTransport(httpx.AsyncBaseTransport):
+    """
+    Async pool used by many httpx clients. Connections belong to the event loop that opened them
+    and the app runs several loops (portals, anyio.run), so there is one pool per loop.
+    """
+
+    def __init__(self):
+        self._pools: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.setdefault(
+                    loop, httpx.AsyncHTTPTransport(limits=POOL_LIMITS)
+                )
+        return await pool.handle_async_request(request)
+
+    async def aclose(self):
+        pass  # pools go with their event loops
+
+    def clear(self):
+        with self._lock:
+            self._pools.clear()
+
+
+class _Entry:
+    def __init__(self, client: Any, stats: ClientStats, http: list[httpx.Client]):
+        self.client = client
+        self.stats = stats
+        self.http = http  # sync httpx clients owned by this entry
+
+
+class ModelClientRegistry:
+    """
+    Model clients by key, created once and reused until clear().
+    Keys must cover everything the client is built from: provider, model, kwargs and credentials.
+    """
+
+    def __init__(self):
+        self._entries: dict[Hashable, _Entry] = {}
+        self._labels: dict[Hashable, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._transport = _SharedTransport()
+        self._async_transport = _SharedAsyncTransport()
+
+    def get(
+        self,
+        key: Hashable,
+        create: Callable[..., Any],
+        pooled: bool = False,
+        label: dict[str, Any] | None = None,
+    ) -> Any:
+        """
+        Client for key, made by create() on first use. With pooled, create gets http_client and
+        http_async_client keyword arguments sending through the shared pool.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._create(create, pooled)
+                    self._entries[key] = entry
+                    self._labels[key] = label or {}
+        entry.stats.record_use()
+        return entry.client
+
+    def stats(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [
+                {**self._labels[key], **entry.stats.to_dict()}
+                for key, entry in self._entries.items()
+            ]
+
+    def clear(self):
+        """Drop and close all clients, the next get creates them again. The pool stays open."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._labels.clear()
+        for entry in entries:
+            # requests already streaming finish, the shared pool is not closed with the client
+            for http in entry.http:
+                http.close()
+
+    def close(self):
+        """Drop all clients and close the pool."""
+        self.clear()
+        self._transport.pool.close()
+        self._async_transport.clear()
+
+    def _create(self, create: Callable[..., Any], pooled: bool) -> _Entry:
+        stats = ClientStats()
+        if not pooled:
+            return _Entry(create(), stats, [])
+        http_client = httpx.Client(
+            transport=self._transport,
+            timeout=TIMEOUT,
+            event_hooks=_sync_hooks(stats),
+        )
+        http_async_client = httpx.AsyncClient(
+            transport=self._async_transport,
+            timeout=TIMEOUT,
+            event_hooks=_async_hooks(stats),
+        )
+        client = create(http_client=http_client, http_async_client=http_async_client)
+        return _Entry(client, stats, [http_client])
+
+
+def _sync_hooks(stats: ClientStats) -> dict[str, list[Callable]]:
+    def trace(event: str, info: dict):
+        if event == _CONNECT_EVENT:
+            stats.record_connect()
+
+    def on_request(request: httpx.Request):
+        request.extensions["trace"] = trace
+        request.extensions["started"] = time.perf_counter()
+
+    def on_response(response: httpx.Response):
+        started = response.request.extensions.get("started", time.perf_counter())
+        stats.record_response(response, time.perf_counter() - started)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def _async_hooks(stats: ClientStats) -> dict[str, list[Callable]]:
+    async def trace(event: str, info: dict):
+        if event == _CONNECT_EVENT:
+            stats.record_connect()
+
+    async def on_request(request: httpx.Request):
+        request.extensions["trace"] = trace
+        request.extensions["started"] = time.perf_counter()
+
+    async def on_response(response: httpx.Response):
+        started = response.request.extensions.get("started", time.perf_counter())
+        stats.record_response(response, time.perf_counter() - started)
+
+    return {"request": [on_request], "response": [on_response]}
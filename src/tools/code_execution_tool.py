@@ -202,7 +202,8 @@ class CodeExecution(Tool):
         between_output_timeout=15,  # Wait up to x seconds between outputs
         dialog_timeout=5,  # potential dialog detection timeout
         max_exec_timeout=180,  # hard cap on total runtime
-        sleep_time=0.1,
+        sleep_time=0.1,  # collect output arriving shortly after new output, in one pass
+        check_interval=1,  # wake up without output to check the timeouts
     ):
         # Common shell prompt regex patterns (add more as needed)
         prompt_patterns = [
@@ -225,9 +226,12 @@ class CodeExecution(Tool):
         truncated_output = ""
         got_output = False
 
+        shell = self.state.shells[session]
         while True:
-            await anyio.sleep(sleep_time)
-            full_output, partial_output = await self.state.shells[session].read_output(
+            # wait for new output instead of polling for it
+            if await shell.wait_output(timeout=check_interval):
+                await anyio.sleep(sleep_time)
+            full_output, partial_output = await shell.read_output(
                 timeout=3, reset_full_output=reset_full_output
             )
             reset_full_output = False  # only reset once
@@ -7,11 +7,17 @@ class ResponseTool(Tool):
         return Response(message=self.args["text"], break_loop=True)
 
     async def before_execution(self, **kwargs):
-        self.log = self.agent.context.log.log(
-            type="response",
-            heading=f"{self.agent.agent_name}: Responding",
-            content=self.args.get("text", ""),
-        )
+        # reuse the log item already streamed by the live response extension
+        log_item = self.agent.loop_data.params_temporary.get("log_item_response")
+        if log_item:
+            self.log = log_item
+            self.log.update(content=self.args.get("text", ""))
+        else:
+            self.log = self.agent.context.log.log(
+                type="response",
+                heading=f"{self.agent.agent_name}: Responding",
+                content=self.args.get("text", ""),
+            )
 
     async def after_execution(self, response, **kwargs):
         pass  # do not add anything to the history or output
@@ -0,0 +1,6 @@
+"""Shared pytest setup: the tests import the app from the repository root."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,100 @@
+"""
+Tests of the incremental JSON parser used for streamed agent responses.
+
+Run with: pytest tests/test_dirty_json_stream.py -v
+"""
+
+import copy
+import json
+
+import pytest
+
+from src.helpers.dirty_json import DirtyJson, DirtyJsonStream
+
+RESPONSES = [
+    # plain response with an array of thoughts
+    json.dumps(
+        {
+            "thoughts": ["user greets me", "I should answer"],
+            "tool_name": "response",
+            "tool_args": {"text": "Hello, how can I help?"},
+        },
+        indent=4,
+    ),
+    # escapes, unicode escapes and quotes inside strings
+    json.dumps(
+        {
+            "thoughts": ['say "hi"\n\tthen \\ leave'],
+            "tool_name": "response",
+            "tool_args": {"text": "caf\u00e9 \u2603 and a path C:\\tmp\\x"},
+        },
+        ensure_ascii=True,
+    ),
+    # nested tool_args with numbers, booleans, null and empty containers
+    json.dumps(
+        {
+            "thoughts": [],
+            "tool_name": "code_execution_tool",
+            "tool_args": {
+                "runtime": "python",
+                "session": 0,
+                "reset": False,
+                "timeout": 1.5,
+                "extra": None,
+                "code": "print({'a': [1, 2]})\nprint(\"done\")",
+                "options": {"env": {"A": "1"}, "args": ["-v", "--x"]},
+            },
+        }
+    ),
+]
+
+
+def _feed(parser: DirtyJsonStream, chunk: str, previous: dict | None) -> dict | None:
+    """Feed a chunk and check changed against the keys whose values actually changed."""
+    changed = parser.feed(chunk)
+    value, before = parser.value or {}, previous or {}
+    expected = {
+        key
+        for key in value.keys() | before.keys()
+        if key not in before or key not in value or value[key] != before[key]
+    }
+    assert parser.changed == expected, f"chunk {chunk!r}"
+    # opening the object changes the value without changing a key
+    assert changed == bool(expected) or (previous is None and parser.value == {})
+    return copy.deepcopy(parser.value)
+
+
+@pytest.mark.parametrize("text", RESPONSES)
+def test_split_at_every_offset(text: str):
+    expected = DirtyJson.parse_string(text)
+    for offset in range(len(text) + 1):
+        parser = DirtyJsonStream()
+        previous = _feed(parser, text[:offset], None)
+        _feed(parser, text[offset:], previous)
+        assert parser.done
+        assert parser.value == expected, f"split at {offset}"
+
+
+@pytest.mark.parametrize("text", RESPONSES)
+def test_char_by_char(text: str):
+    parser = DirtyJsonStream()
+    previous = None
+    for c in text:
+        previous = _feed(parser, c, previous)
+    assert parser.value == DirtyJson.parse_string(text)
+    assert parser.completed == ["thoughts", "tool_name", "tool_args"]
+
+
+def test_partial_string_is_visible():
+    parser = DirtyJsonStream()
+    parser.feed('{"tool_name": "response", "tool_args": {"text": "Hel')
+    assert parser.value == {"tool_name": "response", "tool_args": {"text": "Hel"}}
+    assert parser.changed == {"tool_name", "tool_args"}
+    parser.feed('lo\\')  # escape split from the escaped character
+    assert parser.value["tool_args"]["text"] == "Hello"
+    assert parser.changed == {"tool_args"}
+    parser.feed('n')
+    assert parser.value["tool_args"]["text"] == "Hello\n"
+    assert parser.changed == {"tool_args"}
+    parser.feed('", ')  # closing quote only, nothing changes
+    assert parser.changed == set()
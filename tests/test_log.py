@@ -0,0 +1,98 @@
+"""
+Tests of the versioned log output polled by the web UI.
+
+Run with: pytest tests/test_log.py -v
+"""
+
+from src.helpers.log import OUTPUT_FIELDS, Log
+
+
+def _log(items: int = 3, window: int = 1000) -> Log:
+    log = Log(window=window)
+    for i in range(items):
+        log.log(type="info", heading=f"item {i}", content=f"content {i}")
+    return log
+
+
+class TestLogOutput:
+    def test_new_client_gets_whole_log(self):
+        log = _log()
+        out = log.output()
+        assert [item["no"] for item in out] == [0, 1, 2]
+        assert all(key in item for item in out for key in OUTPUT_FIELDS)
+        assert log.output(0) == out
+
+    def test_only_items_changed_after_start(self):
+        log = _log()
+        start = log.version
+        assert log.output(start) == []
+
+        log.logs[0].update(content="changed")
+        log.log(type="info", heading="item 3")
+        out = log.output(start)
+        assert [item["no"] for item in out] == [0, 3]
+
+    def test_items_in_order_of_last_change(self):
+        log = _log()
+        start = log.version
+        log.logs[2].update(content="first")
+        log.logs[0].update(content="second")
+        assert [item["no"] for item in log.output(start)] == [2, 0]
+
+    def test_field_level_deltas(self):
+        log = _log()
+        start = log.version
+        log.logs[1].update(content="changed")
+        assert log.output(start) == [{"no": 1, "id": None, "content": "changed"}]
+
+        start = log.version
+        log.logs[1].stream(content=" more")
+        log.logs[1].update(kvps_update={"tool_name": "response"})
+        assert log.output(start) == [
+            {
+                "no": 1,
+                "id": None,
+                "content": "changed more",
+                "kvps": {"tool_name": "response"},
+            }
+        ]
+
+    def test_update_without_changes_keeps_version(self):
+        log = _log()
+        version = log.version
+        log.logs[0].update()
+        log.logs[0].update(kvps_update={})
+        assert log.version == version
+
+    def test_start_below_window_floor_gets_whole_log(self):
+        log = _log(items=5, window=2)
+        start = 1  # version of the first item, dropped from the window since
+        assert log.updates_floor > start
+        assert len(log.output(start)) == 5
+
+        start = log.updates_floor
+        assert [item["no"] for item in log.output(start)] == [
+            no for no, version in log.updates.items() if version > start
+        ]
+
+    def test_start_above_version_gets_whole_log(self):
+        log = _log()
+        assert len(log.output(log.version + 1)) == 3
+
+    def test_reset_changes_guid(self):
+        log = _log()
+        guid, start = log.guid, log.version
+        item = log.logs[0]
+        log.reset()
+        assert log.guid != guid
+        assert log.version == 0
+        assert log.output() == []
+
+        # items of the old log don't change the new one
+        item.update(content="stale")
+        assert log.version == 0
+
+        # a client still polling with the old version gets the whole new log
+        log.log(type="info", heading="new")
+        assert start > log.version
+        assert [item["heading"] for item in log.output(start)] == ["new"]
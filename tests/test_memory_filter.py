@@ -0,0 +1,122 @@
+"""
+Tests of memory filter expressions, evaluated as masks over metadata columns
+and as a matcher of single metadata dicts.
+
+Run with: pytest tests/test_memory_filter.py -v
+"""
+
+import numpy as np
+import pytest
+
+from src.helpers.memory_filter import MetadataColumns, compile_filter
+
+METADATAS = [
+    {"area": "main", "timestamp": "2024-01-01", "score": 1},
+    {"area": "fragments", "timestamp": "2024-02-01", "score": 2.5},
+    {"area": "solutions", "timestamp": "2024-03-01"},
+    {"area": "main", "score": "high"},  # score of another type
+    {"area": "instruments", "timestamp": 20240401, "score": None},
+    {"timestamp": "2024-05-01", "score": 3},  # no area
+    {},
+    {"area": ["main"], "score": True},  # unhashable value
+]
+
+FILTERS = {
+    "area == 'main'": [0, 3],
+    "'main' == area": [0, 3],
+    "area != 'main'": [1, 2, 4, 7],
+    "area == 'main' or area == 'fragments'": [0, 1, 3],
+    "area == 'main' and score == 1": [0],
+    "not area == 'main'": [1, 2, 4, 5, 6, 7],
+    "not (area == 'main' or score > 2)": [2, 4, 6, 7],
+    "area in ['main', 'solutions']": [0, 2, 3],
+    "area in ('main',)": [0, 3],
+    "area not in ['main', 'solutions']": [1, 4, 7],
+    "score > 1": [1, 5],
+    "score >= 1": [0, 1, 5, 7],
+    "1 < score <= 3": [1, 5],
+    "'2024-01-15' < timestamp < '2024-04-01'": [1, 2],
+    "timestamp < '2024-03-01' or timestamp > 20240000": [0, 1, 4],
+    "missing == 1": [],
+    "missing != 1": [],
+    "missing not in [1]": [],
+    "True": [0, 1, 2, 3, 4, 5, 6, 7],
+    "False": [],
+    "area == 'main' and False": [],
+}
+
+INVALID = [
+    "area ==",
+    "area.startswith('m')",
+    "area == other",
+    "area in 'main'",
+    "len(area) > 1",
+    "area == 'main' if True else False",
+    "__import__('os')",
+]
+
+
+def _columns(metadatas: list[dict]) -> MetadataColumns:
+    return MetadataColumns(lambda: metadatas, lambda: len(metadatas))
+
+
+class TestMemoryFilter:
+    @pytest.mark.parametrize("condition", FILTERS)
+    def test_mask_and_matcher_agree(self, condition: str):
+        filter = compile_filter(condition)
+        mask = filter.mask(_columns(METADATAS))
+        matched = [i for i, metadata in enumerate(METADATAS) if filter(metadata)]
+        assert list(np.flatnonzero(mask)) == matched
+        assert matched == FILTERS[condition]
+
+    @pytest.mark.parametrize("condition", INVALID)
+    def test_invalid_expression_matches_nothing(self, condition: str):
+        filter = compile_filter(condition)
+        assert not filter.mask(_columns(METADATAS)).any()
+        assert not any(filter(metadata) for metadata in METADATAS)
+        assert filter.values("area") == frozenset()
+
+    def test_columns_follow_appends_and_deletes(self):
+        metadatas = list(METADATAS[:3])
+        columns = _columns(metadatas)
+        filter = compile_filter("area == 'main'")
+        assert list(np.flatnonzero(columns.mask(filter))) == [0]
+
+        metadatas.append({"area": "main"})
+        columns.append(metadatas[-1:])
+        assert list(np.flatnonzero(columns.mask(filter))) == [0, 3]
+
+        del metadatas[0]
+        columns.delete(np.array([0]))
+        assert list(np.flatnonzero(columns.mask(filter))) == [2]
+
+    @pytest.mark.parametrize(
+        "condition, areas",
+        [
+            ("area == 'main'", {"main"}),
+            ("'main' == area", {"main"}),
+            ("area == 'main' or area == 'fragments'", {"main", "fragments"}),
+            ("area in ['main', 'solutions']", {"main", "solutions"}),
+            ("area == 'main' and timestamp > '2024'", {"main"}),
+            ("area in ['main', 'solutions'] and area == 'main'", {"main"}),
+            ("area == 'main' and area == 'fragments'", set()),
+            ("area == 'main' or timestamp > '2024'", None),
+            ("area != 'main'", None),
+            ("area not in ['main']", None),
+            ("not area == 'main'", None),
+            ("timestamp > '2024'", None),
+            ("True", None),
+            ("False", set()),
+        ],
+    )
+    def test_values_of_area(self, condition: str, areas: set | None):
+        values = compile_filter(condition).values("area")
+        assert values == (None if areas is None else frozenset(areas))
+        if values is not None:
+            # documents of other areas never match, searches can skip their partitions
+            filter = compile_filter(condition)
+            assert all(
+                metadata.get("area") in values
+                for metadata in METADATAS
+                if filter(metadata)
+            )
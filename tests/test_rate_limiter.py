@@ -0,0 +1,169 @@
+"""
+Tests of the sliding window rate limiter shared by agents using a model.
+
+Run with: pytest tests/test_rate_limiter.py -v
+"""
+
+import asyncio
+
+import pytest
+
+from src.helpers import rate_limiter
+from src.helpers.rate_limiter import RateLimiter, _Waiter
+
+# _Waiter wakes callers on their asyncio loop
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(1000.0)
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def sleeps(monkeypatch, clock):
+    """Timed sleeps of waiters pass on the fake clock at once, their durations are recorded."""
+    recorded: list[float] = []
+    wait_for_wake = _Waiter.sleep
+
+    async def sleep(self, timeout):
+        if timeout is None:
+            return await wait_for_wake(self, None)
+        recorded.append(timeout)
+        clock.now += timeout
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(_Waiter, "sleep", sleep)
+    return recorded
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+class TestRateLimiter:
+    async def test_within_limits_returns_at_once(self, clock, sleeps):
+        limiter = RateLimiter(seconds=60, requests=2)
+        limiter.add(requests=2)
+        await limiter.wait()
+        assert sleeps == []
+
+    async def test_sleeps_once_until_slot_expires(self, clock, sleeps):
+        limiter = RateLimiter(seconds=60, requests=2, input=0)
+        clock.now = 1000.05  # slot ends at 1000.1
+        limiter.add(requests=1, input=1_000_000)  # input has no limit
+        clock.now = 1010.0
+        limiter.add(requests=2)
+
+        messages = []
+
+        async def callback(msg, key, total, limit):
+            messages.append((key, total, limit))
+
+        await limiter.wait(callback=callback)
+        # the oldest request leaves the window a timeframe after its slot ended
+        assert sleeps == [pytest.approx(50.1)]
+        assert messages == [("requests", 3, 2)]
+        assert limiter.get_total("requests") == 2
+
+    async def test_waits_for_the_slot_after_which_total_fits(self, clock, sleeps):
+        limiter = RateLimiter(seconds=60, output=100)
+        for offset in (0.0, 1.0, 2.0):
+            clock.now = 1000.0 + offset
+            limiter.add(output=60)
+        # 180 of 100, the first two slots have to expire
+        await limiter.wait()
+        assert sleeps == [pytest.approx(61.1 - 2.0)]
+
+    async def test_totals_after_expiry(self, clock):
+        limiter = RateLimiter(seconds=10, requests=100)
+        limiter.add(requests=1)
+        limiter.add(requests=2)  # same slot
+        clock.now += 5
+        limiter.add(requests=4)
+        assert limiter.get_total("requests") == 7
+
+        clock.now += 5.05
+        assert limiter.get_total("requests") == 7  # first slot still in the window
+        clock.now += 0.1
+        assert limiter.get_total("requests") == 4
+        clock.now += 5
+        assert limiter.get_total("requests") == 0
+        assert limiter.state()["totals"] == {"requests": 0}
+
+    async def test_fifo_with_cancelled_waiter(self, clock, monkeypatch):
+        # timed sleeps only yield, the test moves the clock
+        async def sleep(self, timeout):
+            if timeout is None:
+                return await wait_for_wake(self, None)
+            await asyncio.sleep(0)
+
+        wait_for_wake = _Waiter.sleep
+        monkeypatch.setattr(_Waiter, "sleep", sleep)
+
+        limiter = RateLimiter(seconds=60, requests=1)
+        limiter.add(requests=2)
+        done: list[str] = []
+
+        async def waiter(name: str):
+            await limiter.wait()
+            done.append(name)
+
+        first = asyncio.create_task(waiter("first"))
+        await _settle()
+        second = asyncio.create_task(waiter("second"))
+        await _settle()
+        third = asyncio.create_task(waiter("third"))
+        await _settle()
+        assert limiter.state()["waiting"] == 3
+
+        second.cancel()
+        await _settle()
+        assert second.cancelled()
+        assert limiter.state()["waiting"] == 2
+        assert done == []
+
+        # the first waiter leaves and hands over to the third
+        clock.now += 61
+        await asyncio.wait_for(asyncio.gather(first, third), 1)
+        assert done == ["first", "third"]
+        assert limiter.state()["waiting"] == 0
+
+    async def test_cancelled_first_waiter_wakes_the_next(self, clock, monkeypatch):
+        async def sleep(self, timeout):
+            if timeout is None:
+                return await wait_for_wake(self, None)
+            await asyncio.sleep(0)
+
+        wait_for_wake = _Waiter.sleep
+        monkeypatch.setattr(_Waiter, "sleep", sleep)
+
+        limiter = RateLimiter(seconds=60, requests=1)
+        limiter.add(requests=2)
+        first = asyncio.create_task(limiter.wait())
+        await _settle()
+        second = asyncio.create_task(limiter.wait())
+        await _settle()
+
+        first.cancel()
+        await _settle()
+        assert first.cancelled()
+        clock.now += 61
+        await asyncio.wait_for(second, 1)
+        assert limiter.state()["waiting"] == 0
@@ -0,0 +1,179 @@
+"""
+Tests of the scheduler's fire queue and tick, without the server or saved tasks.
+
+Run with: pytest tests/test_task_scheduler.py -v
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.helpers import task_scheduler
+from src.helpers.task_scheduler import (
+    FireQueue,
+    PlannedTask,
+    ScheduledTask,
+    SchedulerTaskList,
+    TaskPlan,
+    TaskSchedule,
+    TaskScheduler,
+)
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _planned(name: str, *minutes: int) -> PlannedTask:
+    return PlannedTask.create(
+        name=name,
+        system_prompt="",
+        prompt="",
+        plan=TaskPlan.create(todo=[NOW + timedelta(minutes=m) for m in minutes]),
+    )
+
+
+def _scheduled(name: str, minute: str) -> ScheduledTask:
+    return ScheduledTask.create(
+        name=name,
+        system_prompt="",
+        prompt="",
+        schedule=TaskSchedule(
+            minute=minute, hour="*", day="*", month="*", weekday="*", timezone="UTC"
+        ),
+        timezone="UTC",
+    )
+
+
+def _queue(*tasks) -> FireQueue:
+    queue = FireQueue()
+    queue.horizon = NOW
+    queue.rebuild(list(tasks))
+    return queue
+
+
+class TestFireQueue:
+    def test_pops_in_fire_time_order(self):
+        late, early = _planned("late", 30), _planned("early", 10)
+        middle = _planned("middle", 20)
+        hourly = _scheduled("hourly", "45")
+        queue = _queue(late, early, middle, hourly)
+
+        assert queue.next_fire_time() == NOW + timedelta(minutes=10)
+        assert queue.pop_due(NOW + timedelta(minutes=5)) == []
+        assert queue.pop_due(NOW + timedelta(minutes=25)) == [early.uuid, middle.uuid]
+        assert queue.next_fire_time() == NOW + timedelta(minutes=30)
+        assert queue.pop_due(NOW + timedelta(hours=1)) == [late.uuid, hourly.uuid]
+        assert queue.next_fire_time() is None
+
+    def test_reschedule_after_update(self):
+        first, second = _planned("first", 10), _planned("second", 20)
+        queue = _queue(first, second)
+
+        first.update(plan=TaskPlan.create(todo=[NOW + timedelta(minutes=30)]))
+        queue.schedule(first)
+        # the replaced entry is skipped, the task fires once at its new time
+        assert queue.next_fire_time() == NOW + timedelta(minutes=20)
+        assert queue.pop_due(NOW + timedelta(hours=1)) == [second.uuid, first.uuid]
+
+    def test_overdue_only_when_allowed(self):
+        overdue = _planned("overdue", -5)
+        queue = _queue()
+        queue.schedule(overdue, allow_overdue=False)
+        assert queue.next_fire_time() is None
+        queue.schedule(overdue)
+        assert queue.pop_due(NOW) == [overdue.uuid]
+
+    def test_dropped_and_finished_tasks_never_fire(self):
+        dropped, finished = _planned("dropped", 10), _planned("finished", 20)
+        kept = _planned("kept", 30)
+        queue = _queue(dropped, finished, kept)
+
+        queue.drop(dropped.uuid)
+        finished.update(plan=TaskPlan.create())  # nothing left to launch
+        queue.schedule(finished)
+        assert queue.next_fire_time() == NOW + timedelta(minutes=30)
+        assert queue.pop_due(NOW + timedelta(hours=1)) == [kept.uuid]
+
+
+class TestTick:
+    @pytest.fixture
+    def scheduler(self, monkeypatch):
+        # tasks only in memory, nothing read from or written to tasks.json
+        monkeypatch.setattr(task_scheduler, "_file_stat", lambda path: None)
+
+        async def save(self, force: bool = False):
+            self._dirty = False
+            return self
+
+        monkeypatch.setattr(SchedulerTaskList, "save", save)
+        scheduler = TaskScheduler.__new__(TaskScheduler)
+        scheduler._tasks = SchedulerTaskList(tasks=[])
+        scheduler._queue = FireQueue()
+        scheduler._queue_lock = task_scheduler.threading.Lock()
+        scheduler._queue_built = False
+
+        launched: list[str] = []
+
+        async def run_task(task, task_context=None):
+            launched.append(task.name)
+
+        monkeypatch.setattr(scheduler, "_run_task", run_task)
+        scheduler.launched = launched  # type: ignore
+        return scheduler
+
+    async def test_tick_launches_due_tasks_and_returns_next_fire_time(self, scheduler):
+        now = datetime.now(timezone.utc)
+        due = _planned("due", -1)
+        later = PlannedTask.create(
+            name="later",
+            system_prompt="",
+            prompt="",
+            plan=TaskPlan.create(todo=[now + timedelta(hours=1)]),
+        )
+        await scheduler._tasks.add_task(due)
+        await scheduler._tasks.add_task(later)
+
+        assert await scheduler.tick() == later.plan.todo[0]
+        assert scheduler.launched == ["due"]
+        # the launched plan item stays in todo until its run starts,
+        # it isn't launched again
+        assert await scheduler.tick() == later.plan.todo[0]
+        assert scheduler.launched == ["due"]
+
+    async def test_tick_follows_updates_and_removals(self, scheduler):
+        now = datetime.now(timezone.utc)
+        first = PlannedTask.create(
+            name="first",
+            system_prompt="",
+            prompt="",
+            plan=TaskPlan.create(todo=[now + timedelta(hours=1)]),
+        )
+        second = PlannedTask.create(
+            name="second",
+            system_prompt="",
+            prompt="",
+            plan=TaskPlan.create(todo=[now + timedelta(hours=2)]),
+        )
+        await scheduler._tasks.add_task(first)
+        await scheduler._tasks.add_task(second)
+        assert await scheduler.tick() == first.plan.todo[0]
+
+        # moved later than the other task
+        await scheduler.update_task(
+            first.uuid, plan=TaskPlan.create(todo=[now + timedelta(hours=3)])
+        )
+        assert await scheduler.tick() == second.plan.todo[0]
+
+        await scheduler.remove_task_by_uuid(second.uuid)
+        assert await scheduler.tick() == now + timedelta(hours=3)
+
+        # made due, launched on the next tick
+        await scheduler.update_task(first.uuid, plan=TaskPlan.create(todo=[now]))
+        assert await scheduler.tick() is None
+        assert scheduler.launched == ["first"]
@@ -0,0 +1,118 @@
+"""
+Tests of TerminalDecoder, the streaming decoder of SSH terminal output.
+
+Run with: pytest tests/test_terminal_decoder.py -v
+"""
+
+import pytest
+
+from scripts.bench_terminal_decoder import (
+    calculate_valid_match_lengths,
+    clean_string,
+    make_output,
+)
+from src.helpers.strings import TerminalDecoder
+
+LOOP_COMMAND = "for i in 1 2\ndo echo $i\ndone\n"
+# recorded bash session: bracketed paste mode, echo with "> " continuation prompts, prompt
+LOOP_TRANSCRIPT = (
+    "\x1b[?2004l"
+    "for i in 1 2\r\n> do echo $i\r\n> done\r\n"
+    "1\r\n2\r\n"
+    "\x1b[?2004hroot@container:~# "
+).encode()
+
+
+def _decode(data: bytes, chunk_size: int, echo: str = "") -> tuple[str, str]:
+    """Output text and the concatenated text returned by feed."""
+    decoder = TerminalDecoder()
+    decoder.reset(echo=echo)
+    fed = "".join(
+        decoder.feed(data[offset : offset + chunk_size])
+        for offset in range(0, len(data), chunk_size)
+    )
+    return decoder.text, fed
+
+
+def _previous(data: bytes, command: str, chunk_size: int = 1024) -> str:
+    """The read_output pipeline TerminalDecoder replaced."""
+    last_command = command.encode()
+    trimmed_command_length = 0
+    full_output = b""
+    leftover = b""
+    for offset in range(0, len(data), chunk_size):
+        chunk = data[offset : offset + chunk_size]
+        if len(last_command) > trimmed_command_length:
+            data_to_trim = leftover + chunk
+            trim_com, trim_out = calculate_valid_match_lengths(
+                last_command[trimmed_command_length:],
+                data_to_trim,
+                deviation_threshold=8,
+                deviation_reset=2,
+                ignore_patterns=[rb"\x1b\[\?\d{4}[a-zA-Z](?:> )?", rb"\r", rb">\s"],
+            )
+            leftover = b""
+            if trim_com > 0 and trim_out > 0:
+                chunk = data_to_trim[trim_out:]
+                leftover = chunk
+                trimmed_command_length += trim_com
+        full_output += chunk
+    return clean_string(full_output.decode("utf-8", errors="replace"))
+
+
+class TestTerminalDecoder:
+    def test_utf8_split_at_every_byte(self):
+        data = "café ✓ 😀 done\r\n".encode()
+        for offset in range(len(data) + 1):
+            decoder = TerminalDecoder()
+            fed = decoder.feed(data[:offset]) + decoder.feed(data[offset:])
+            assert decoder.text == "café ✓ 😀 done\n", f"split at {offset}"
+            assert fed == decoder.text
+
+    def test_ansi_escapes_split_at_every_offset(self):
+        data = b"\x1b[32mgreen\x1b[0m and \x1b[1;31mred\x1b[0m\x1b[?2004h"
+        for offset in range(len(data) + 1):
+            decoder = TerminalDecoder()
+            fed = decoder.feed(data[:offset]) + decoder.feed(data[offset:])
+            assert decoder.text == "green and red", f"split at {offset}"
+            assert fed == "green and red"
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 5, 1024])
+    def test_echo_with_continuation_prompts_is_dropped(self, chunk_size: int):
+        text, fed = _decode(LOOP_TRANSCRIPT, chunk_size, echo=LOOP_COMMAND)
+        assert text == "1\n2\nroot@container:~#"
+        assert fed == text
+
+    def test_output_without_echo_is_kept(self):
+        # output sharing no chars with the command, echo matching gives up
+        text, _ = _decode(b"zzzzzzzzzzzz output\r\n", 4, echo="ls -la\n")
+        assert text == "zzzzzzzzzzzz output\n"
+
+    def test_carriage_return_overwrites_line(self):
+        data = b"progress 10%\rprogress 100%\r\nnext\r   \r\n"
+        text, _ = _decode(data, len(data))
+        assert text == "progress 100%\nnext\n"
+
+    def test_overwritten_line_is_returned_again(self):
+        decoder = TerminalDecoder()
+        assert decoder.feed(b"10%") == "10%"
+        assert decoder.feed(b"\r100%") == "\r100%"  # line rewritten, not extended
+        assert decoder.feed(b" done") == " done"
+        assert decoder.feed(b"\r\n") == "\n"
+
+    def test_reset_keeps_echo_until_dropped(self):
+        decoder = TerminalDecoder()
+        decoder.reset(echo="ls\n")
+        decoder.feed(b"l")
+        decoder.reset()  # reset_full_output of read_output, echo still being dropped
+        decoder.feed(b"s\r\nfile\r\n")
+        assert decoder.text == "file\n"
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1024, 65536])
+    def test_same_text_as_previous_pipeline(self, chunk_size: int):
+        command = "pip install -r requirements.txt\n"
+        data = make_output(64 * 1024)
+        assert _decode(data, chunk_size, echo=command)[0] == _previous(data, command)
+        assert _decode(LOOP_TRANSCRIPT, chunk_size, echo=LOOP_COMMAND)[0] == (
+            _previous(LOOP_TRANSCRIPT, LOOP_COMMAND)
+        )
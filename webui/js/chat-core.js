@@ -9,6 +9,7 @@ import { getHandler } from './messages.js';
 let context = null;
 let lastLogVersion = 0;
 let lastLogGuid = null;
+let logItems = {}; // log items by number, polls only return changed fields
 let lastSpokenNo = 0;
 let autoScroll = true;
 let isFirstMessage = false;
@@ -297,18 +298,26 @@ export function switchFromContext(id) {
 }
 
 // Polling System
-export async function poll() {
-    let updated = false;
-    try {
+export function getPollRequest() {
+    return {
+        log_from: lastLogVersion,
+        log_guid: lastLogGuid,
+        context: context,
         // Get timezone from navigator
-        const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
+        timezone: Intl.DateTimeFormat().resolvedOptions().timeZone
+    };
+}
 
+export async function poll() {
+    try {
+        const request = getPollRequest();
         const response = await sendJsonData(
             "/api/v1/poll",
             {
-                log_from: lastLogVersion,
-                context: context,
-                timezone: timezone
+                log_from: request.log_from,
+                log_guid: request.log_guid,
+                context: request.context,
+                timezone: request.timezone
             }
         );
 
@@ -318,6 +327,18 @@ export async function poll() {
             return false;
         }
 
+        return applyPollResponse(response);
+    } catch (error) {
+        console.error('Error:', error);
+        setConnectionStatus(false);
+        return false;
+    }
+}
+
+// Apply a poll response or a pushed event, events only carry the parts that changed
+export function applyPollResponse(response) {
+    let updated = false;
+    try {
         // Handle context setting - only set context if we don't have one or it matches backend
         if (!context) {
             // Only auto-set context if user hasn't made any selection yet
@@ -338,7 +359,7 @@ export async function poll() {
         }
 
         // Only process logs if we have a real context
-        if (context) {
+        if (context && response.log_guid !== undefined) {
             if (lastLogGuid != response.log_guid) {
                 // Only clear history if we have an existing log GUID AND we're not on the first message
                 // This prevents clearing user messages when starting a new chat
@@ -346,15 +367,20 @@ export async function poll() {
                     chatHistory.innerHTML = "";
                 }
                 lastLogVersion = 0;
+                logItems = {};
             }
 
             if (lastLogVersion != response.log_version) {
                 updated = true;
-                for (const log of response.logs) {
+                const logs = [];
+                for (const delta of response.logs) {
+                    const log = Object.assign(logItems[delta.no] || {}, delta);
+                    logItems[log.no] = log;
+                    logs.push(log);
                     const messageId = log.id || log.no; // Use log.id if available
                     setMessage(messageId, log.type, log.heading, log.content, log.temp, log.kvps);
                 }
-                afterMessagesUpdate(response.logs);
+                afterMessagesUpdate(logs);
                 
                 // Reset first message flag after processing logs from the first exchange
                 if (isFirstMessage) {
@@ -363,18 +389,24 @@ export async function poll() {
             }
         }
 
-        lastLogVersion = response.log_version;
-        lastLogGuid = response.log_guid;
+        if (response.log_guid !== undefined) {
+            lastLogVersion = response.log_version;
+            lastLogGuid = response.log_guid;
 
-        updateProgress(response.log_progress, response.log_progress_active);
+            updateProgress(response.log_progress, response.log_progress_active);
 
-        //set ui model vars from backend
-        const inputAD = Alpine.$data(inputSection);
-        inputAD.paused = response.paused;
+            //set ui model vars from backend
+            const inputAD = Alpine.$data(inputSection);
+            inputAD.paused = response.paused;
+        }
 
         // Update status icon state
         setConnectionStatus(true);
 
+        if (response.contexts === undefined) {
+            return updated; // lists did not change
+        }
+
         // Update chats list and sort by created_at time (newer first)
         const chatsAD = Alpine.$data(chatsSection);
         const contexts = response.contexts || [];
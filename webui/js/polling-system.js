@@ -1,12 +1,18 @@
 // Polling System Module
 // Handles real-time polling for updates and connection management
+// Updates are pushed over server-sent events when possible, polling is the fallback
 
-import { poll } from './chat-core.js';
+import { poll, getPollRequest, applyPollResponse } from './chat-core.js';
 
 let pollingInterval = null;
 let isPolling = false;
 const POLL_INTERVAL = 1000; // 1 second
 
+let eventSource = null;
+let eventsContext = null;
+let eventsLogVersion = 0;
+let eventsOpen = false;
+
 export async function startPolling() {
     if (isPolling) {
         console.log('Polling already started');
@@ -36,21 +42,70 @@ export function stopPolling() {
         clearInterval(pollingInterval);
         pollingInterval = null;
     }
+    _closeEvents();
+}
+
+function _dispatchUpdated(updated) {
+    // Optional: Handle specific update events
+    if (updated) {
+        // Dispatch custom event for other modules to listen to
+        document.dispatchEvent(new CustomEvent('chatUpdated', {
+            detail: { timestamp: Date.now() }
+        }));
+    }
+}
+
+function _openEvents(request) {
+    _closeEvents();
+    const params = new URLSearchParams({
+        context: request.context,
+        log_from: request.log_from,
+        timezone: request.timezone
+    });
+    if (request.log_guid) params.set('log_guid', request.log_guid);
+
+    eventSource = new EventSource(`/api/v1/events?${params}`);
+    eventsContext = request.context;
+    eventsLogVersion = request.log_from;
+    eventSource.onopen = () => {
+        eventsOpen = true;
+    };
+    eventSource.onmessage = (event) => {
+        const response = JSON.parse(event.data);
+        const updated = applyPollResponse(response);
+        if (response.log_version !== undefined) eventsLogVersion = response.log_version;
+        _dispatchUpdated(updated);
+    };
+    eventSource.onerror = () => {
+        // fall back to polling until the next interval opens a new stream
+        _closeEvents();
+    };
+}
+
+function _closeEvents() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+    eventsContext = null;
+    eventsOpen = false;
 }
 
 async function _doPoll() {
     if (!isPolling) return;
 
     try {
-        const updated = await poll();
-        
-        // Optional: Handle specific update events
-        if (updated) {
-            // Dispatch custom event for other modules to listen to
-            document.dispatchEvent(new CustomEvent('chatUpdated', {
-                detail: { timestamp: Date.now() }
-            }));
+        const request = getPollRequest();
+        if (request.context && window.EventSource) {
+            // stream for another context or the client log state was reset
+            if (eventSource && (eventsContext !== request.context || request.log_from < eventsLogVersion)) {
+                _closeEvents();
+            }
+            if (eventSource && eventsOpen) return; // updates are pushed
+            if (!eventSource) _openEvents(request);
         }
+
+        _dispatchUpdated(await poll());
     } catch (error) {
         console.error('Error during polling:', error);
         